@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Сборка статики фронтенда: имена с хешем содержимого, .gz/.br, манифест.
+
+Использование:
+    python backend/build_assets.py [--source frontend] [--output frontend/dist]
+"""
+
+import argparse
+import sys
+import os
+
+# Добавляем путь к проекту
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.src.app import ASSETS_PATH, FRONTEND_PATH
+from backend.src.static_assets import build_assets
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка статики фронтенда")
+    parser.add_argument("--source", default=FRONTEND_PATH, help="Исходники фронтенда")
+    parser.add_argument("--output", default=ASSETS_PATH, help="Каталог сборки")
+    parser.add_argument("--no-compress", action="store_true", help="Без .gz/.br")
+    args = parser.parse_args()
+
+    source = os.path.abspath(args.source)
+    output = os.path.abspath(args.output)
+    print(f"📦 Сборка статики: {source} -> {output}")
+
+    manifest = build_assets(source, output, precompress=not args.no_compress)
+
+    for original, hashed in sorted(manifest["assets"].items()):
+        encodings = ", ".join(manifest["precompressed"].get(hashed, [])) or "-"
+        print(f"  {original} -> {hashed} ({encodings})")
+    print(f"✅ Файлов с хешем: {len(manifest['assets'])}, "
+          f"сжатых заранее: {len(manifest['precompressed'])}")
+
+if __name__ == "__main__":
+    main()
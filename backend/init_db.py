@@ -9,7 +9,7 @@ import os
 # Добавляем путь к проекту
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from src.database import engine, Base, SessionLocal
+from src.database import SessionLocal, ensure_db_dir, create_tables
 from src.models import Category, Dish
 import uuid
 
@@ -21,8 +21,8 @@ def init_database():
     
     # Создаем таблицы
     print("📦 Создание таблиц...")
-    Base.metadata.create_all(bind=engine)
-    print("✅ Таблицы созданы")
+    ensure_db_dir()
+    create_tables(force=True)
     
     db = SessionLocal()
     
@@ -0,0 +1,150 @@
+# src/admission.py
+"""
+Контроль допуска запросов (admission control) по классам маршрутов.
+
+Каждый класс - заказы (ordering), меню (menu), списки заказов (listings)
+и отчеты (reports) - имеет свой лимит одновременно выполняемых запросов
+и ограниченную очередь ожидания. Когда очередь класса заполнена или
+ожидание дольше ADMISSION_QUEUE_TIMEOUT, запрос получает 503 с
+Retry-After, не занимая ресурсы процесса.
+
+Классы не делят лимиты между собой, поэтому годовой отчет в обед не
+может занять места, зарезервированные за POST /api/cashier/order.
+Маршруты вне классов (статика, /health, записи админки) не ограничиваются.
+
+Лимиты задаются ADMISSION_LIMITS в виде "класс=параллельно:очередь,...",
+например: ADMISSION_LIMITS="reports=1:2,listings=2:8".
+"""
+from time import perf_counter
+import asyncio
+import os
+
+from . import metrics
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "True").lower() in ("true", "1", "t")
+
+# Сколько секунд запрос может ждать в очереди своего класса
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 10))
+
+# (параллельно, очередь, Retry-After в секундах)
+DEFAULT_LIMITS = {
+    "ordering": (32, 256, 1),
+    "menu": (8, 64, 2),
+    "listings": (4, 16, 5),
+    "reports": (2, 4, 30),
+}
+
+ADMISSION_IN_FLIGHT = metrics.REGISTRY.gauge(
+    "admission_in_flight", "Выполняемые запросы по классам маршрутов", ("route_class",)
+)
+ADMISSION_QUEUE_DEPTH = metrics.REGISTRY.gauge(
+    "admission_queue_depth", "Запросы в очереди по классам маршрутов", ("route_class",)
+)
+ADMISSION_REJECTED = metrics.REGISTRY.counter(
+    "admission_rejected_total", "Отклоненные запросы (503)", ("route_class", "reason")
+)
+ADMISSION_WAIT = metrics.REGISTRY.histogram(
+    "admission_wait_seconds", "Время ожидания в очереди", ("route_class",)
+)
+
+def route_class(method, path):
+    """Класс маршрута для admission control или None (без ограничений)"""
+    if method == "POST" and path.startswith("/api/cashier/order"):
+        return "ordering"
+    if method != "GET":
+        return None
+    if path.startswith("/api/reports/"):
+        return "reports"
+    if path.startswith(("/api/cashier/menu", "/api/admin/dishes", "/api/admin/categories")):
+        return "menu"
+    if path.startswith(("/api/cashier/orders", "/api/admin/orders")):
+        return "listings"
+    return None
+
+def parse_limits(value, defaults=DEFAULT_LIMITS):
+    """"reports=1:2,listings=2:8" -> лимиты поверх значений по умолчанию"""
+    limits = dict(defaults)
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        name, _, spec = part.partition("=")
+        name = name.strip()
+        if name not in limits:
+            raise ValueError(f"Неизвестный класс маршрутов: {name}")
+        concurrency, _, queue_size = spec.partition(":")
+        _, default_queue, retry_after = limits[name]
+        limits[name] = (
+            int(concurrency),
+            int(queue_size) if queue_size else default_queue,
+            retry_after
+        )
+    return limits
+
+class Rejected(Exception):
+    """Запрос не допущен: очередь класса заполнена или истекло ожидание"""
+
+    def __init__(self, route_class, reason, retry_after):
+        super().__init__(f"{route_class}: {reason}")
+        self.route_class = route_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+class ClassLimiter:
+    """Лимит параллельных запросов класса с ограниченной очередью"""
+
+    def __init__(self, name, concurrency, queue_size, retry_after, timeout=ADMISSION_QUEUE_TIMEOUT):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def _reject(self, reason):
+        ADMISSION_REJECTED.inc(self.name, reason)
+        raise Rejected(self.name, reason, self.retry_after)
+
+    async def acquire(self):
+        if not self._semaphore.locked():
+            # Есть свободное место - захват без ожидания
+            await self._semaphore.acquire()
+        else:
+            if self.waiting >= self.queue_size:
+                self._reject("queue_full")
+            await self._wait()
+
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.set(self.name, value=self.in_flight)
+
+    async def _wait(self):
+        self.waiting += 1
+        ADMISSION_QUEUE_DEPTH.set(self.name, value=self.waiting)
+        start = perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self._reject("timeout")
+        finally:
+            self.waiting -= 1
+            ADMISSION_QUEUE_DEPTH.set(self.name, value=self.waiting)
+            ADMISSION_WAIT.observe(perf_counter() - start, self.name)
+
+    def release(self):
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.set(self.name, value=self.in_flight)
+        self._semaphore.release()
+
+class AdmissionController:
+    """Набор лимитеров по классам маршрутов"""
+
+    def __init__(self, limits=None, timeout=ADMISSION_QUEUE_TIMEOUT):
+        if limits is None:
+            limits = parse_limits(os.getenv("ADMISSION_LIMITS", ""))
+        self.limiters = {
+            name: ClassLimiter(name, concurrency, queue_size, retry_after, timeout)
+            for name, (concurrency, queue_size, retry_after) in limits.items()
+        }
+
+    def limiter_for(self, method, path):
+        name = route_class(method, path)
+        return self.limiters.get(name) if name else None
@@ -1,5 +1,6 @@
 from .cashier import router as cashier_router
 from .admin import router as admin_router
 from .reports import router as reports_router
+from .diagnostics import router as diagnostics_router
 
-__all__ = ["cashier_router", "admin_router", "reports_router"]
+__all__ = ["cashier_router", "admin_router", "reports_router", "diagnostics_router"]
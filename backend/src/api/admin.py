@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
@@ -7,17 +7,23 @@ from ..database import get_db
 from ..models import *
 from ..schemas.category import CategoryCreate, CategoryUpdate
 from ..schemas.dish import DishCreate, DishUpdate
+from ..profiling import ProfiledRoute
+from ..responses import FastJSONResponse
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
+
+# Обработчики - обычные def: запросы к БД синхронные, FastAPI выполняет
+# их в пуле потоков, и event loop (прием заказов, admission control)
+# не ждет базу
 
 # --- Категории ---
 @router.get("/categories")
-async def get_categories(db: Session = Depends(get_db)):
+def get_categories(db: Session = Depends(get_db)):
     """Получить все категории"""
     return db.query(Category).all()
 
 @router.post("/categories")
-async def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
+def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
     """Создать новую категорию"""
     new_category = Category(name=category.name)
     db.add(new_category)
@@ -26,7 +32,7 @@ async def create_category(category: CategoryCreate, db: Session = Depends(get_db
     return new_category
 
 @router.put("/categories/{category_id}")
-async def update_category(category_id: str, category: CategoryUpdate, db: Session = Depends(get_db)):
+def update_category(category_id: str, category: CategoryUpdate, db: Session = Depends(get_db)):
     """Обновить категорию"""
     db_category = db.query(Category).filter(Category.category_id == category_id).first()
     if not db_category:
@@ -38,7 +44,7 @@ async def update_category(category_id: str, category: CategoryUpdate, db: Sessio
     return db_category
 
 @router.delete("/categories/{category_id}")
-async def delete_category(category_id: str, db: Session = Depends(get_db)):
+def delete_category(category_id: str, db: Session = Depends(get_db)):
     """Удалить категорию"""
     db_category = db.query(Category).filter(Category.category_id == category_id).first()
     if not db_category:
@@ -58,22 +64,35 @@ async def delete_category(category_id: str, db: Session = Depends(get_db)):
 
 # --- Блюда ---
 @router.get("/dishes")
-async def get_dishes(db: Session = Depends(get_db)):
+def get_dishes(db: Session = Depends(get_db)):
     """Получить все блюда"""
-    dishes = db.query(Dish).join(Category).all()
+    # Только нужные колонки: строки без ORM объектов и identity map
+    dishes = db.query(
+        Dish.dish_id, Dish.name, Dish.price, Dish.category_id, Category.name
+    ).join(Category).all()
     result = []
-    for dish in dishes:
+    for dish_id, name, price, category_id, category_name in dishes:
         result.append({
-            "dish_id": dish.dish_id,
-            "name": dish.name,
-            "price": float(dish.price),
-            "category_id": dish.category_id,
-            "category_name": dish.category.name if dish.category else ""
+            "dish_id": dish_id,
+            "name": name,
+            "price": price,
+            "category_id": category_id,
+            "category_name": category_name or ""
         })
-    return result
+    return FastJSONResponse(result)
+
+@router.get("/dishes/search")
+def find_dishes(
+    q: str = Query(..., min_length=1, max_length=100, description="Начало слов названия блюда или категории"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
+    """Поиск блюд по префиксам слов (индекс FTS5) с постраничной выдачей"""
+    return FastJSONResponse(search_dishes(db, q, limit=limit, offset=offset))
 
 @router.post("/dishes")
-async def create_dish(dish: DishCreate, db: Session = Depends(get_db)):
+def create_dish(dish: DishCreate, db: Session = Depends(get_db)):
     """Создать новое блюдо"""
     # Проверяем существование категории
     category = db.query(Category).filter(Category.category_id == dish.category_id).first()
@@ -92,7 +111,7 @@ async def create_dish(dish: DishCreate, db: Session = Depends(get_db)):
     return new_dish
 
 @router.put("/dishes/{dish_id}")
-async def update_dish(dish_id: str, dish: DishUpdate, db: Session = Depends(get_db)):
+def update_dish(dish_id: str, dish: DishUpdate, db: Session = Depends(get_db)):
     """Обновить блюдо"""
     db_dish = db.query(Dish).filter(Dish.dish_id == dish_id).first()
     if not db_dish:
@@ -115,7 +134,7 @@ async def update_dish(dish_id: str, dish: DishUpdate, db: Session = Depends(get_
     return db_dish
 
 @router.delete("/dishes/{dish_id}")
-async def delete_dish(dish_id: str, db: Session = Depends(get_db)):
+def delete_dish(dish_id: str, db: Session = Depends(get_db)):
     """Удалить блюдо"""
     db_dish = db.query(Dish).filter(Dish.dish_id == dish_id).first()
     if not db_dish:
@@ -128,13 +147,21 @@ async def delete_dish(dish_id: str, db: Session = Depends(get_db)):
             status_code=400, 
             detail=f"Невозможно удалить блюдо, оно есть в {order_items_count} заказах"
         )
+    # Позиции старых дней свернуты в итоги (src/maintenance.py): без блюда
+    # они выпали бы из отчетов по категориям и популярным блюдам
+    rollup_days = db.query(DailyDishSales).filter(DailyDishSales.dish_id == dish_id).count()
+    if rollup_days > 0:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Невозможно удалить блюдо, оно есть в итогах продаж за {rollup_days} дн."
+        )
     
     db.delete(db_dish)
     db.commit()
     return {"message": "Блюдо удалено"}
 
 @router.get("/orders/by-date")
-async def get_orders_by_date(
+def get_orders_by_date(
     start_date: str = None,
     end_date: str = None,
     db: Session = Depends(get_db)
@@ -143,20 +170,21 @@ async def get_orders_by_date(
     from datetime import datetime, date
     from sqlalchemy import func, and_
 
-    # Если даты не указаны, возвращаем все заказы
-    query = db.query(Order)
+    # Если даты не указаны, возвращаем все заказы.
+    # Количество позиций считаем подзапросом в том же SELECT
+    query = db.query(Order, item_count_subquery())
 
     if start_date:
         try:
             start = datetime.strptime(start_date, "%Y-%m-%d").date()
-            query = query.filter(func.date(Order.order_date) >= start)
+            query = query.filter(business_day_range(start_date=start))
         except ValueError:
             raise HTTPException(status_code=400, detail="Неверный формат начальной даты")
 
     if end_date:
         try:
             end = datetime.strptime(end_date, "%Y-%m-%d").date()
-            query = query.filter(func.date(Order.order_date) <= end)
+            query = query.filter(business_day_range(end_date=end))
         except ValueError:
             raise HTTPException(status_code=400, detail="Неверный формат конечной даты")
 
@@ -164,12 +192,7 @@ async def get_orders_by_date(
     orders = query.order_by(Order.order_date.desc()).all()
 
     result = []
-    for order in orders:
-        # Подсчитываем количество позиций
-        item_count = db.query(OrderItem).filter(
-            OrderItem.order_id == order.order_id
-        ).count()
-
+    for order, item_count in orders:
         # Форматируем дату и время
         formatted_date = ""
         formatted_time = ""
@@ -182,10 +205,10 @@ async def get_orders_by_date(
             "order_id": order.order_id,
             "date": formatted_date,
             "time": formatted_time,
-            "order_date": order.order_date.isoformat() if order.order_date else None,
-            "total": float(order.total_amount),
-            "total_amount": float(order.total_amount),
+            "order_date": order.order_date,
+            "total": order.total_amount,
+            "total_amount": order.total_amount,
             "item_count": item_count
         })
 
-    return result
+    return FastJSONResponse(result)
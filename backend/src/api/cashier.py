@@ -1,46 +1,135 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 import uuid
 
 from ..database import get_db
-from ..models import Dish, Category, Order, OrderItem
-from ..schemas.order import OrderCreate, OrderResponse
+from ..models import (
+    Dish, Category, DishPrice, Order, OrderItem, MenuTombstone, price_at,
+    business_date, business_day_range, current_menu_version, item_count_subquery, local_order_time,
+    search_dishes
+)
+from ..schemas.order import OrderBatchCreate, OrderCreate, OrderResponse
+from ..precompute import CACHE
+from ..profiling import ProfiledRoute
+from ..responses import FastJSONResponse
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
+# Максимум заказов в одном запросе /orders/details и /orders/batch
+MAX_BATCH_ORDERS = 200
+
+# Обработчики - обычные def: запросы к БД синхронные, FastAPI выполняет их
+# в пуле потоков, и event loop не ждет базу. Одинаковые запросы меню и
+# сегодняшних заказов от касс при этом идут параллельно и объединяются
+# single-flight (src/singleflight.py)
 @router.get("/menu")
-async def get_menu(db: Session = Depends(get_db)):
-    """Получить все блюда с категориями"""
+def get_menu(
+    since: Optional[int] = Query(None, ge=0, description="Версия меню, уже имеющаяся у клиента"),
+    db: Session = Depends(get_db)
+):
+    """
+    Получить все блюда с категориями.
+
+    С параметром since возвращаются только изменения после этой версии
+    (since=0 - все меню в том же формате), см. _menu_changes.
+    """
     try:
-        dishes = db.query(Dish).join(Category).all()
-        
-        menu = []
-        for dish in dishes:
-            menu.append({
-                "dish_id": dish.dish_id,
-                "name": dish.name,
-                "price": float(dish.price),
-                "category_id": dish.category_id,
-                "category_name": dish.category.name if dish.category else "Без категории"
-            })
-        
-        # Группируем по категориям
-        categories = {}
-        for item in menu:
-            cat_name = item["category_name"]
-            if cat_name not in categories:
-                categories[cat_name] = []
-            categories[cat_name].append(item)
-        
-        return categories
+        if since is not None:
+            return _menu_changes(db, since)
+
+        # Прогретое меню (src/precompute.py), иначе считаем сами
+        cached = CACHE.response(("menu",), db)
+        if cached is not None:
+            return cached
+        return menu_snapshot(db)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка получения меню: {str(e)}")
 
+@router.get("/menu/search")
+def find_dishes(
+    q: str = Query(..., min_length=1, max_length=100, description="Начало слов названия блюда или категории"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Поиск блюд для кассы (тот же индекс, что и /api/admin/dishes/search)"""
+    return FastJSONResponse(search_dishes(db, q, limit=limit, offset=offset))
+
+def menu_snapshot(db):
+    """Все меню, сгруппированное по категориям, с заголовком X-Menu-Version"""
+    version = current_menu_version(db)
+    # Только нужные колонки: строки без ORM объектов и identity map
+    dishes = db.query(
+        Dish.dish_id, Dish.name, Dish.price, Dish.category_id, Category.name
+    ).join(Category).all()
+
+    menu = []
+    for dish_id, name, price, category_id, category_name in dishes:
+        menu.append({
+            "dish_id": dish_id,
+            "name": name,
+            "price": price,
+            "category_id": category_id,
+            "category_name": category_name or "Без категории"
+        })
+
+    # Группируем по категориям
+    categories = {}
+    for item in menu:
+        cat_name = item["category_name"]
+        if cat_name not in categories:
+            categories[cat_name] = []
+        categories[cat_name].append(item)
+
+    return FastJSONResponse(categories, headers={"X-Menu-Version": str(version)})
+
+def _menu_changes(db, since):
+    """
+    Изменения меню после версии since.
+
+    Версию читаем до строк: все строки с версией <= version уже закоммичены,
+    а более новые, если попадут в ответ, придут повторно - слияние на
+    клиенте идемпотентно. Если since больше текущей версии (БД пересоздана),
+    отдаем меню целиком с full=True.
+    """
+    version = current_menu_version(db)
+    full = since == 0 or since > version
+    if full:
+        since = 0
+
+    categories = db.query(Category.category_id, Category.name).filter(
+        Category.version > since
+    ).all()
+    dishes = db.query(
+        Dish.dish_id, Dish.name, Dish.price, Dish.category_id
+    ).filter(Dish.version > since).all()
+
+    deleted = {"dishes": [], "categories": []}
+    if not full:
+        tombstones = db.query(MenuTombstone.entity, MenuTombstone.entity_id).filter(
+            MenuTombstone.version > since
+        ).all()
+        for entity, entity_id in tombstones:
+            deleted["dishes" if entity == "dish" else "categories"].append(entity_id)
+
+    return FastJSONResponse({
+        "version": version,
+        "full": full,
+        "categories": [
+            {"category_id": category_id, "name": name} for category_id, name in categories
+        ],
+        "dishes": [
+            {"dish_id": dish_id, "name": name, "price": price, "category_id": category_id}
+            for dish_id, name, price, category_id in dishes
+        ],
+        "deleted": deleted
+    }, headers={"X-Menu-Version": str(version)})
+
 @router.post("/order", response_model=dict)
-async def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
+def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
     """Создать новый заказ"""
     try:
         # Создаем запись заказа
@@ -67,7 +156,9 @@ async def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
                 order_id=new_order.order_id,
                 dish_id=item.dish_id,
                 quantity=item.quantity,
-                item_total=item_total
+                item_total=item_total,
+                dish_name=dish.name,
+                price_per_item=dish.price
             )
             
             db.add(order_item)
@@ -80,7 +171,7 @@ async def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
         return {
             "success": True,
             "order_id": new_order.order_id,
-            "total_amount": float(total_amount),
+            "total_amount": total_amount,
             "message": "Заказ успешно создан"
         }
         
@@ -90,35 +181,202 @@ async def create_order(order_data: OrderCreate, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Ошибка создания заказа: {str(e)}")
 
+@router.post("/orders/batch")
+def create_orders_batch(batch: OrderBatchCreate, db: Session = Depends(get_db)):
+    """
+    Пакетное создание заказов из локальной очереди кассы.
+
+    order_id и время пробития задает касса, поэтому повторная отправка
+    (обрыв связи после коммита) не создает дубль: такой заказ получает
+    status="duplicate". Заказ с удаленным блюдом или пустым чеком
+    отклоняется (status="rejected"), остальные заказы пакета создаются.
+    Все созданные заказы - одним коммитом.
+
+    Цена и название позиции - снимок кассы на момент пробития (столько
+    заплатил покупатель), см. _item_snapshot. Позиции без снимка (старые
+    кассы) получают текущие серверные цену и название.
+    """
+    if len(batch.orders) > MAX_BATCH_ORDERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Слишком много заказов в запросе: {len(batch.orders)} (максимум {MAX_BATCH_ORDERS})"
+        )
+
+    order_ids = [str(order.order_id) for order in batch.orders]
+    dish_ids = {item.dish_id for order in batch.orders for item in order.items}
+
+    # Выборки на весь пакет: уже созданные заказы, блюда (название, цена)
+    # и история их цен
+    existing = {
+        order_id for (order_id,) in
+        db.query(Order.order_id).filter(Order.order_id.in_(order_ids)).all()
+    }
+    dishes = {
+        dish_id: (name, price, version) for dish_id, name, price, version in
+        db.query(Dish.dish_id, Dish.name, Dish.price, Dish.version).filter(Dish.dish_id.in_(dish_ids)).all()
+    }
+    history = {}
+    for dish_id, version, price in db.query(
+        DishPrice.dish_id, DishPrice.version, DishPrice.price
+    ).filter(DishPrice.dish_id.in_(dish_ids)):
+        history.setdefault(dish_id, []).append((version, price))
+    menu_version = current_menu_version(db)
+
+    now = local_order_time()
+    results = []
+    for order_id, order in zip(order_ids, batch.orders):
+        if order_id in existing:
+            results.append({"order_id": order_id, "status": "duplicate"})
+            continue
+
+        missing = [item.dish_id for item in order.items if item.dish_id not in dishes]
+        if missing or not order.items or any(item.quantity < 1 for item in order.items):
+            detail = f"Блюдо не найдено: {missing[0]}" if missing else "Пустой заказ или неверное количество"
+            results.append({"order_id": order_id, "status": "rejected", "detail": detail})
+            continue
+
+        # Время пробития из будущего (часы кассы спешат) заменяем текущим
+        order_date = now
+        if order.order_date is not None:
+            order_date = min(local_order_time(order.order_date), now)
+
+        try:
+            snapshots = [
+                _item_snapshot(order, item, dishes[item.dish_id], history.get(item.dish_id, []), menu_version)
+                for item in order.items
+            ]
+        except ValueError as e:
+            results.append({"order_id": order_id, "status": "rejected", "detail": str(e)})
+            continue
+
+        items = [
+            OrderItem(
+                order_id=order_id,
+                dish_id=item.dish_id,
+                quantity=item.quantity,
+                item_total=price * item.quantity,
+                dish_name=name,
+                price_per_item=price
+            )
+            for item, (name, price) in zip(order.items, snapshots)
+        ]
+        total_amount = sum(item.item_total for item in items)
+        db.add(Order(order_id=order_id, order_date=order_date, total_amount=total_amount))
+        db.add_all(items)
+        existing.add(order_id)
+        results.append({"order_id": order_id, "status": "created", "total_amount": total_amount})
+
+    db.commit()
+    return {"results": results}
+
+def _item_snapshot(order, item, dish, history, menu_version):
+    """
+    (название, цена) позиции заказа из очереди; ValueError - снимок кассы
+    нельзя принять.
+
+    Касса пробила чек по меню версии order.menu_version. Если блюдо с тех
+    пор не менялось (dish.version не больше нее), цена кассы обязана
+    совпасть с текущей. Если менялось - с ценой на момент этой версии из
+    истории цен (DishPrice): покупатель заплатил ее, но придумать свою
+    цену касса не может.
+    """
+    name, price, version = dish
+    if item.price is None:
+        return name, price
+    if order.menu_version is None:
+        raise ValueError("Цена кассы без версии меню")
+    if order.menu_version > menu_version:
+        raise ValueError(f"Неизвестная версия меню: {order.menu_version}")
+    if item.price < 0:
+        raise ValueError(f"Неверная цена блюда {name}: {item.price}")
+    if version <= order.menu_version:
+        if item.price != price:
+            raise ValueError(f"Цена блюда {name} не совпадает с меню версии {order.menu_version}")
+        return name, price
+    if item.price != price_at(history, order.menu_version):
+        raise ValueError(f"Цена блюда {name} не совпадает с меню версии {order.menu_version}")
+    return (item.dish_name or name)[:100], item.price
+
 @router.get("/orders/today")
-async def get_today_orders(db: Session = Depends(get_db)):
-    """Получить сегодняшние заказы"""
-    from datetime import datetime, date
-    
-    today = date.today()
+def get_today_orders(db: Session = Depends(get_db)):
+    """Получить заказы текущего рабочего дня"""
+    today = business_date()
     
-    orders = db.query(Order).filter(
-        func.date(Order.order_date) == today
+    # Количество позиций считаем подзапросом в том же SELECT
+    orders = db.query(Order, item_count_subquery()).filter(
+        business_day_range(today, today)
     ).order_by(Order.order_date.desc()).all()
     
     result = []
-    for order in orders:
-        # Подсчитываем количество позиций в заказе
-        item_count = db.query(OrderItem).filter(
-            OrderItem.order_id == order.order_id
-        ).count()
-        
+    for order, item_count in orders:
         result.append({
             "order_id": order.order_id,
-            "order_date": order.order_date.isoformat(),
-            "total_amount": float(order.total_amount),
+            "order_date": order.order_date,
+            "total_amount": order.total_amount,
             "item_count": item_count
         })
     
-    return result
+    return FastJSONResponse(result)
+
+# Объявлен до /orders/{order_id}, иначе "details" попадет в order_id
+@router.get("/orders/details")
+def get_orders_details(
+    ids: Optional[List[str]] = Query(None, description="ID заказов: ids=a&ids=b или ids=a,b"),
+    db: Session = Depends(get_db)
+):
+    """
+    Детали нескольких заказов одним запросом к БД.
+
+    Заказы возвращаются в порядке ids (повторы убираются), ненайденные
+    ID перечисляются в missing. Не больше MAX_BATCH_ORDERS за раз.
+    """
+    order_ids = list(dict.fromkeys(
+        order_id.strip() for value in ids or [] for order_id in value.split(",") if order_id.strip()
+    ))
+    if not order_ids:
+        raise HTTPException(status_code=400, detail="Не указаны ID заказов")
+    if len(order_ids) > MAX_BATCH_ORDERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Слишком много заказов в запросе: {len(order_ids)} (максимум {MAX_BATCH_ORDERS})"
+        )
+
+    # Заказы и позиции одним SELECT (название и цена - снимок в позиции);
+    # заказ без позиций тоже попадет
+    rows = db.query(
+        Order.order_id, Order.order_date,
+        OrderItem.dish_id, OrderItem.quantity, OrderItem.item_total,
+        OrderItem.dish_name, OrderItem.price_per_item
+    ).outerjoin(OrderItem, OrderItem.order_id == Order.order_id)\
+     .filter(Order.order_id.in_(order_ids))\
+     .all()
+
+    details = {}
+    for order_id, order_date, dish_id, quantity, item_total, dish_name, price_per_item in rows:
+        order = details.setdefault(order_id, {
+            "order_id": order_id,
+            "order_date": order_date,
+            "total_amount": 0,
+            "items": []
+        })
+        if dish_id is None:
+            continue
+        order["items"].append({
+            "dish_id": dish_id,
+            "dish_name": dish_name,
+            "quantity": quantity,
+            "price_per_item": price_per_item,
+            "item_total": item_total
+        })
+        order["total_amount"] += item_total
+
+    return FastJSONResponse({
+        "orders": [details[order_id] for order_id in order_ids if order_id in details],
+        "missing": [order_id for order_id in order_ids if order_id not in details]
+    })
 
 @router.get("/orders/{order_id}")
-async def get_order_details(order_id: str, db: Session = Depends(get_db)):
+def get_order_details(order_id: str, db: Session = Depends(get_db)):
     """Получить детали конкретного заказа"""
     try:
         # Ищем заказ
@@ -126,28 +384,31 @@ async def get_order_details(order_id: str, db: Session = Depends(get_db)):
         if not order:
             raise HTTPException(status_code=404, detail="Заказ не найден")
 
-        # Получаем все позиции заказа с информацией о блюдах
-        order_items = db.query(OrderItem).join(Dish).filter(
+        # Позиции заказа: название и цена - снимок на момент продажи
+        order_items = db.query(
+            OrderItem.dish_id, OrderItem.dish_name, OrderItem.quantity,
+            OrderItem.price_per_item, OrderItem.item_total
+        ).filter(
             OrderItem.order_id == order_id
         ).all()
 
         items = []
         total_amount = 0
 
-        for item in order_items:
+        for dish_id, dish_name, quantity, price_per_item, item_total in order_items:
             items.append({
-                "dish_id": item.dish_id,
-                "dish_name": item.dish.name if item.dish else "Неизвестное блюдо",
-                "quantity": item.quantity,
-                "price_per_item": float(item.dish.price) if item.dish else 0,
-                "item_total": float(item.item_total)
+                "dish_id": dish_id,
+                "dish_name": dish_name,
+                "quantity": quantity,
+                "price_per_item": price_per_item,
+                "item_total": item_total
             })
-            total_amount += item.item_total
+            total_amount += item_total
 
         return {
             "order_id": order.order_id,
-            "order_date": order.order_date.isoformat(),
-            "total_amount": float(total_amount),
+            "order_date": order.order_date,
+            "total_amount": total_amount,
             "items": items
         }
 
@@ -0,0 +1,89 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from .. import backup, profiling, slow_queries
+from ..database import get_db
+from ..maintenance import MaintenanceScheduler
+
+def require_admin(x_admin_token: str = Header(None)):
+    """Зависимость: доступ только с токеном администратора (ADMIN_TOKEN)"""
+    if not profiling.is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Требуется токен администратора")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# --- Профили запросов ---
+@router.get("/profiles")
+async def get_profiles():
+    """Список сохраненных профилей запросов"""
+    return profiling.list_profiles()
+
+@router.get("/profiles/{name}")
+async def get_profile(name: str):
+    """Скачать профиль (HTML flame graph или .prof)"""
+    path = profiling.profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Профиль не найден")
+    media_type = "text/html" if name.endswith(".html") else "application/octet-stream"
+    return FileResponse(path, media_type=media_type)
+
+# --- Медленные SQL запросы ---
+@router.get("/slow-queries")
+async def get_slow_queries(limit: int = Query(50, ge=1, le=slow_queries.RECENT_LIMIT)):
+    """Последние медленные SQL запросы с планами выполнения"""
+    return {
+        "threshold_ms": slow_queries.SLOW_QUERY_MS,
+        "queries": slow_queries.recent_slow_queries(limit)
+    }
+
+# --- Прогрев кэша ---
+@router.get("/precompute")
+async def get_precompute(request: Request):
+    """Задачи прогрева: время последнего выполнения, длительность, ошибки"""
+    scheduler = getattr(request.app.state, "scheduler", None)
+    if scheduler is None:
+        return {"enabled": False, "jobs": []}
+    return {"enabled": True, **scheduler.status()}
+
+# --- Обслуживание базы ---
+# Статусы обслуживания и копий - обычные def: PRAGMA к базе и обход
+# каталога копий выполняются в пуле потоков, а не в event loop
+@router.get("/maintenance")
+def get_maintenance(request: Request, db: Session = Depends(get_db)):
+    """Окно и бюджет обслуживания, отчет последнего запуска, размер файла базы"""
+    maintenance = getattr(request.app.state, "maintenance", None)
+    if maintenance is None:
+        return {"enabled": False, **MaintenanceScheduler(db.get_bind().engine).status()}
+    return {"enabled": True, **maintenance.status()}
+
+@router.post("/maintenance/run")
+async def run_maintenance(
+    request: Request,
+    budget: float = Query(None, ge=0, le=3600),
+    db: Session = Depends(get_db)
+):
+    """Запустить обслуживание сейчас (вне окна); отчет с размером до и после"""
+    maintenance = getattr(request.app.state, "maintenance", None)
+    if maintenance is None:
+        maintenance = MaintenanceScheduler(db.get_bind().engine)
+    return await maintenance.run_now(budget)
+
+# --- Резервные копии ---
+def _backups(request, db):
+    scheduler = getattr(request.app.state, "backups", None)
+    return scheduler or backup.BackupScheduler(db.get_bind().engine, interval=0)
+
+@router.get("/backups")
+def get_backups(request: Request, db: Session = Depends(get_db)):
+    """Список резервных копий и результат последнего копирования"""
+    scheduler = getattr(request.app.state, "backups", None)
+    return {"enabled": scheduler is not None, **_backups(request, db).status()}
+
+@router.post("/backups")
+async def create_backup(request: Request, db: Session = Depends(get_db)):
+    """Создать резервную копию сейчас (база при этом продолжает работать)"""
+    try:
+        return await _backups(request, db).run_now()
+    except backup.BackupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -5,67 +5,101 @@ from datetime import datetime, date, timedelta
 from typing import Optional
 
 from ..database import get_db
-from ..models import Order, OrderItem, Dish, Category
+from ..models import (
+    Order, OrderItem, Dish, Category, DailyDishSales, business_date, business_day_range, item_count_subquery,
+    rollup_totals, sales_rows
+)
+from ..models.order import business_day_key
+from ..precompute import CACHE
+from ..profiling import ProfiledRoute
+from ..responses import FastJSONResponse
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
+
+# Обработчики отчетов - обычные def: FastAPI выполняет их в пуле потоков,
+# и долгий отчет не блокирует event loop, на котором принимаются заказы
 
 @router.get("/daily")
-async def get_daily_report(
+def get_daily_report(
     report_date: Optional[date] = Query(None, description="Дата отчета (формат: YYYY-MM-DD)"),
     db: Session = Depends(get_db)
 ):
-    """Получить отчет за день"""
+    """Получить отчет за день (рабочий день, по умолчанию текущий)"""
     if not report_date:
-        report_date = date.today()
-    
-    # Получаем заказы за указанную дату
-    orders = db.query(Order).filter(
-        func.date(Order.order_date) == report_date
-    ).all()
+        report_date = business_date()
+
+    # Отчет за сегодня прогревается заранее (src/precompute.py)
+    cached = CACHE.response(("daily", report_date), db)
+    if cached is not None:
+        return cached
+    return daily_report(db, report_date)
+
+def daily_report(db, report_date):
+    """Заказы и выручка за день"""
+    # Получаем заказы за указанную дату: только нужные колонки.
+    # Количество позиций считаем подзапросом в том же SELECT
+    rows = db.query(
+        Order.order_id, Order.order_date, Order.total_amount, item_count_subquery()
+    ).filter(
+        business_day_range(report_date, report_date)
+    ).order_by(Order.order_date).all()
     
+    # Позиции дня могли быть свернуты в итоги (src/maintenance.py): суммы
+    # заказов остались, а количество позиций неизвестно - item_count = null
+    rolled_up = db.query(DailyDishSales.business_day).filter(
+        DailyDishSales.business_day == business_day_key(report_date)
+    ).first() is not None
+
     # Сумма за день
-    daily_total = sum(order.total_amount for order in orders)
+    daily_total = sum(row.total_amount for row in rows)
     
     # Детали по заказам
     order_details = []
-    for order in orders:
-        items = db.query(OrderItem).filter(OrderItem.order_id == order.order_id).all()
+    for order_id, order_date, total_amount, item_count in rows:
         order_details.append({
-            "order_id": order.order_id,
-            "time": order.order_date.time().isoformat()[:5],
-            "total": float(order.total_amount),
-            "item_count": len(items)
+            "order_id": order_id,
+            "time": order_date.strftime("%H:%M"),
+            "total": total_amount,
+            "item_count": None if rolled_up else item_count
         })
     
-    return {
-        "date": report_date.isoformat(),
-        "orders_count": len(orders),
-        "daily_total": float(daily_total),
-        "average_order": float(daily_total / len(orders)) if orders else 0,
+    return FastJSONResponse({
+        "date": report_date,
+        "orders_count": len(rows),
+        "daily_total": daily_total,
+        "average_order": daily_total / len(rows) if rows else 0,
+        "items_rolled_up": rolled_up,
         "orders": order_details
-    }
+    })
 
 @router.get("/by-category")
-async def get_category_report(
+def get_category_report(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     db: Session = Depends(get_db)
 ):
     """Отчет по категориям"""
     if not start_date:
-        start_date = date.today() - timedelta(days=7)
+        start_date = business_date() - timedelta(days=7)
     if not end_date:
-        end_date = date.today()
-    
-    # Получаем продажи по категориям
+        end_date = business_date()
+
+    # Отчеты за последние 7 и 30 дней прогреваются заранее
+    cached = CACHE.response(("by-category", start_date, end_date), db)
+    if cached is not None:
+        return cached
+    return category_report(db, start_date, end_date)
+
+def category_report(db, start_date, end_date):
+    """Продажи по категориям за период"""
+    # Продажи по категориям: позиции заказов и свернутые итоги старых дней
+    sales = sales_rows(start_date, end_date)
     sales_by_category = db.query(
         Category.name,
-        func.sum(OrderItem.quantity).label("total_quantity"),
-        func.sum(OrderItem.item_total).label("total_amount")
+        func.sum(sales.c.quantity).label("total_quantity"),
+        func.sum(sales.c.amount).label("total_amount")
     ).join(Dish, Dish.category_id == Category.category_id)\
-     .join(OrderItem, OrderItem.dish_id == Dish.dish_id)\
-     .join(Order, Order.order_id == OrderItem.order_id)\
-     .filter(func.date(Order.order_date).between(start_date, end_date))\
+     .join(sales, sales.c.dish_id == Dish.dish_id)\
      .group_by(Category.name)\
      .all()
     
@@ -76,41 +110,49 @@ async def get_category_report(
         result.append({
             "category": category_name,
             "quantity": quantity,
-            "amount": float(amount)
+            "amount": amount
         })
         total_amount += amount
     
     # Добавляем проценты
     for item in result:
         if total_amount > 0:
-            item["percentage"] = round((item["amount"] / float(total_amount)) * 100, 1)
+            item["percentage"] = round(float(item["amount"] / total_amount) * 100, 1)
         else:
             item["percentage"] = 0
     
-    return {
+    return FastJSONResponse({
         "period": {
-            "start": start_date.isoformat(),
-            "end": end_date.isoformat()
+            "start": start_date,
+            "end": end_date
         },
-        "total_amount": float(total_amount),
+        "total_amount": total_amount,
         "categories": result
-    }
+    })
 
 @router.get("/popular-dishes")
-async def get_popular_dishes(
+def get_popular_dishes(
     limit: int = Query(10, ge=1, le=50),
     db: Session = Depends(get_db)
 ):
-    """Самые популярные блюда"""
+    """Самые популярные блюда (за все время, включая свернутые итоги)"""
+    # Позиции - поиском по индексу dish_id для каждого блюда (UNION ALL
+    # с итогами без фильтра по дате просматривал бы всю order_items);
+    # итоги - одна строка на блюдо, поэтому max() дает их сумму
+    rollups = rollup_totals()
+    total_sold = func.coalesce(func.sum(OrderItem.quantity), 0) + func.coalesce(func.max(rollups.c.quantity), 0)
+    total_revenue = func.coalesce(func.sum(OrderItem.item_total), 0) + func.coalesce(func.max(rollups.c.revenue), 0)
     popular = db.query(
         Dish.name,
         Category.name.label("category"),
-        func.sum(OrderItem.quantity).label("total_sold"),
-        func.sum(OrderItem.item_total).label("total_revenue")
-    ).join(OrderItem, OrderItem.dish_id == Dish.dish_id)\
+        total_sold.label("total_sold"),
+        total_revenue.label("total_revenue")
+    ).outerjoin(OrderItem, OrderItem.dish_id == Dish.dish_id)\
+     .outerjoin(rollups, rollups.c.dish_id == Dish.dish_id)\
      .join(Category, Category.category_id == Dish.category_id)\
      .group_by(Dish.dish_id, Dish.name, Category.name)\
-     .order_by(func.sum(OrderItem.quantity).desc())\
+     .having(total_sold > 0)\
+     .order_by(total_sold.desc())\
      .limit(limit)\
      .all()
     
@@ -119,7 +161,7 @@ async def get_popular_dishes(
             "dish": dish_name,
             "category": category,
             "sold": total_sold,
-            "revenue": float(total_revenue)
+            "revenue": total_revenue
         }
         for dish_name, category, total_sold, total_revenue in popular
     ]
@@ -1,23 +1,241 @@
 # src/app.py
+from contextlib import asynccontextmanager
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+
+from .responses import FastJSONResponse
+
+# Путь к фронтенду
+FRONTEND_PATH = os.path.join(os.path.dirname(__file__), "../../frontend")
+
+# Собранная статика (backend/build_assets.py); без сборки отдается frontend/ как есть
+ASSETS_PATH = os.getenv("ASSETS_PATH", os.path.join(FRONTEND_PATH, "dist"))
+
+# Сбор метрик (/metrics) включен по умолчанию
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in ("true", "1", "t")
+
+# Сжатие ответов gzip/brotli включено по умолчанию
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True").lower() in ("true", "1", "t")
+
+@asynccontextmanager
+async def default_lifespan(app: FastAPI):
+    """Инициализация при старте процесса (а не при импорте модуля)"""
+    from .database import DATABASE_URL, SessionLocal, ensure_db_dir, create_tables
+    from .backup import BACKUP_ENABLED, BackupScheduler
+    from .maintenance import MAINTENANCE_ENABLED, MaintenanceScheduler
+    from .precompute import PRECOMPUTE_ENABLED, Scheduler
+
+    ensure_db_dir()
+    print(f"📦 Используется база данных: {DATABASE_URL}")
+    create_tables()
+
+    # Прогрев меню и отчетов в фоне; старт приложения его не ждет
+    scheduler = None
+    if PRECOMPUTE_ENABLED:
+        scheduler = Scheduler(SessionLocal)
+        scheduler.start()
+    app.state.scheduler = scheduler
+
+    # Хранение и сжатие базы в тихие часы
+    maintenance = None
+    if MAINTENANCE_ENABLED:
+        maintenance = MaintenanceScheduler(SessionLocal.kw["bind"])
+        maintenance.start()
+    app.state.maintenance = maintenance
 
-def create_app(lifespan=None):
+    # Плановые резервные копии (только файловая SQLite база)
+    backups = None
+    if BACKUP_ENABLED and DATABASE_URL.startswith("sqlite") and ":memory:" not in DATABASE_URL:
+        backups = BackupScheduler(SessionLocal.kw["bind"])
+        backups.start()
+    app.state.backups = backups
+    try:
+        yield
+    finally:
+        if backups is not None:
+            await backups.stop()
+        if maintenance is not None:
+            await maintenance.stop()
+        if scheduler is not None:
+            await scheduler.stop()
+
+def create_app(lifespan=default_lifespan):
     """Фабрика для создания FastAPI приложения"""
     app = FastAPI(
-        title="Restaurant Management API",
-        description="API для управления рестораном с меню, заказами и отчетами",
+        title="Столовая API",
+        description="API для системы управления заказами в столовой",
         version="1.0.0",
+        docs_url="/api/docs",
+        redoc_url="/api/redoc",
+        openapi_url="/api/openapi.json",
+        default_response_class=FastJSONResponse,
         lifespan=lifespan
     )
 
     # Настройка CORS
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=["*"],
+        allow_origins=["*"],  # В продакшене заменить на конкретные домены
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
     )
 
+    from .admission import ADMISSION_CONTROL
+    from .middleware import (
+        AdmissionMiddleware, CoalescingMiddleware, CompressionMiddleware,
+        MetricsMiddleware, ProfilingMiddleware, QueryStatsMiddleware
+    )
+    from .singleflight import SINGLE_FLIGHT
+
+    # Профилирование отдельных запросов по флагу администратора
+    app.add_middleware(ProfilingMiddleware)
+
+    # Учет SQL запросов (заголовки X-Query-Count / X-DB-Time)
+    app.add_middleware(QueryStatsMiddleware)
+
+    # Сжатие ответов; метрики снаружи видят размер, ушедший в сеть
+    if COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware)
+
+    # Лимиты по классам маршрутов: отчеты не вытесняют прием заказов
+    if ADMISSION_CONTROL:
+        app.add_middleware(AdmissionMiddleware)
+
+    # Одинаковые параллельные запросы чтения ждут ответ первого;
+    # снаружи admission control, чтобы ожидающие не занимали места в классе
+    if SINGLE_FLIGHT:
+        app.add_middleware(CoalescingMiddleware)
+
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    # Роутеры импортируются лениво: импорт src.app не тянет модели и SQLAlchemy
+    from .api import admin, cashier, reports, diagnostics
+
+    app.include_router(cashier.router, prefix="/api/cashier", tags=["Кассир"])
+    app.include_router(admin.router, prefix="/api/admin", tags=["Администратор"])
+    app.include_router(reports.router, prefix="/api/reports", tags=["Отчеты"])
+    app.include_router(
+        diagnostics.router, prefix="/api/admin/diagnostics", tags=["Диагностика"]
+    )
+
+    _register_frontend(app)
+    _register_service_routes(app)
+
     return app
+
+def _register_frontend(app: FastAPI):
+    """Статические файлы и HTML-страницы фронтенда"""
+    # Проверяем существование фронтенда и монтируем статические файлы
+    if not os.path.exists(FRONTEND_PATH):
+        print("⚠️  Фронтенд не найден. API доступен, но статические файлы не будут обслуживаться.")
+        return
+
+    from fastapi import Request
+    from .static_assets import FrontendFiles, is_stale, load_manifest
+
+    # Без сборки (режим разработки) отдаем исходники: без хешей, с перепроверкой
+    if load_manifest(ASSETS_PATH) is None:
+        print(f"⚠️  Сборка статики не найдена в {os.path.abspath(ASSETS_PATH)}: "
+              "отдаются исходники frontend/ без хешей и заранее сжатых файлов "
+              "(python backend/build_assets.py)")
+        static_dir = FRONTEND_PATH
+    else:
+        if is_stale(FRONTEND_PATH, ASSETS_PATH):
+            # Например, frontend/ смонтирован в контейнер поверх исходников образа
+            print(f"⚠️  Сборка статики в {os.path.abspath(ASSETS_PATH)} старше исходников frontend/: "
+                  "изменения не видны до пересборки (python backend/build_assets.py)")
+        static_dir = ASSETS_PATH
+    static = FrontendFiles(directory=static_dir)
+
+    app.mount("/static", static, name="static")
+
+    @app.get("/")
+    async def serve_frontend(request: Request):
+        """Сервим главную страницу кассира"""
+        return await static.page(request, "index.html")
+
+    @app.get("/admin")
+    async def serve_admin(request: Request):
+        """Сервим страницу администратора"""
+        return await static.page(request, "admin.html")
+
+    @app.get("/reports")
+    async def serve_reports(request: Request):
+        """Сервим страницу отчетов"""
+        return await static.page(request, "reports.html")
+
+    # Service worker кассы: из корня, чтобы его областью был весь сайт
+    @app.get("/sw.js", include_in_schema=False)
+    async def serve_service_worker(request: Request):
+        return await static.page(request, "sw.js")
+
+def _register_service_routes(app: FastAPI):
+    """Служебные маршруты: здоровье, информация, обработчик 404"""
+
+    # Маршрут для проверки здоровья
+    @app.get("/health")
+    async def health_check():
+        """Проверка работоспособности сервиса"""
+        import sqlite3
+
+        try:
+            # Проверяем подключение к базе данных
+            db_path = os.path.join(os.path.dirname(__file__), "../../instance/canteen.db")
+
+            if os.path.exists(db_path):
+                conn = sqlite3.connect(db_path)
+                conn.execute("SELECT 1")
+                conn.close()
+                db_status = "connected"
+            else:
+                db_status = "database_not_created"
+
+            return JSONResponse({
+                "status": "healthy",
+                "service": "canteen-api",
+                "database": db_status,
+                "frontend": os.path.exists(FRONTEND_PATH)
+            })
+
+        except Exception as e:
+            return JSONResponse({
+                "status": "unhealthy",
+                "error": str(e)
+            }, status_code=500)
+
+    # Информационный маршрут
+    @app.get("/api/info")
+    async def api_info():
+        """Информация об API"""
+        return {
+            "name": "Столовая API",
+            "version": "1.0.0",
+            "author": "Кассир-Админ Система",
+            "endpoints": {
+                "cashier_api": "/api/cashier",
+                "admin_api": "/api/admin",
+                "reports_api": "/api/reports",
+                "documentation": "/api/docs",
+                "health_check": "/health"
+            }
+        }
+
+    if METRICS_ENABLED:
+        @app.get("/metrics", include_in_schema=False)
+        async def metrics_endpoint():
+            """Метрики в текстовом формате Prometheus"""
+            from . import metrics
+            return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+    # Обработчик 404 ошибок
+    @app.exception_handler(404)
+    async def not_found_handler(request, exc):
+        return JSONResponse(
+            status_code=404,
+            content={"detail": "Ресурс не найден", "path": request.url.path}
+        )
@@ -0,0 +1,307 @@
+# src/backup.py
+"""
+Резервные копии работающей базы через online backup API SQLite.
+
+shutil.copy2 на живой базе может снять файл посреди записи (битая
+копия), а безопасно копировать так можно только остановив приложение.
+Backup API копирует согласованный снимок страницами: за шаг
+BACKUP_PAGES_PER_STEP страниц под блокировкой чтения, между шагами
+пауза BACKUP_STEP_PAUSE - в это время касса спокойно пишет заказы.
+
+Если базу изменило другое соединение, SQLite начинает копирование
+заново. Тогда копирование повторяется с вчетверо большим шагом, а после
+BACKUP_MAX_RESTARTS перезапусков (поток заказов в обед) копия снимается
+за один шаг - на это время запись ждет (в режиме WAL не ждет).
+
+Копия пишется во временный файл, проверяется PRAGMA quick_check и
+только затем переименовывается в BACKUP_DIR/canteen-ГГГГММДД-ЧЧММСС.db;
+хранятся BACKUP_KEEP последних копий. Плановые копии - раз в
+BACKUP_INTERVAL секунд, по требованию - POST /api/admin/diagnostics/backups.
+
+Восстановление (при остановленном приложении):
+    python -m backend.src.backup list
+    python -m backend.src.backup create
+    python -m backend.src.backup restore instance/backups/canteen-20240315-030000.db
+"""
+from datetime import datetime
+from time import perf_counter
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import sqlite3
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+BACKUP_ENABLED = os.getenv("BACKUP_ENABLED", "True").lower() in ("true", "1", "t")
+
+BACKUP_DIR = os.getenv(
+    "BACKUP_DIR", os.path.join(os.path.dirname(__file__), "../../instance/backups")
+)
+# Плановая копия, если последней больше стольких секунд (0 - без расписания)
+BACKUP_INTERVAL = float(os.getenv("BACKUP_INTERVAL", 86400))
+# Сколько последних копий хранить
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", 7))
+# Страниц за шаг копирования и пауза между шагами (секунды)
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", 1000))
+BACKUP_STEP_PAUSE = float(os.getenv("BACKUP_STEP_PAUSE", 0.01))
+# Перезапусков из-за записи в базу (шаг растет вчетверо), затем копия одним шагом
+BACKUP_MAX_RESTARTS = int(os.getenv("BACKUP_MAX_RESTARTS", 3))
+
+BACKUP_SECONDS = metrics.REGISTRY.histogram(
+    "backup_seconds", "Время создания резервной копии базы", ()
+)
+BACKUP_RUNS = metrics.REGISTRY.counter(
+    "backup_runs_total", "Создание резервных копий базы", ("status",)
+)
+BACKUP_LAST_SUCCESS = metrics.REGISTRY.gauge(
+    "backup_last_success_timestamp", "Время последней успешной копии (unix)", ()
+)
+
+BACKUP_PREFIX = "canteen-"
+# Повтор шага, если база занята записью (по умолчанию в sqlite3 - 250 мс)
+BUSY_RETRY = 0.005
+
+class BackupError(Exception):
+    """Копия не создана или не прошла проверку"""
+
+class _Restarted(Exception):
+    """База изменилась другим соединением, копирование начато заново"""
+
+def database_path(engine):
+    """Путь к файлу SQLite базы движка"""
+    path = engine.url.database
+    if engine.dialect.name != "sqlite" or not path or path == ":memory:":
+        raise BackupError("Резервное копирование поддерживается только для файловой SQLite базы")
+    return path
+
+def _check(connection):
+    result = connection.execute("PRAGMA quick_check").fetchone()[0]
+    if result != "ok":
+        raise BackupError(f"Копия повреждена: {result}")
+
+def copy_database(source_path, target_path, pages=BACKUP_PAGES_PER_STEP,
+                  pause=BACKUP_STEP_PAUSE, max_restarts=BACKUP_MAX_RESTARTS):
+    """
+    Согласованная копия source_path в target_path по pages страниц за
+    шаг. Запись в target_path идет через временный файл, который
+    переименовывается после проверки. Возвращает статистику копирования.
+    """
+    stats = {"steps": 0, "restarts": 0, "pages": 0}
+
+    def progress(status, remaining, total):
+        if status not in (sqlite3.SQLITE_OK, sqlite3.SQLITE_DONE):
+            # База занята записью: шаг будет повторен через BUSY_RETRY
+            return
+        stats["steps"] += 1
+        stats["pages"] = total
+        if remaining >= state["remaining"]:
+            # После перезапуска остаток снова считается от полного размера
+            raise _Restarted()
+        state["remaining"] = remaining
+        if remaining and pause:
+            # Между шагами блокировка чтения снята: записи проходят
+            time.sleep(pause)
+
+    tmp_path = f"{target_path}.{os.getpid()}.tmp"
+    source = sqlite3.connect(source_path, timeout=30)
+    target = sqlite3.connect(tmp_path)
+    try:
+        while True:
+            state = {"remaining": float("inf")}
+            try:
+                if stats["restarts"] >= max_restarts:
+                    # Записи так часты, что шагами не успеть: одним шагом
+                    source.backup(target, pages=-1, sleep=BUSY_RETRY)
+                    stats["steps"] += 1
+                else:
+                    source.backup(target, pages=pages, progress=progress, sleep=BUSY_RETRY)
+                break
+            except _Restarted:
+                # SQLite начал бы заново с тем же шагом; крупнее шаг -
+                # меньше окон, в которые попадает запись
+                stats["restarts"] += 1
+                pages *= 4
+        _check(target)
+    except Exception:
+        target.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+    os.replace(tmp_path, target_path)
+    stats["bytes"] = os.path.getsize(target_path)
+    return stats
+
+def list_backups(directory=BACKUP_DIR):
+    """Копии в directory, новые первыми"""
+    if not os.path.isdir(directory):
+        return []
+    backups = []
+    for name in os.listdir(directory):
+        if name.startswith(BACKUP_PREFIX) and name.endswith(".db"):
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            backups.append((stat.st_mtime_ns, {
+                "name": name,
+                "path": path,
+                "bytes": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+            }))
+    backups.sort(key=lambda backup: (backup[0], backup[1]["name"]), reverse=True)
+    return [backup for _, backup in backups]
+
+def create_backup(engine, directory=BACKUP_DIR, keep=BACKUP_KEEP, **options):
+    """Новая копия базы движка в directory; старые сверх keep удаляются"""
+    source_path = database_path(engine)
+    os.makedirs(directory, exist_ok=True)
+    stamp = f"{BACKUP_PREFIX}{datetime.now():%Y%m%d-%H%M%S}"
+    name, n = f"{stamp}.db", 1
+    while os.path.exists(os.path.join(directory, name)):
+        # Несколько копий за одну секунду
+        name, n = f"{stamp}-{n}.db", n + 1
+    path = os.path.join(directory, name)
+
+    start = perf_counter()
+    try:
+        stats = copy_database(source_path, path, **options)
+    except Exception:
+        BACKUP_RUNS.inc("error")
+        raise
+    elapsed = perf_counter() - start
+    BACKUP_SECONDS.observe(elapsed)
+    BACKUP_RUNS.inc("ok")
+    BACKUP_LAST_SUCCESS.set(value=time.time())
+
+    for old in list_backups(directory)[keep:] if keep > 0 else []:
+        os.remove(old["path"])
+    return {"name": name, "path": path, "seconds": round(elapsed, 3), **stats}
+
+def restore_backup(backup_path, database):
+    """
+    Восстановить базу database (путь к файлу) из копии.
+
+    Копия сначала проверяется; страницы переносятся тем же backup API,
+    поэтому база не остается наполовину перезаписанной. Приложение на
+    время восстановления нужно остановить.
+    """
+    source = sqlite3.connect(f"file:{backup_path}?mode=ro", uri=True)
+    try:
+        _check(source)
+        target = sqlite3.connect(database, timeout=30)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+class BackupScheduler:
+    """
+    Фоновая задача: копия, когда последней больше interval секунд.
+
+    Время последней копии берется по файлам в каталоге, поэтому
+    перезапуск приложения не создает лишних копий.
+    """
+
+    def __init__(self, engine, directory=BACKUP_DIR, interval=BACKUP_INTERVAL, keep=BACKUP_KEEP):
+        self.engine = engine
+        self.directory = directory
+        self.interval = interval
+        self.keep = keep
+        self.last_report = None
+        self.last_error = None
+        self._lock = None
+        self._task = None
+
+    def start(self):
+        self._lock = asyncio.Lock()
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run_now(self):
+        """Копия сейчас (эндпоинт диагностики); не параллельно плановой"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            try:
+                self.last_report = await run_in_threadpool(
+                    create_backup, self.engine, self.directory, self.keep
+                )
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+        return self.last_report
+
+    def _seconds_until_due(self):
+        backups = list_backups(self.directory)
+        if not backups:
+            return 0
+        age = time.time() - os.stat(backups[0]["path"]).st_mtime
+        return max(self.interval - age, 0)
+
+    async def _run(self):
+        while True:
+            wait = self._seconds_until_due()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            try:
+                report = await self.run_now()
+                print(f"💾 Резервная копия {report['name']}: {report['bytes']} байт за {report['seconds']} с")
+            except Exception:
+                logger.exception("Ошибка резервного копирования")
+                # Не повторяем сразу: база может быть недоступна
+                await asyncio.sleep(min(self.interval, 600))
+
+    def status(self):
+        return {
+            "directory": os.path.abspath(self.directory),
+            "interval": self.interval,
+            "keep": self.keep,
+            "last_report": self.last_report,
+            "last_error": self.last_error,
+            "backups": [
+                {key: value for key, value in backup.items() if key != "path"}
+                for backup in list_backups(self.directory)
+            ],
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Резервные копии базы")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Список копий")
+    commands.add_parser("create", help="Создать копию сейчас")
+    restore = commands.add_parser("restore", help="Восстановить базу из копии (приложение остановлено)")
+    restore.add_argument("backup", help="Путь к файлу копии")
+    restore.add_argument("--to", help="Путь к базе (по умолчанию - из DATABASE_URL)")
+    args = parser.parse_args()
+
+    from .database import engine
+
+    if args.command == "list":
+        for backup in list_backups():
+            print(f"{backup['name']}  {backup['bytes']:>12} байт  {backup['created_at']}")
+    elif args.command == "create":
+        report = create_backup(engine)
+        print(f"💾 {report['path']}: {report['bytes']} байт, {report['steps']} шагов, {report['seconds']} с")
+    else:
+        target = args.to or database_path(engine)
+        restore_backup(args.backup, target)
+        print(f"✅ База {target} восстановлена из {args.backup}")
@@ -1,27 +1,36 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
-# Создаем директорию для базы данных, если её нет
+# Директория для базы данных (создается при старте приложения, а не при импорте)
 DB_DIR = os.path.join(os.path.dirname(__file__), "../../instance")
-os.makedirs(DB_DIR, exist_ok=True)
 
 # Получаем URL базы данных из переменных окружения
 DATABASE_URL = os.getenv(
-    "DATABASE_URL", 
+    "DATABASE_URL",
     f"sqlite:///{os.path.join(DB_DIR, 'canteen.db')}"
 )
 
-print(f"📦 Используется база данных: {DATABASE_URL}")
+# Версия схемы. Увеличивайте при изменении моделей, чтобы при следующем
+# старте схема была проверена и дополнена. Хранится в PRAGMA user_version.
+SCHEMA_VERSION = 8
 
-# Создаем движок SQLAlchemy
+# Создаем движок SQLAlchemy (подключение к БД откроется при первом запросе)
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
     echo=False  # Установите True для отладки SQL запросов
 )
 
+# Учет количества и времени SQL запросов на каждый HTTP запрос
+from .query_stats import install_query_hooks
+install_query_hooks(engine)
+
+# Журнал медленных запросов с EXPLAIN QUERY PLAN (порог SLOW_QUERY_MS)
+from .slow_queries import install_slow_query_log
+install_slow_query_log(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -33,8 +42,78 @@ def get_db():
     finally:
         db.close()
 
-def create_tables():
-    """Создание всех таблиц в базе данных"""
-    print("🛠️  Создание таблиц в базе данных...")
-    Base.metadata.create_all(bind=engine)
+def ensure_db_dir():
+    """Создание директории для файла SQLite, если её нет"""
+    if DATABASE_URL.startswith("sqlite") and ":memory:" not in DATABASE_URL:
+        os.makedirs(DB_DIR, exist_ok=True)
+
+def _add_missing_columns(conn):
+    """ALTER TABLE ADD COLUMN для колонок модели, которых нет в существующей таблице"""
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+            if column.server_default is not None:
+                default = column.server_default.arg
+                ddl += f" DEFAULT {getattr(default, 'text', None) or repr(str(default))}"
+            if not column.nullable:
+                # NOT NULL без DEFAULT в существующую таблицу не добавить
+                ddl += " NOT NULL"
+            print(f"🛠️  Добавление колонки {table.name}.{column.name}")
+            conn.exec_driver_sql(ddl)
+
+def create_tables(bind=None, force=False):
+    """
+    Создание всех таблиц в базе данных.
+
+    Для SQLite проверка схемы выполняется один раз на версию схемы:
+    если PRAGMA user_version уже равна SCHEMA_VERSION, ничего не делаем.
+    Возвращает True, если схема была проверена/создана.
+    """
+    # Модели должны быть зарегистрированы в Base.metadata
+    from . import models  # noqa: F401
+
+    bind = bind or engine
+    is_sqlite = bind.dialect.name == "sqlite"
+
+    with bind.begin() as conn:
+        if is_sqlite and not force:
+            current = conn.exec_driver_sql("PRAGMA user_version").scalar()
+            if current >= SCHEMA_VERSION:
+                return False
+
+        print("🛠️  Создание таблиц в базе данных...")
+        if is_sqlite and not conn.exec_driver_sql("SELECT 1 FROM sqlite_master LIMIT 1").first():
+            # Новая база: освобожденные страницы возвращаются файлу по частям
+            # (PRAGMA incremental_vacuum в src/maintenance.py), не полным VACUUM
+            conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        Base.metadata.create_all(bind=conn)
+        # create_all не добавляет колонки и индексы в уже существующие таблицы
+        _add_missing_columns(conn)
+        # Данные для новых колонок (повторный запуск ничего не меняет)
+        from .models.menu_sync import backfill_dish_prices
+        from .models.order import backfill_order_days
+        from .models.order_item import backfill_item_snapshots
+        filled = backfill_item_snapshots(conn)
+        if filled:
+            print(f"🛠️  Снимок блюда заполнен у {filled} позиций заказов")
+        filled = backfill_order_days(conn)
+        if filled:
+            print(f"🛠️  Рабочий день заполнен у {filled} заказов")
+        filled = backfill_dish_prices(conn)
+        if filled:
+            print(f"🛠️  История цен начата для {filled} блюд")
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+        if is_sqlite:
+            conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
     print("✅ Таблицы созданы успешно")
+    return True
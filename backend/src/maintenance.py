@@ -0,0 +1,362 @@
+# src/maintenance.py
+"""
+Плановое обслуживание базы: хранение старых позиций заказов и сжатие файла.
+
+Раз в сутки в тихие часы (MAINTENANCE_WINDOW, время столовой) фоновая
+задача выполняет небольшие шаги, каждый в своей транзакции:
+- позиции заказов старше ORDER_ITEMS_RETENTION_DAYS дней сворачиваются
+  по одному рабочему дню в итоги daily_dish_sales и удаляются (заказы с
+  суммами остаются, отчеты читают позиции + итоги);
+- PRAGMA incremental_vacuum по VACUUM_PAGES_PER_STEP страниц возвращает
+  свободные страницы файлу;
+- ANALYZE (с PRAGMA analysis_limit) и PRAGMA optimize обновляют
+  статистику планировщика.
+
+Между шагами база свободна для записи заказов. Выполнение
+прекращается, когда израсходован бюджет MAINTENANCE_BUDGET секунд, -
+оставшееся доделает следующий запуск. Отчет с размером файла и числом
+страниц до и после - в /api/admin/diagnostics/maintenance.
+
+Инкрементальный VACUUM работает только в базе с auto_vacuum=INCREMENTAL:
+новые базы создаются так (см. create_tables), существующую можно один
+раз перевести полным VACUUM:
+    python -m backend.src.maintenance --convert
+"""
+from collections import defaultdict
+from datetime import datetime, time as dt_time, timedelta
+from time import monotonic, perf_counter
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import time
+
+from sqlalchemy import delete, func, insert, select
+from starlette.concurrency import run_in_threadpool
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_ENABLED = os.getenv("MAINTENANCE_ENABLED", "True").lower() in ("true", "1", "t")
+
+# Тихие часы (время столовой), можно через полночь: 23:00-05:00
+MAINTENANCE_WINDOW = os.getenv("MAINTENANCE_WINDOW", "02:00-05:00")
+# Как часто проверять, не пора ли запускаться (секунды)
+MAINTENANCE_CHECK_INTERVAL = float(os.getenv("MAINTENANCE_CHECK_INTERVAL", 600))
+# Бюджет одного запуска (секунды) и пауза между шагами для записей кассы
+MAINTENANCE_BUDGET = float(os.getenv("MAINTENANCE_BUDGET", 120))
+MAINTENANCE_PAUSE = float(os.getenv("MAINTENANCE_PAUSE", 0.05))
+
+# Позиции заказов старше стольких дней сворачиваются в итоги; 0 - хранить все
+ORDER_ITEMS_RETENTION_DAYS = int(os.getenv("ORDER_ITEMS_RETENTION_DAYS", 0))
+# Страниц за один шаг incremental_vacuum
+VACUUM_PAGES_PER_STEP = int(os.getenv("VACUUM_PAGES_PER_STEP", 2000))
+# Строк на индекс, которые просматривает ANALYZE (ограничивает его время)
+ANALYSIS_LIMIT = int(os.getenv("ANALYSIS_LIMIT", 1000))
+
+MAINTENANCE_STEP_SECONDS = metrics.REGISTRY.histogram(
+    "maintenance_step_seconds", "Время шагов обслуживания базы", ("step",)
+)
+MAINTENANCE_RUNS = metrics.REGISTRY.counter(
+    "maintenance_runs_total", "Запуски обслуживания базы", ("status",)
+)
+DB_FILE_BYTES = metrics.REGISTRY.gauge(
+    "db_file_bytes", "Размер файла базы после обслуживания (байт)", ()
+)
+DB_FREE_PAGES = metrics.REGISTRY.gauge(
+    "db_freelist_pages", "Свободные страницы в файле базы после обслуживания", ()
+)
+
+_AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+def parse_window(value):
+    """"02:00-05:00" -> (time(2, 0), time(5, 0))"""
+    try:
+        start, end = (dt_time.fromisoformat(part.strip()) for part in value.split("-"))
+    except ValueError:
+        raise ValueError(f"Неверное окно обслуживания: {value!r} (нужно ЧЧ:ММ-ЧЧ:ММ)")
+    return start, end
+
+def in_window(moment, window):
+    """Попадает ли время суток в окно (окно может переходить через полночь)"""
+    start, end = window
+    if start <= end:
+        return start <= moment < end
+    return moment >= start or moment < end
+
+def database_stats(engine):
+    """Размер файла и страницы SQLite (None для других СУБД)"""
+    if engine.dialect.name != "sqlite":
+        return None
+    with engine.connect() as conn:
+        stats = {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ("page_size", "page_count", "freelist_count", "auto_vacuum")
+        }
+    stats["auto_vacuum"] = _AUTO_VACUUM_MODES.get(stats["auto_vacuum"], stats["auto_vacuum"])
+    path = engine.url.database
+    stats["file_bytes"] = None
+    stats["wal_bytes"] = None
+    if path and path != ":memory:" and os.path.exists(path):
+        stats["file_bytes"] = os.path.getsize(path)
+        if os.path.exists(path + "-wal"):
+            stats["wal_bytes"] = os.path.getsize(path + "-wal")
+    return stats
+
+class Maintenance:
+    """
+    Один запуск обслуживания: шаги по очереди, пока не кончится бюджет.
+
+    Шаги выбираются по ходу выполнения (генератор _steps), поэтому
+    прерванный по бюджету запуск ничего не оставляет недоделанным -
+    следующий просто продолжит с того же места.
+    """
+
+    def __init__(self, engine, retention_days=ORDER_ITEMS_RETENTION_DAYS,
+                 vacuum_pages=VACUUM_PAGES_PER_STEP, analysis_limit=ANALYSIS_LIMIT,
+                 pause=MAINTENANCE_PAUSE):
+        self.engine = engine
+        self.retention_days = retention_days
+        self.vacuum_pages = vacuum_pages
+        self.analysis_limit = analysis_limit
+        self.pause = pause
+        self.is_sqlite = engine.dialect.name == "sqlite"
+
+    def run(self, budget=MAINTENANCE_BUDGET):
+        """Выполнить шаги в текущем потоке; возвращает отчет"""
+        deadline = monotonic() + budget
+        report = {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "before": database_stats(self.engine),
+            "steps": {},
+            "status": "completed",
+        }
+        steps = defaultdict(lambda: {"runs": 0, "rows": 0, "seconds": 0.0})
+        try:
+            for name, step in self._steps():
+                if monotonic() >= deadline:
+                    report["status"] = "budget_exhausted"
+                    break
+                start = perf_counter()
+                rows = step()
+                elapsed = perf_counter() - start
+                MAINTENANCE_STEP_SECONDS.observe(elapsed, name)
+                steps[name]["runs"] += 1
+                steps[name]["rows"] += rows
+                steps[name]["seconds"] += elapsed
+                if self.pause:
+                    time.sleep(self.pause)
+        except Exception as e:
+            report["status"] = "error"
+            report["error"] = str(e)
+            logger.exception("Ошибка обслуживания базы")
+
+        for step in steps.values():
+            step["seconds"] = round(step["seconds"], 3)
+        report["steps"] = dict(steps)
+        report["after"] = database_stats(self.engine)
+        report["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        MAINTENANCE_RUNS.inc(report["status"])
+        if report["after"] is not None:
+            DB_FREE_PAGES.set(value=report["after"]["freelist_count"])
+            if report["after"]["file_bytes"] is not None:
+                DB_FILE_BYTES.set(value=report["after"]["file_bytes"])
+        return report
+
+    def _steps(self):
+        if self.retention_days > 0:
+            yield from self._retention_steps()
+        if not self.is_sqlite:
+            return
+        # Без auto_vacuum=INCREMENTAL incremental_vacuum ничего не делает
+        if database_stats(self.engine)["auto_vacuum"] == "incremental":
+            free = self._freelist_count()
+            while free > 0:
+                yield "incremental_vacuum", self._vacuum_step
+                remaining = self._freelist_count()
+                if remaining >= free:
+                    # Страницы не возвращаются файлу - не крутимся до конца бюджета
+                    logger.warning("incremental_vacuum не уменьшил свободные страницы (%d)", remaining)
+                    break
+                free = remaining
+        yield "analyze", self._analyze
+        yield "optimize", self._optimize
+
+    # --- Хранение позиций заказов ---
+    def _retention_steps(self):
+        from .models import DailyDishSales, Order, business_date
+        from .models.order import business_day_key
+
+        cutoff = business_day_key(business_date() - timedelta(days=self.retention_days))
+        with self.engine.connect() as conn:
+            # Дни сворачиваются по порядку: все до последнего свернутого уже
+            # без позиций (сам он - на случай позиций, дошедших позже)
+            day = conn.execute(select(func.max(DailyDishSales.business_day))).scalar() or 0
+        next_day = select(Order.business_day).where(Order.business_day < cutoff)
+        while True:
+            with self.engine.connect() as conn:
+                day = conn.execute(
+                    next_day.where(Order.business_day >= day).order_by(Order.business_day).limit(1)
+                ).scalar()
+            if day is None:
+                return
+            yield "retention", lambda day=day: self._compact_day(day)
+            day += 1
+
+    def _compact_day(self, day):
+        """Свернуть позиции заказов рабочего дня в итоги и удалить их"""
+        rows = self._fold_day(day)
+        if rows:
+            # Core delete() мимо сессии: событий after_commit нет, прогретые
+            # отчеты (по категориям, за день) сбрасываем сами
+            from .precompute import CACHE
+            CACHE.invalidate(frozenset({"orders"}))
+        return rows
+
+    def _fold_day(self, day):
+        from .models import DailyDishSales, Order, OrderItem
+
+        day_orders = select(Order.order_id).where(Order.business_day == day)
+        with self.engine.begin() as conn:
+            totals = {
+                dish_id: [name, quantity, revenue]
+                for dish_id, name, quantity, revenue in conn.execute(
+                    select(
+                        OrderItem.dish_id, func.max(OrderItem.dish_name),
+                        func.sum(OrderItem.quantity), func.sum(OrderItem.item_total)
+                    ).where(OrderItem.order_id.in_(day_orders)).group_by(OrderItem.dish_id)
+                )
+            }
+            if not totals:
+                return 0
+            # Итоги этого дня уже могли быть: складываем
+            existing = conn.execute(
+                select(DailyDishSales.dish_id, DailyDishSales.quantity, DailyDishSales.revenue)
+                .where(DailyDishSales.business_day == day)
+            ).all()
+            for dish_id, quantity, revenue in existing:
+                if dish_id in totals:
+                    totals[dish_id][1] += quantity
+                    totals[dish_id][2] += revenue
+            conn.execute(delete(DailyDishSales).where(
+                DailyDishSales.business_day == day, DailyDishSales.dish_id.in_(list(totals))
+            ))
+            conn.execute(insert(DailyDishSales), [
+                {"business_day": day, "dish_id": dish_id, "dish_name": name,
+                 "quantity": quantity, "revenue": revenue}
+                for dish_id, (name, quantity, revenue) in totals.items()
+            ])
+            return conn.execute(delete(OrderItem).where(OrderItem.order_id.in_(day_orders))).rowcount
+
+    # --- Сжатие файла и статистика ---
+    def _freelist_count(self):
+        with self.engine.connect() as conn:
+            return conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+
+    def _executescript(self, script):
+        # executescript выполняет PRAGMA incremental_vacuum до конца;
+        # обычный execute драйвера освобождает только одну страницу
+        with self.engine.connect() as conn:
+            conn.connection.driver_connection.executescript(script)
+
+    def _vacuum_step(self):
+        before = self._freelist_count()
+        self._executescript(f"PRAGMA incremental_vacuum({self.vacuum_pages});")
+        return before - self._freelist_count()
+
+    def _analyze(self):
+        self._executescript(f"PRAGMA analysis_limit = {self.analysis_limit}; ANALYZE;")
+        return 0
+
+    def _optimize(self):
+        self._executescript("PRAGMA optimize;")
+        return 0
+
+def convert_to_incremental(engine):
+    """Включить auto_vacuum=INCREMENTAL в существующей базе (полный VACUUM, долго)"""
+    with engine.connect() as conn:
+        conn.connection.driver_connection.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM;")
+
+class MaintenanceScheduler:
+    """
+    Фоновая задача: раз в MAINTENANCE_CHECK_INTERVAL проверяет окно и
+    запускает обслуживание не чаще раза в рабочий день.
+    """
+
+    def __init__(self, engine, window=None, interval=MAINTENANCE_CHECK_INTERVAL,
+                 budget=MAINTENANCE_BUDGET, maintenance=None):
+        self.engine = engine
+        self.window = parse_window(MAINTENANCE_WINDOW) if window is None else window
+        self.interval = interval
+        self.budget = budget
+        self.maintenance = maintenance or Maintenance(engine)
+        self.last_report = None
+        self.last_run_day = None
+        self._lock = None
+        self._task = None
+
+    def start(self):
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run_now(self, budget=None):
+        """Запуск вне расписания (эндпоинт диагностики); не параллельно плановому"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self.last_report = await run_in_threadpool(
+                self.maintenance.run, self.budget if budget is None else budget
+            )
+        return self.last_report
+
+    async def _run(self):
+        from .models import business_date, local_order_time
+
+        while True:
+            today = business_date()
+            if self.last_run_day != today and in_window(local_order_time().time(), self.window):
+                self.last_run_day = today
+                report = await self.run_now()
+                logger.info(
+                    "Обслуживание базы: %s, свободных страниц %s -> %s",
+                    report["status"], _pages(report["before"]), _pages(report["after"])
+                )
+            await asyncio.sleep(self.interval)
+
+    def status(self):
+        start, end = self.window
+        return {
+            "window": f"{start:%H:%M}-{end:%H:%M}",
+            "budget": self.budget,
+            "retention_days": self.maintenance.retention_days,
+            "last_report": self.last_report,
+            "database": database_stats(self.engine),
+        }
+
+def _pages(stats):
+    return "-" if stats is None else stats["freelist_count"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Обслуживание базы вне расписания")
+    parser.add_argument("--budget", type=float, default=MAINTENANCE_BUDGET, help="Бюджет времени (сек)")
+    parser.add_argument("--convert", action="store_true",
+                        help="Перевести базу на auto_vacuum=INCREMENTAL (полный VACUUM)")
+    args = parser.parse_args()
+
+    import json
+    from .database import engine
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.convert:
+        logger.info("Полный VACUUM с auto_vacuum=INCREMENTAL...")
+        convert_to_incremental(engine)
+    print(json.dumps(Maintenance(engine).run(args.budget), ensure_ascii=False, indent=2))
@@ -0,0 +1,221 @@
+# src/metrics.py
+"""
+Легковесные метрики в формате Prometheus (без внешних зависимостей).
+
+HTTP метрики пишутся из event loop (ASGI middleware), а остальные - и
+из рабочих потоков: синхронные эндпоинты (медленные запросы), фоновые
+пересчеты precompute, резервное копирование и обслуживание базы. Поэтому
+у каждой метрики своя блокировка: обновление под ней - инкремент
+элемента списка/словаря, рендеринг копирует значения под блокировкой и
+форматирует их уже без нее. Рендеринг выполняется только при запросе
+/metrics.
+"""
+from bisect import bisect_left
+import math
+import threading
+
+# Границы по умолчанию: время ответа (секунды) и размеры (байты)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value):
+    """Экранирование значения метки по правилам Prometheus"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Metric:
+    """Базовый класс метрики с набором меток"""
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self):
+        raise NotImplementedError
+
+class Counter(Metric):
+    """Монотонно растущий счетчик"""
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+class Gauge(Counter):
+    """Значение, которое может расти и уменьшаться.
+
+    Вместо хранимого значения можно задать функцию (set_function),
+    которая вызывается при каждом рендеринге.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def dec(self, *labelvalues, amount=1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues, value):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def set_function(self, function):
+        """function() -> {labelvalues_tuple: value}"""
+        self._function = function
+
+    def render(self):
+        if self._function is not None:
+            values = dict(self._function())
+            with self._lock:
+                self._values = values
+        return super().render()
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными границами.
+
+    На каждую комбинацию меток хранится список счетчиков по корзинам
+    (не кумулятивный) плюс сумма и количество. Наблюдение - это bisect
+    и два инкремента.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, *labelvalues):
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # [корзины..., +Inf, сумма]
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            series[bucket] += 1
+            series[-1] += value
+
+    def count(self, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            return sum(series[:-1]) if series else 0
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            all_series = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in all_series:
+            cumulative = 0
+            for bound, hits in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += hits
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(float(series[-1]))}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+class Registry:
+    """Реестр метрик процесса"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        # Повторная регистрация возвращает уже существующую метрику
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# --- HTTP метрики ---
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Количество HTTP запросов", ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "Время обработки HTTP запроса", ("method", "route")
+)
+HTTP_REQUEST_SIZE = REGISTRY.histogram(
+    "http_request_size_bytes", "Размер тела запроса", ("method", "route"), SIZE_BUCKETS
+)
+HTTP_RESPONSE_SIZE = REGISTRY.histogram(
+    "http_response_size_bytes", "Размер тела ответа", ("method", "route"), SIZE_BUCKETS
+)
+HTTP_IN_PROGRESS = REGISTRY.gauge(
+    "http_requests_in_progress", "Запросы в обработке", ("method",)
+)
+HTTP_COMPRESSION_BYTES = REGISTRY.counter(
+    "http_compression_bytes_total", "Байты сжатых ответов до и после сжатия",
+    ("encoding", "stage")
+)
+
+# --- Метрики базы данных ---
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+DB_QUERIES = REGISTRY.histogram(
+    "db_queries_per_request", "Количество SQL запросов на HTTP запрос",
+    ("method", "route"), QUERY_COUNT_BUCKETS
+)
+DB_TIME = REGISTRY.histogram(
+    "db_time_seconds", "Суммарное время SQL запросов на HTTP запрос", ("method", "route")
+)
+DB_DUPLICATE_QUERIES = REGISTRY.counter(
+    "db_duplicate_queries_total", "Повторяющиеся SQL запросы (признак N+1)", ("method", "route")
+)
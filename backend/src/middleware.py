@@ -0,0 +1,511 @@
+# src/middleware.py
+"""
+ASGI middleware приложения.
+
+Middleware написаны на "чистом" ASGI, а не через BaseHTTPMiddleware:
+так они не буферизуют ответ и не создают лишних задач на каждый запрос.
+"""
+from time import perf_counter
+from urllib.parse import parse_qsl
+import logging
+import os
+import re
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.routing import Mount
+
+from . import metrics
+from .query_stats import track_queries, QUERY_DEBUG, N_PLUS_ONE_THRESHOLD
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Сжатие ответов: меньше порога (байт) не сжимаем - выигрыш меньше затрат
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+# Уровни сжатия: выше - меньше трафик, но больше CPU на запрос
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))
+
+# Сжимаем только текстовые форматы; картинки, шрифты и архивы уже сжаты
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+
+def route_label(scope):
+    """
+    Шаблон маршрута для меток метрик (например, /api/cashier/orders/{order_id}).
+
+    Router записывает в scope найденный endpoint; по нему определяем шаблон,
+    чтобы не плодить серии метрик на каждый order_id.
+    """
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return UNMATCHED_ROUTE
+
+    labels = getattr(app.state, "route_labels", None)
+    if labels is None:
+        labels = {}
+        for route in app.routes:
+            if isinstance(route, Mount):
+                labels[id(route.app)] = route.path + "/{path}"
+            elif hasattr(route, "endpoint"):
+                labels[id(route.endpoint)] = route.path
+        app.state.route_labels = labels
+    return labels.get(id(endpoint), UNMATCHED_ROUTE)
+
+class MetricsMiddleware:
+    """Сбор метрик: время ответа, размеры, статусы, запросы в обработке"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        sizes = {"request": 0, "response": 0}
+        status = 500
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                sizes["request"] += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sizes["response"] += len(message.get("body", b""))
+            await send(message)
+
+        metrics.HTTP_IN_PROGRESS.inc(method)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            metrics.HTTP_IN_PROGRESS.dec(method)
+
+            route = route_label(scope)
+            metrics.HTTP_REQUESTS.inc(method, route, str(status))
+            metrics.HTTP_LATENCY.observe(elapsed, method, route)
+            metrics.HTTP_REQUEST_SIZE.observe(sizes["request"], method, route)
+            metrics.HTTP_RESPONSE_SIZE.observe(sizes["response"], method, route)
+
+class QueryStatsMiddleware:
+    """
+    Учет SQL запросов на HTTP запрос.
+
+    Добавляет заголовки X-Query-Count и X-DB-Time (мс), пишет метрики.
+    В отладочном режиме добавляет X-Query-Duplicates и логирует
+    повторяющиеся statement'ы.
+    """
+
+    def __init__(self, app, debug=QUERY_DEBUG):
+        self.app = app
+        self.debug = debug
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries(self.debug, scope) as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-query-count", str(stats.count).encode()))
+                    headers.append((b"x-db-time", f"{stats.total_time * 1000:.3f}".encode()))
+                    if self.debug:
+                        duplicates = sum(stats.duplicates().values())
+                        headers.append((b"x-query-duplicates", str(duplicates).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._record(scope, stats)
+
+    def _record(self, scope, stats):
+        method = scope["method"]
+        route = route_label(scope)
+        metrics.DB_QUERIES.observe(stats.count, method, route)
+        metrics.DB_TIME.observe(stats.total_time, method, route)
+
+        duplicates = stats.duplicates()
+        if duplicates:
+            metrics.DB_DUPLICATE_QUERIES.inc(method, route, amount=sum(duplicates.values()))
+            for sql, n in duplicates.items():
+                logger.warning(
+                    "Возможный N+1 в %s %s: запрос выполнен %d раз (порог %d): %s",
+                    method, route, n, N_PLUS_ONE_THRESHOLD, " ".join(sql.split())[:200]
+                )
+
+class ProfilingMiddleware:
+    """
+    Профилирование запроса по требованию администратора.
+
+    Флаг: заголовок X-Profile: 1 или параметр ?profile=1, плюс X-Admin-Token.
+    В ответ добавляется X-Profile-Id - имя HTML файла в instance/profiles.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        from .profiling import RequestProfiler, is_admin_token
+
+        headers = dict(scope["headers"])
+        if not is_admin_token(headers.get(b"x-admin-token", b"").decode("latin-1")):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = RequestProfiler(scope["method"], scope["path"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", f"{profiler.profile_id}.html".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            name = profiler.stop_and_save()
+            logger.info("Профиль %s %s сохранен: %s", scope["method"], scope["path"], name)
+
+    @staticmethod
+    def _wants_profile(scope):
+        query_string = scope.get("query_string", b"")
+        if b"profile" in query_string and ("profile", "1") in parse_qsl(query_string.decode("latin-1")):
+            return True
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return value == b"1"
+        return False
+
+class AdmissionMiddleware:
+    """
+    Admission control: лимиты параллельных запросов по классам маршрутов.
+
+    Не допущенный запрос получает 503 с Retry-After (см. src/admission.py).
+    """
+
+    def __init__(self, app, controller=None):
+        from .admission import AdmissionController
+
+        self.app = app
+        self.controller = controller or AdmissionController()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.controller.limiter_for(scope["method"], scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        from .admission import Rejected
+
+        try:
+            await limiter.acquire()
+        except Rejected as e:
+            logger.warning("Запрос %s %s отклонен: %s", scope["method"], scope["path"], e)
+            response = JSONResponse(
+                {"detail": "Сервер перегружен, повторите запрос позже"},
+                status_code=503,
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+class CoalescingMiddleware:
+    """
+    Single-flight для одинаковых параллельных GET запросов.
+
+    Лидер выполняется как обычно, его ответ запоминается; такие же
+    запросы, пришедшие во время выполнения, получают копию ответа
+    с X-Coalesced: 1 (см. src/singleflight.py). Копируются только
+    успешные ответы (2xx и 304): после ошибки лидера (500, 503 от
+    admission control) ожидающие выполняются сами.
+    """
+
+    def __init__(self, app, group=None, max_body=None):
+        from .singleflight import COALESCE_MAX_BODY, SingleFlight
+
+        self.app = app
+        self.group = group or SingleFlight()
+        self.max_body = COALESCE_MAX_BODY if max_body is None else max_body
+
+    async def __call__(self, scope, receive, send):
+        from .singleflight import HTTP_COALESCED, request_key
+
+        key = request_key(scope) if scope["type"] == "http" else None
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def run_leader():
+            messages = []
+            size = 0
+
+            async def send_wrapper(message):
+                nonlocal messages, size
+                if message["type"] == "http.response.start" and not (
+                    200 <= message["status"] < 300 or message["status"] == 304
+                ):
+                    # Ошибку лидера не раздаем: у ожидающих может получиться
+                    messages = None
+                if messages is not None:
+                    size += len(message.get("body", b""))
+                    if size > self.max_body:
+                        messages = None
+                    else:
+                        messages.append(message)
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+            if messages is None:
+                return None
+            return scope.get("endpoint"), messages
+
+        result, shared = await self.group.do(key, run_leader)
+        if not shared:
+            return
+        if result is None:
+            # Лидер упал, ответил ошибкой или ответ слишком большой -
+            # выполняемся сами
+            await self.app(scope, receive, send)
+            return
+
+        endpoint, messages = result
+        # Для меток метрик: у ожидающего запроса роутер не вызывался
+        if endpoint is not None:
+            scope["endpoint"] = endpoint
+        HTTP_COALESCED.inc(route_label(scope))
+
+        for message in messages:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-coalesced", b"1"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+def parse_accept_encoding(accept_encoding):
+    """Accept-Encoding -> {кодирование: q}"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    return accepted
+
+def _accepted_encoding(accept_encoding):
+    """Лучшее поддерживаемое кодирование из Accept-Encoding (br, gzip или None)"""
+    accepted = parse_accept_encoding(accept_encoding)
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+class _GzipCompressor:
+    def __init__(self, level):
+        # wbits=31 - формат gzip (заголовок и CRC)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+class _BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+_WEAK_PREFIX_RE = re.compile(r"(^|,)\s*W/")
+
+def _weaken_etag(headers):
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = "W/" + etag
+
+def _strong_if_none_match(scope, if_none_match):
+    """
+    If-None-Match без W/: StaticFiles сравнивает ETag строго, а
+    If-None-Match по RFC 9110 сравнивается слабо - W/"x" совпадает с "x".
+
+    Меняется сам scope, а не копия: в него роутер записывает endpoint,
+    по которому внешний MetricsMiddleware определяет маршрут.
+    """
+    headers = [(name, value) for name, value in scope["headers"] if name != b"if-none-match"]
+    headers.append((b"if-none-match", _WEAK_PREFIX_RE.sub(r"\1", if_none_match).encode("latin-1")))
+    scope["headers"] = headers
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов gzip/brotli.
+
+    Обычный ответ сжимается целиком, если он не меньше minimum_size.
+    Потоковый ответ (more_body) сжимается по частям: каждая часть
+    сбрасывается клиенту сразу, без буферизации всего тела.
+    Не сжимаются ответы с Content-Encoding (например, заранее сжатая
+    статика) и нетекстовые форматы.
+
+    ETag сжатого ответа (и ответа 304 клиенту со сжатием) становится
+    слабым (W/"..."), как в nginx: байты сжатого и несжатого тела разные,
+    и строгий ETag несжатого файла для них неверен. If-None-Match
+    сравнивается слабо, поэтому 304 по нему по-прежнему работает.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE,
+                 gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _compressor(self, encoding):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    def _should_compress(self, headers):
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        content_length = headers.get("content-length")
+        return content_length is None or int(content_length) >= self.minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        if "W/" in request_headers.get("if-none-match", ""):
+            _strong_if_none_match(scope, request_headers["if-none-match"])
+
+        encoding = _accepted_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                if message["status"] == 304:
+                    # Тот же ETag, что у сжатого ответа 200
+                    _weaken_etag(headers)
+                    passthrough = True
+                    await send({**message, "headers": headers.raw})
+                    return
+                if not self._should_compress(headers):
+                    passthrough = True
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                # Заголовки отправим, когда станет ясно, сжимается ли тело
+                start_message = {**message, "headers": headers.raw}
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            headers = MutableHeaders(raw=start_message["headers"])
+
+            if compressor is None:
+                if not more_body:
+                    # Ответ целиком в одном сообщении
+                    if len(body) < self.minimum_size:
+                        passthrough = True
+                        await send(start_message)
+                        await send(message)
+                        return
+                    compressed = self._compressor(encoding)
+                    data = compressed.compress(body) + compressed.finish()
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(data))
+                    _weaken_etag(headers)
+                    metrics.HTTP_COMPRESSION_BYTES.inc(encoding, "original", amount=len(body))
+                    metrics.HTTP_COMPRESSION_BYTES.inc(encoding, "compressed", amount=len(data))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": data})
+                    return
+
+                # Потоковый ответ: итоговая длина неизвестна
+                compressor = self._compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                del headers["Content-Length"]
+                _weaken_etag(headers)
+                await send(start_message)
+
+            data = compressor.compress(body)
+            data += compressor.flush() if more_body else compressor.finish()
+            metrics.HTTP_COMPRESSION_BYTES.inc(encoding, "original", amount=len(body))
+            metrics.HTTP_COMPRESSION_BYTES.inc(encoding, "compressed", amount=len(data))
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,7 +1,14 @@
 # Экспортируем все модели для удобного импорта
 from .category import Category
 from .dish import Dish
-from .order import Order
-from .order_item import OrderItem
+from .order import Order, business_date, business_day_range, local_order_time
+from .order_item import OrderItem, item_count_subquery
+from .menu_sync import DishPrice, MenuTombstone, MenuVersion, current_menu_version, price_at
+from .dish_search import search_dishes
+from .sales_rollup import DailyDishSales, rollup_totals, sales_rows
 
-__all__ = ["Category", "Dish", "Order", "OrderItem"]
+__all__ = [
+    "Category", "DailyDishSales", "Dish", "DishPrice", "Order", "OrderItem", "MenuTombstone", "MenuVersion",
+    "business_date", "business_day_range", "current_menu_version", "item_count_subquery", "local_order_time",
+    "price_at", "rollup_totals", "sales_rows", "search_dishes"
+]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from ..database import Base
@@ -9,3 +9,5 @@ class Category(Base):
     # Для SQLite используем String вместо UUID
     category_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(50), nullable=False)
+    # Версия меню, в которой категория последний раз менялась (см. menu_sync)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, ForeignKey
 from sqlalchemy.orm import relationship
 import uuid
 from ..database import Base
@@ -7,8 +7,10 @@ class Dish(Base):
     __tablename__ = "dishes"
     
     dish_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    category_id = Column(String(36), ForeignKey("categories.category_id"))
+    category_id = Column(String(36), ForeignKey("categories.category_id"), index=True)
     name = Column(String(100), nullable=False)
     price = Column(Numeric(10, 2), nullable=False)
+    # Версия меню, в которой блюдо последний раз менялось (см. menu_sync)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
     
     category = relationship("Category", backref="dishes")
@@ -0,0 +1,143 @@
+"""
+Полнотекстовый поиск блюд (SQLite FTS5).
+
+Таблица dish_search - название блюда и категории; поддерживается
+триггерами на dishes и categories, поэтому изменения через
+api/admin.py (и любые другие INSERT/UPDATE/DELETE) сразу видны в поиске.
+Токенизатор unicode61 сравнивает без учета регистра, в том числе для
+кириллицы; "ё" при индексации и в запросе заменяется на "е".
+
+Каждое слово запроса ищется как префикс: "бор укр" найдет
+"Борщ украинский". Для других СУБД - запасной вариант через ILIKE.
+"""
+import re
+
+from sqlalchemy import column, event, func, literal_column, or_, table, text
+
+from ..database import Base
+from .category import Category
+from .dish import Dish
+
+# Слов запроса учитывается не больше этого (остальные отбрасываются)
+MAX_QUERY_TERMS = 8
+
+# Для запросов: колонки виртуальной таблицы (в Base.metadata ее нет)
+_dish_search = table("dish_search", column("dish_id"), column("name"))
+
+def _fold(value):
+    """Замена "ё" на "е" (SQL выражение)"""
+    return f"replace(replace({value}, 'ё', 'е'), 'Ё', 'Е')"
+
+_CATEGORY_NAME = _fold("(SELECT name FROM categories WHERE category_id = new.category_id)")
+
+_DDL = (
+    # prefix='2 3': отдельные индексы для коротких префиксов - запрос
+    # "бо"* не перебирает весь словарь
+    """CREATE VIRTUAL TABLE dish_search USING fts5(
+        name, category, dish_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS dish_search_ai AFTER INSERT ON dishes BEGIN
+        INSERT INTO dish_search (name, category, dish_id)
+        VALUES ({_fold("new.name")}, {_CATEGORY_NAME}, new.dish_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS dish_search_au AFTER UPDATE OF name, category_id ON dishes BEGIN
+        UPDATE dish_search SET name = {_fold("new.name")}, category = {_CATEGORY_NAME}
+        WHERE dish_id = old.dish_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS dish_search_ad AFTER DELETE ON dishes BEGIN
+        DELETE FROM dish_search WHERE dish_id = old.dish_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS dish_search_cu AFTER UPDATE OF name ON categories BEGIN
+        UPDATE dish_search SET category = {_fold("new.name")}
+        WHERE dish_id IN (SELECT dish_id FROM dishes WHERE category_id = new.category_id);
+    END""",
+)
+
+_REBUILD = f"""
+    INSERT INTO dish_search (name, category, dish_id)
+    SELECT {_fold("d.name")}, {_fold("c.name")}, d.dish_id
+    FROM dishes d LEFT JOIN categories c ON c.category_id = d.category_id
+"""
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index(metadata, connection, **kw):
+    """Создает индекс и триггеры; новый индекс заполняется из dishes"""
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'dish_search'"
+    ).scalar()
+    if not exists:
+        for ddl in _DDL:
+            connection.exec_driver_sql(ddl)
+        connection.exec_driver_sql(_REBUILD)
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_search_index(metadata, connection, **kw):
+    # Триггеры удаляются вместе с dishes/categories
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS dish_search")
+
+def _query_terms(query):
+    """Слова запроса (буквы и цифры), "ё" -> "е" """
+    query = query.replace("ё", "е").replace("Ё", "Е")
+    return re.findall(r"[^\W_]+", query)[:MAX_QUERY_TERMS]
+
+def match_expression(query):
+    """Выражение FTS5 MATCH: все слова как префиксы, каждое в кавычках"""
+    return " ".join(f'"{term}"*' for term in _query_terms(query))
+
+def search_dishes(db, query, limit=20, offset=0):
+    """
+    Поиск блюд по названию блюда и категории.
+
+    Возвращает {"total", "limit", "offset", "items"}; совпадения в
+    названии блюда выше совпадений только в категории.
+    """
+    result = {"total": 0, "limit": limit, "offset": offset, "items": []}
+    terms = _query_terms(query)
+    if not terms:
+        return result
+
+    columns = (Dish.dish_id, Dish.name, Dish.price, Dish.category_id, Category.name)
+    if db.get_bind().dialect.name == "sqlite":
+        # Ранжирование и страница - по одной таблице индекса; с dishes
+        # соединяются только строки страницы, а не все совпадения
+        score = literal_column("bm25(dish_search, 10.0, 1.0)")
+        matches = db.query(_dish_search.c.dish_id).select_from(_dish_search).filter(
+            text("dish_search MATCH :match").bindparams(match=match_expression(query))
+        )
+        result["total"] = matches.with_entities(func.count()).scalar()
+        if result["total"] <= offset:
+            return result
+        page = matches.add_columns(score.label("score")).order_by(
+            score, _dish_search.c.name, _dish_search.c.dish_id
+        ).limit(limit).offset(offset).subquery()
+        rows = db.query(*columns).select_from(page).join(
+            Dish, Dish.dish_id == page.c.dish_id
+        ).outerjoin(Category, Category.category_id == Dish.category_id).order_by(
+            page.c.score, Dish.name, Dish.dish_id
+        ).all()
+    else:
+        # Запасной вариант без FTS5: каждое слово - подстрока названия или категории
+        matches = db.query(Dish).outerjoin(Category, Category.category_id == Dish.category_id).filter(*[
+            or_(Dish.name.ilike(f"%{term}%"), Category.name.ilike(f"%{term}%"))
+            for term in terms
+        ])
+        result["total"] = matches.with_entities(func.count()).scalar()
+        rows = matches.with_entities(*columns).order_by(
+            Dish.name, Dish.dish_id
+        ).limit(limit).offset(offset).all()
+
+    result["items"] = [
+        {
+            "dish_id": dish_id,
+            "name": name,
+            "price": price,
+            "category_id": category_id,
+            "category_name": category_name or "",
+        }
+        for dish_id, name, price, category_id, category_name in rows
+    ]
+    return result
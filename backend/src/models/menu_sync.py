@@ -0,0 +1,100 @@
+from sqlalchemy import Column, Integer, Numeric, String, event, insert, inspect, select, update
+from sqlalchemy.orm import Session
+import uuid
+from ..database import Base
+from .category import Category
+from .dish import Dish
+
+class MenuVersion(Base):
+    """
+    Счетчик версий меню (одна строка).
+
+    Каждый flush, меняющий блюда или категории, увеличивает счетчик и
+    проставляет новую версию измененным строкам. UPDATE счетчика берет
+    блокировку записи, поэтому версии выдаются строго по порядку коммитов.
+    """
+    __tablename__ = "menu_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class MenuTombstone(Base):
+    """Удаленное блюдо или категория - для синхронизации ?since="""
+    __tablename__ = "menu_tombstones"
+
+    entity = Column(String(20), primary_key=True)  # "dish" | "category"
+    entity_id = Column(String(36), primary_key=True)
+    version = Column(Integer, nullable=False, index=True)
+
+class DishPrice(Base):
+    """
+    История цен блюда: цена, действующая с версии меню version.
+
+    Цена на момент версии V - запись с наибольшей version <= V. По ней
+    проверяется цена заказа, пробитого кассой по старой версии меню
+    (POST /api/cashier/orders/batch).
+    """
+    __tablename__ = "dish_prices"
+
+    dish_id = Column(String(36), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    price = Column(Numeric(10, 2), nullable=False)
+
+_ENTITIES = {Dish: "dish", Category: "category"}
+
+def price_at(history, version):
+    """Цена из истории [(version, price), ...] на момент версии меню или None"""
+    price = None
+    for since, value in sorted(history):
+        if since > version:
+            break
+        price = value
+    return price
+
+def backfill_dish_prices(connection):
+    """Текущие цены блюд, у которых еще нет истории; возвращает их количество"""
+    dishes, prices = Dish.__table__, DishPrice.__table__
+    missing = select(dishes.c.dish_id, dishes.c.version, dishes.c.price).where(
+        ~select(prices.c.dish_id).where(prices.c.dish_id == dishes.c.dish_id).exists()
+    )
+    result = connection.execute(
+        insert(prices).from_select(["dish_id", "version", "price"], missing)
+    )
+    return result.rowcount
+
+def current_menu_version(db):
+    """Текущая версия меню (0, если меню не менялось)"""
+    return db.query(MenuVersion.version).scalar() or 0
+
+def _next_version(connection):
+    table = MenuVersion.__table__
+    result = connection.execute(update(table).values(version=table.c.version + 1))
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(id=1, version=1))
+        return 1
+    return connection.execute(select(table.c.version)).scalar()
+
+@event.listens_for(Session, "before_flush")
+def _stamp_menu_version(session, flush_context, instances):
+    """Проставляет версию измененным блюдам/категориям и пишет tombstone'ы"""
+    changed = [obj for obj in session.new if type(obj) in _ENTITIES]
+    changed += [
+        obj for obj in session.dirty
+        if type(obj) in _ENTITIES and session.is_modified(obj, include_collections=False)
+    ]
+    deleted = [obj for obj in session.deleted if type(obj) in _ENTITIES]
+    if not changed and not deleted:
+        return
+
+    version = _next_version(session.connection())
+    for obj in changed:
+        obj.version = version
+        if type(obj) is Dish and (obj in session.new or inspect(obj).attrs.price.history.has_changes()):
+            if obj.dish_id is None:
+                # default колонки выполнится только при INSERT, а id нужен истории сейчас
+                obj.dish_id = str(uuid.uuid4())
+            session.add(DishPrice(dish_id=obj.dish_id, version=version, price=obj.price))
+    for obj in deleted:
+        entity = _ENTITIES[type(obj)]
+        entity_id = obj.dish_id if entity == "dish" else obj.category_id
+        session.add(MenuTombstone(entity=entity, entity_id=entity_id, version=version))
@@ -1,19 +1,122 @@
-from sqlalchemy import Column, DateTime, Numeric, func, String, text
+from sqlalchemy import (
+    BigInteger, Column, DateTime, Index, Integer, Numeric, func, String, text, and_, bindparam, event, select, update
+)
+import os
 import uuid
 from ..database import Base
 from datetime import *
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Часовой пояс столовой: в нем хранится order_date и считаются рабочие дни
+CANTEEN_TIMEZONE = os.getenv("CANTEEN_TIMEZONE", "Europe/Moscow")
+# Час смены рабочего дня: заказ в 02:00 при значении 4 относится к предыдущему дню
+BUSINESS_DAY_CUTOVER_HOUR = int(os.getenv("BUSINESS_DAY_CUTOVER_HOUR", 0))
+
+def _load_timezone(name):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        # Нет базы часовых поясов (Windows без пакета tzdata)
+        print(f"⚠️  Часовой пояс {name} не найден, используется UTC+3")
+        return timezone(timedelta(hours=3))
+
+CANTEEN_TZ = _load_timezone(CANTEEN_TIMEZONE)
+
+def local_order_time(moment=None):
+    """
+    Время заказа в формате хранения: время столовой (CANTEEN_TIMEZONE,
+    по умолчанию московское) без часового пояса.
+
+    moment с часовым поясом (например, время пробития на кассе в UTC)
+    переводится в пояс столовой; None - текущее время.
+    """
+    if moment is None:
+        return datetime.now(CANTEEN_TZ).replace(tzinfo=None)
+    if moment.tzinfo is not None:
+        return moment.astimezone(CANTEEN_TZ).replace(tzinfo=None)
+    return moment
+
+def business_date(moment=None):
+    """Рабочий день для времени в формате хранения (None - текущий рабочий день)"""
+    moment = moment or local_order_time()
+    return (moment - timedelta(hours=BUSINESS_DAY_CUTOVER_HOUR)).date()
+
+def business_day_key(day):
+    """Значение колонки business_day для даты: 2024-03-15 -> 20240315"""
+    return day.year * 10000 + day.month * 100 + day.day
+
+def order_epoch_ms(moment):
+    """Unix-время (мс) для времени в формате хранения"""
+    return int(moment.replace(tzinfo=CANTEEN_TZ).timestamp() * 1000)
 
 class Order(Base):
     __tablename__ = "orders"
-    
+
     order_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if not self.order_date:
-            # Устанавливаем московское время
-            self.order_date = datetime.utcnow() + timedelta(hours=3)
-    
-    order_date = Column(DateTime)
+            # Устанавливаем время столовой
+            self.order_date = local_order_time()
+
+    order_date = Column(DateTime, index=True)
+    # Производные от order_date, заполняются при записи (см. _stamp_order_day):
+    # рабочий день YYYYMMDD для выборок "за день" и момент заказа в UTC
+    business_day = Column(Integer)
+    order_epoch_ms = Column(BigInteger)
 
     total_amount = Column(Numeric(10, 2), default=0.00)
+
+    __table_args__ = (
+        # Заказы дня - диапазон индекса, уже упорядоченный по времени
+        Index("ix_orders_business_day", "business_day", "order_date"),
+    )
+
+@event.listens_for(Order, "before_insert")
+@event.listens_for(Order, "before_update")
+def _stamp_order_day(mapper, connection, order):
+    if order.order_date is not None:
+        order.business_day = business_day_key(business_date(order.order_date))
+        order.order_epoch_ms = order_epoch_ms(order.order_date)
+
+def business_day_range(start_date=None, end_date=None):
+    """
+    Условие "рабочий день заказа в [start_date, end_date]" - диапазон по
+    индексу ix_orders_business_day. Для одного дня - равенство: тогда
+    заказы из индекса уже упорядочены по order_date.
+    """
+    if start_date and start_date == end_date:
+        return Order.business_day == business_day_key(start_date)
+    conditions = []
+    if start_date:
+        conditions.append(Order.business_day >= business_day_key(start_date))
+    if end_date:
+        conditions.append(Order.business_day <= business_day_key(end_date))
+    return and_(*conditions)
+
+# Заказов в одном UPDATE при заполнении business_day у старых заказов
+BACKFILL_BATCH = 5000
+
+def backfill_order_days(connection):
+    """
+    Заполнение business_day и order_epoch_ms у заказов, созданных до
+    появления колонок. Возвращает количество обновленных заказов.
+    """
+    orders = Order.__table__
+    pending = select(orders.c.order_id, orders.c.order_date).where(
+        orders.c.business_day.is_(None), orders.c.order_date.is_not(None)
+    ).limit(BACKFILL_BATCH)
+    stamp = update(orders).where(orders.c.order_id == bindparam("id")).values(
+        business_day=bindparam("day"), order_epoch_ms=bindparam("epoch")
+    )
+    filled = 0
+    while True:
+        rows = connection.execute(pending).all()
+        if not rows:
+            return filled
+        connection.execute(stamp, [
+            {"id": order_id, "day": business_day_key(business_date(order_date)), "epoch": order_epoch_ms(order_date)}
+            for order_id, order_date in rows
+        ])
+        filled += len(rows)
@@ -1,16 +1,52 @@
-from sqlalchemy import Column, Integer, Numeric, ForeignKey, String
+from sqlalchemy import Column, Float, Integer, Numeric, ForeignKey, String, case, cast, select, func, update
 from sqlalchemy.orm import relationship
 import uuid
 from ..database import Base
+from .dish import Dish
+from .order import Order
 
 class OrderItem(Base):
     __tablename__ = "order_items"
     
     order_item_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String(36), ForeignKey("orders.order_id", ondelete="CASCADE"))
-    dish_id = Column(String(36), ForeignKey("dishes.dish_id"))
+    order_id = Column(String(36), ForeignKey("orders.order_id", ondelete="CASCADE"), index=True)
+    dish_id = Column(String(36), ForeignKey("dishes.dish_id"), index=True)
     quantity = Column(Integer, nullable=False)
     item_total = Column(Numeric(10, 2), nullable=False)
+    # Снимок блюда на момент продажи: детали заказа и чек не читают dishes
+    # и не меняются вместе с последующими правками меню
+    dish_name = Column(String(100), nullable=False, server_default="")
+    price_per_item = Column(Numeric(10, 2), nullable=False, server_default="0")
     
     order = relationship("Order", backref="items")
     dish = relationship("Dish")
+
+
+def item_count_subquery():
+    """Количество позиций заказа одним коррелированным подзапросом (вместо N+1)"""
+    return select(func.count(OrderItem.order_item_id))\
+        .where(OrderItem.order_id == Order.order_id)\
+        .correlate(Order)\
+        .scalar_subquery()
+
+def backfill_item_snapshots(connection):
+    """
+    Заполнение снимка блюда у позиций, созданных до его появления.
+
+    Цена восстанавливается из item_total / quantity (это и есть цена
+    продажи), название - текущее название блюда. Повторный запуск
+    ничего не меняет. Возвращает количество обновленных позиций.
+    """
+    items = OrderItem.__table__
+    dish_name = select(Dish.name).where(Dish.dish_id == items.c.dish_id).scalar_subquery()
+    result = connection.execute(
+        update(items).where(items.c.dish_name == "").values(
+            dish_name=func.coalesce(dish_name, "Неизвестное блюдо"),
+            # Float: в SQLite целые item_total и quantity делились бы нацело
+            price_per_item=case(
+                (items.c.quantity > 0, func.round(cast(items.c.item_total, Float) / items.c.quantity, 2)),
+                else_=0
+            )
+        )
+    )
+    return result.rowcount
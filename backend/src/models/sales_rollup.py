@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, Numeric, String, and_, func, select, union_all
+from ..database import Base
+from .order import Order, business_day_key, business_day_range
+from .order_item import OrderItem
+
+class DailyDishSales(Base):
+    """
+    Продажи блюда за рабочий день.
+
+    Заполняется при очистке старых позиций заказов (src/maintenance.py):
+    позиции дня сворачиваются сюда и удаляются, а сами заказы с суммами
+    остаются. Для отчетов продажи = позиции + эти итоги (см. sales_rows).
+    """
+    __tablename__ = "daily_dish_sales"
+
+    business_day = Column(Integer, primary_key=True)
+    dish_id = Column(String(36), primary_key=True)
+    dish_name = Column(String(100), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    revenue = Column(Numeric(10, 2), nullable=False)
+
+def sales_rows(start_date=None, end_date=None):
+    """
+    Подзапрос продаж за рабочие дни [start_date, end_date] (без дат - за
+    все время): строки (dish_id, quantity, amount) из позиций заказов и
+    из свернутых итогов.
+    """
+    items = select(OrderItem.dish_id, OrderItem.quantity, OrderItem.item_total.label("amount"))
+    rollups = select(DailyDishSales.dish_id, DailyDishSales.quantity, DailyDishSales.revenue.label("amount"))
+    if start_date or end_date:
+        items = items.join(Order, Order.order_id == OrderItem.order_id)\
+            .where(business_day_range(start_date, end_date))
+        rollups = rollups.where(and_(
+            DailyDishSales.business_day >= business_day_key(start_date) if start_date else True,
+            DailyDishSales.business_day <= business_day_key(end_date) if end_date else True,
+        ))
+    return union_all(items, rollups).subquery("sales")
+
+def rollup_totals():
+    """Свернутые итоги за все время: подзапрос (dish_id, quantity, revenue), строка на блюдо"""
+    return select(
+        DailyDishSales.dish_id,
+        func.sum(DailyDishSales.quantity).label("quantity"),
+        func.sum(DailyDishSales.revenue).label("revenue")
+    ).group_by(DailyDishSales.dish_id).subquery("rollups")
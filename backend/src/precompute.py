@@ -0,0 +1,314 @@
+# src/precompute.py
+"""
+Прогрев и фоновый пересчет тяжелых ответов.
+
+Сразу после деплоя первые открывшие меню и отчеты платят полную цену
+холодного запроса. Планировщик (запускается в lifespan приложения)
+при старте и затем раз в PRECOMPUTE_INTERVAL секунд считает:
+- меню кассы (GET /api/cashier/menu);
+- отчет за сегодня (GET /api/reports/daily);
+- отчеты по категориям за последние 7 и 30 дней.
+
+Готовые ответы (уже сериализованные) лежат в CACHE и отдаются
+обработчиками с заголовком X-Precomputed: 1. Коммит, меняющий блюда,
+категории или заказы, сразу удаляет зависящие ответы (до их пересчета
+обработчики считают ответ сами) и будит планировщик; пересчет
+выполняется через PRECOMPUTE_DEBOUNCE секунд, чтобы поток заказов
+в обед не пересчитывал отчеты на каждый чек.
+
+Задачи выполняются по одной в пуле потоков - никогда не параллельно.
+Время выполнения - в метриках precompute_job_seconds и в
+/api/admin/diagnostics/precompute.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from time import perf_counter
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "True").lower() in ("true", "1", "t")
+
+# Плановый пересчет всех задач (секунды)
+PRECOMPUTE_INTERVAL = float(os.getenv("PRECOMPUTE_INTERVAL", 300))
+# Задержка пересчета после изменения данных (секунды)
+PRECOMPUTE_DEBOUNCE = float(os.getenv("PRECOMPUTE_DEBOUNCE", 5))
+
+PRECOMPUTE_JOB_SECONDS = metrics.REGISTRY.histogram(
+    "precompute_job_seconds", "Время выполнения задач прогрева", ("job",)
+)
+PRECOMPUTE_JOB_RUNS = metrics.REGISTRY.counter(
+    "precompute_job_runs_total", "Запуски задач прогрева", ("job", "status")
+)
+PRECOMPUTE_LAST_SUCCESS = metrics.REGISTRY.gauge(
+    "precompute_last_success_timestamp", "Время последнего успешного пересчета (unix)", ("job",)
+)
+
+# Таблица -> тег, по которому удаляются зависящие от нее ответы
+_TABLE_TAGS = {
+    "dishes": "menu",
+    "categories": "menu",
+    "orders": "orders",
+    "order_items": "orders",
+}
+
+class Snapshot:
+    """Сериализованный ответ: тело и заголовки"""
+
+    def __init__(self, body, media_type, headers):
+        self.body = body
+        self.media_type = media_type
+        self.headers = headers
+
+    @classmethod
+    def from_response(cls, response):
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name not in ("content-length", "content-type")
+        }
+        headers["X-Precomputed"] = "1"
+        return cls(response.body, response.media_type, headers)
+
+    def response(self):
+        # Каждый раз новый Response: middleware могут менять его заголовки
+        return Response(self.body, media_type=self.media_type, headers=self.headers)
+
+class PrecomputedCache:
+    """
+    Готовые ответы по ключам с тегами зависимостей.
+
+    Поколение тега растет при каждой инвалидации: ответ, посчитанный
+    до изменения данных, но сохраняемый после, отбрасывается.
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.on_invalidate = None
+        self._entries = {}
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def generation(self, tags):
+        with self._lock:
+            return tuple(self._generations[tag] for tag in tags)
+
+    def put(self, key, snapshot, tags, generation):
+        """Сохранить ответ; False, если данные успели измениться"""
+        with self._lock:
+            if tuple(self._generations[tag] for tag in tags) != generation:
+                return False
+            self._entries[key] = (snapshot, frozenset(tags))
+            return True
+
+    def response(self, key, db):
+        """Готовый ответ или None (сессия db должна смотреть в ту же БД)"""
+        if self.engine is None or db.get_bind() is not self.engine:
+            return None
+        entry = self._entries.get(key)
+        return entry[0].response() if entry else None
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] += 1
+            self._entries = {
+                key: entry for key, entry in self._entries.items() if not entry[1] & tags
+            }
+        if self.on_invalidate is not None:
+            self.on_invalidate(tags)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+CACHE = PrecomputedCache()
+
+@event.listens_for(Session, "after_flush")
+def _collect_tags(session, flush_context):
+    """Теги измененных таблиц копятся в сессии до коммита"""
+    tags = {
+        _TABLE_TAGS.get(getattr(obj, "__tablename__", None))
+        for objects in (session.new, session.dirty, session.deleted) for obj in objects
+    }
+    tags.discard(None)
+    if tags:
+        session.info.setdefault("precompute_tags", set()).update(tags)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    tags = session.info.pop("precompute_tags", None)
+    if tags:
+        CACHE.invalidate(frozenset(tags))
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tags(session):
+    session.info.pop("precompute_tags", None)
+
+class Job:
+    """Задача прогрева: compute(db) -> (ключ, Response)"""
+
+    def __init__(self, name, tags, compute):
+        self.name = name
+        self.tags = frozenset(tags)
+        self.compute = compute
+        self.due = True
+        self.last_run = None
+        self.last_duration = None
+        self.last_error = None
+
+    def status(self):
+        return {
+            "job": self.name,
+            "tags": sorted(self.tags),
+            "last_run": self.last_run,
+            "last_duration_ms": None if self.last_duration is None else round(self.last_duration * 1000, 3),
+            "last_error": self.last_error,
+            "pending": self.due,
+        }
+
+def default_jobs():
+    """Меню, отчет за сегодня и отчеты по категориям за 7 и 30 дней"""
+    from .api import cashier, reports
+    from .models import business_date
+
+    def menu(db):
+        return ("menu",), cashier.menu_snapshot(db)
+
+    def daily(db):
+        today = business_date()
+        return ("daily", today), reports.daily_report(db, today)
+
+    def by_category(days):
+        def compute(db):
+            end = business_date()
+            start = end - timedelta(days=days)
+            return ("by-category", start, end), reports.category_report(db, start, end)
+        return compute
+
+    return [
+        Job("menu", ("menu",), menu),
+        Job("daily_today", ("orders",), daily),
+        Job("by_category_7d", ("orders", "menu"), by_category(7)),
+        Job("by_category_30d", ("orders", "menu"), by_category(30)),
+    ]
+
+class Scheduler:
+    """
+    Фоновый планировщик задач прогрева.
+
+    Одна asyncio задача: выполняет задачи с флагом due по очереди
+    (в пуле потоков), затем ждет до планового пересчета или до
+    инвалидации. Задачи никогда не выполняются параллельно.
+    """
+
+    def __init__(self, session_factory, jobs=None, cache=CACHE,
+                 interval=PRECOMPUTE_INTERVAL, debounce=PRECOMPUTE_DEBOUNCE):
+        self.session_factory = session_factory
+        self.jobs = default_jobs() if jobs is None else jobs
+        self.cache = cache
+        self.interval = interval
+        self.debounce = debounce
+        self._loop = None
+        self._wake = None
+        self._lock = None
+        self._task = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self.cache.engine = self.session_factory.kw["bind"]
+        self.cache.on_invalidate = self.notify
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self.cache.on_invalidate = None
+        self.cache.engine = None
+        self.cache.clear()
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def notify(self, tags):
+        """Данные с тегами изменились (вызывается из любого потока)"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._mark_due, tags)
+
+    def _mark_due(self, tags):
+        for job in self.jobs:
+            if job.tags & tags:
+                job.due = True
+        self._wake.set()
+
+    async def run_pending(self):
+        """Выполнить задачи с флагом due (по одной)"""
+        async with self._lock:
+            for job in self.jobs:
+                if job.due:
+                    job.due = False
+                    await run_in_threadpool(self.run_job, job)
+
+    def run_job(self, job):
+        """Выполнить задачу в текущем потоке и сохранить ответ в кэш"""
+        generation = self.cache.generation(job.tags)
+        status = "ok"
+        start = perf_counter()
+        try:
+            with self.session_factory() as db:
+                key, response = job.compute(db)
+            self.cache.put(key, Snapshot.from_response(response), job.tags, generation)
+            job.last_error = None
+        except Exception as e:
+            status = "error"
+            job.last_error = str(e)
+            logger.exception("Ошибка задачи прогрева %s", job.name)
+        finally:
+            job.last_duration = perf_counter() - start
+            job.last_run = time.time()
+            PRECOMPUTE_JOB_SECONDS.observe(job.last_duration, job.name)
+            PRECOMPUTE_JOB_RUNS.inc(job.name, status)
+            if status == "ok":
+                PRECOMPUTE_LAST_SUCCESS.set(job.name, value=job.last_run)
+
+    async def _run(self):
+        next_refresh = 0.0
+        while True:
+            if time.monotonic() >= next_refresh:
+                for job in self.jobs:
+                    job.due = True
+                next_refresh = time.monotonic() + self.interval
+
+            self._wake.clear()
+            await self.run_pending()
+
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(next_refresh - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                continue
+            # Даем накопиться изменениям (поток заказов), затем пересчитываем
+            await asyncio.sleep(self.debounce)
+
+    def status(self):
+        return {
+            "interval": self.interval,
+            "debounce": self.debounce,
+            "cached": len(self.cache),
+            "jobs": [job.status() for job in self.jobs],
+        }
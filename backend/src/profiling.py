@@ -0,0 +1,188 @@
+# src/profiling.py
+"""
+Профилирование отдельных запросов по требованию.
+
+Запрос профилируется, если в нем есть заголовок X-Profile: 1 (или
+параметр ?profile=1) и верный X-Admin-Token. Остальные запросы идут
+мимо профайлера: middleware лишь проверяет наличие флага.
+
+Если установлен pyinstrument, сохраняется его HTML (интерактивный
+flame graph); иначе используется cProfile: .prof для snakeviz/pstats
+и HTML со сводкой по функциям.
+
+Профайлер работает в одном потоке, а обработчики def FastAPI выполняет
+в пуле потоков - профайлер event loop увидел бы только ожидание потока.
+Поэтому маршруты API создаются с route_class=ProfiledRoute: обработчик
+профилируемого запроса запускается в рабочем потоке под отдельным
+профайлером, и его результат объединяется с профилем event loop.
+"""
+from datetime import datetime
+import contextlib
+import contextvars
+import functools
+import hmac
+import html
+import inspect
+import io
+import os
+import re
+import threading
+
+from fastapi.routing import APIRoute
+
+from .database import DB_DIR
+
+# Токен администратора; без него диагностические функции отключены
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+PROFILES_DIR = os.getenv("PROFILES_DIR", os.path.join(DB_DIR, "profiles"))
+
+# Интервал выборки pyinstrument (секунды): запрос длится миллисекунды,
+# при стандартной 1 мс короткий обработчик может не попасть в профиль
+PROFILE_INTERVAL = 0.0001
+
+try:
+    import pyinstrument
+except ImportError:  # pragma: no cover - зависит от окружения
+    pyinstrument = None
+
+# Профайлер запроса, который сейчас выполняется (контекст копируется
+# в пул потоков вместе с вызовом обработчика)
+_ACTIVE_PROFILER = contextvars.ContextVar("active_profiler", default=None)
+
+def is_admin_token(token):
+    """Проверка токена администратора (постоянное время сравнения)"""
+    return bool(ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+def _slug(path):
+    return re.sub(r"[^A-Za-z0-9]+", "-", path).strip("-")[:60] or "root"
+
+class RequestProfiler:
+    """Профайлер одного запроса (pyinstrument или cProfile)"""
+
+    def __init__(self, method, path):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.profile_id = f"{timestamp}_{method}_{_slug(path)}"
+        self.method = method
+        self.path = path
+        self._profiler = self._new_profiler(async_mode="enabled")
+        # Профайлеры рабочих потоков (обработчики def), см. in_thread
+        self._thread_profilers = []
+        self._lock = threading.Lock()
+        self._token = None
+
+    @staticmethod
+    def _new_profiler(async_mode):
+        if pyinstrument is not None:
+            return pyinstrument.Profiler(interval=PROFILE_INTERVAL, async_mode=async_mode)
+        import cProfile
+        return cProfile.Profile()
+
+    @staticmethod
+    def _start(profiler):
+        if pyinstrument is not None:
+            profiler.start()
+        else:
+            profiler.enable()
+
+    @staticmethod
+    def _stop(profiler):
+        if pyinstrument is not None:
+            return profiler.stop()
+        profiler.disable()
+        return profiler
+
+    def start(self):
+        self._token = _ACTIVE_PROFILER.set(self)
+        self._start(self._profiler)
+
+    @contextlib.contextmanager
+    def in_thread(self):
+        """Профилировать блок в текущем (рабочем) потоке"""
+        profiler = self._new_profiler(async_mode="disabled")
+        self._start(profiler)
+        try:
+            yield
+        finally:
+            result = self._stop(profiler)
+            with self._lock:
+                self._thread_profilers.append(result)
+
+    def stop_and_save(self):
+        """Останавливает профайлер и сохраняет файлы; возвращает имя HTML"""
+        result = self._stop(self._profiler)
+        if self._token is not None:
+            _ACTIVE_PROFILER.reset(self._token)
+            self._token = None
+        os.makedirs(PROFILES_DIR, exist_ok=True)
+        html_name = f"{self.profile_id}.html"
+
+        if pyinstrument is not None:
+            from pyinstrument.renderers import HTMLRenderer
+            from pyinstrument.session import Session
+
+            session = functools.reduce(Session.combine, self._thread_profilers, result)
+            content = HTMLRenderer().render(session)
+        else:
+            import pstats
+
+            stats = pstats.Stats(self._profiler, *self._thread_profilers, stream=io.StringIO())
+            stats.dump_stats(os.path.join(PROFILES_DIR, f"{self.profile_id}.prof"))
+            content = self._cprofile_html(stats)
+
+        with open(os.path.join(PROFILES_DIR, html_name), "w", encoding="utf-8") as f:
+            f.write(content)
+        return html_name
+
+    def _cprofile_html(self, stats):
+        buffer = io.StringIO()
+        stats.stream = buffer
+        stats.sort_stats("cumulative").print_stats(60)
+        return (
+            "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+            f"<title>{html.escape(self.method)} {html.escape(self.path)}</title></head><body>"
+            f"<h3>{html.escape(self.method)} {html.escape(self.path)}</h3>"
+            f"<pre>{html.escape(buffer.getvalue())}</pre></body></html>"
+        )
+
+def _profiled(endpoint):
+    """Обработчик def, который в профилируемом запросе профилирует свой поток"""
+    if inspect.iscoroutinefunction(endpoint):
+        # async def выполняется в event loop - его видит профайлер запроса
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profiler = _ACTIVE_PROFILER.get()
+        if profiler is None:
+            return endpoint(*args, **kwargs)
+        with profiler.in_thread():
+            return endpoint(*args, **kwargs)
+    return wrapper
+
+class ProfiledRoute(APIRoute):
+    """Маршрут API, обработчик def которого попадает в профиль запроса"""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _profiled(endpoint), **kwargs)
+
+def list_profiles():
+    """Сохраненные профили, новые первыми"""
+    if not os.path.isdir(PROFILES_DIR):
+        return []
+    result = []
+    for name in sorted(os.listdir(PROFILES_DIR), reverse=True):
+        path = os.path.join(PROFILES_DIR, name)
+        result.append({
+            "name": name,
+            "size": os.path.getsize(path),
+            "created": datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+        })
+    return result
+
+def profile_path(name):
+    """Путь к файлу профиля или None (имя проверяется на выход из директории)"""
+    if os.path.basename(name) != name:
+        return None
+    path = os.path.join(PROFILES_DIR, name)
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,81 @@
+# src/query_stats.py
+"""
+Учет SQL запросов в рамках одного HTTP запроса.
+
+Хуки SQLAlchemy на движке считают количество и время выполнения
+statement'ов и складывают их в QueryStats текущего контекста
+(contextvar). Контекст открывает QueryStatsMiddleware, а в тестах -
+track_queries().
+
+В отладочном режиме (QUERY_DEBUG) дополнительно запоминается текст
+каждого statement'а, чтобы находить повторяющиеся запросы (N+1).
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+import os
+
+from sqlalchemy import event
+
+# Отладочный режим: по умолчанию совпадает с DEBUG
+QUERY_DEBUG = os.getenv("QUERY_DEBUG", os.getenv("DEBUG", "False")).lower() in ("true", "1", "t")
+
+# Сколько одинаковых statement'ов за запрос считаем признаком N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 3))
+
+_current_stats = ContextVar("query_stats", default=None)
+
+class QueryStats:
+    """Счетчики SQL запросов одного HTTP запроса"""
+    __slots__ = ("count", "total_time", "statements", "scope")
+
+    def __init__(self, track_statements=False, scope=None):
+        # ASGI scope запроса - для определения маршрута в логах
+        self.scope = scope
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = Counter() if track_statements else None
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.total_time += elapsed
+        if self.statements is not None:
+            self.statements[statement] += 1
+
+    def duplicates(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Statement'ы, повторенные не менее threshold раз"""
+        if self.statements is None:
+            return {}
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+def current_stats():
+    """QueryStats текущего запроса или None вне запроса"""
+    return _current_stats.get()
+
+@contextmanager
+def track_queries(track_statements=QUERY_DEBUG, scope=None):
+    """Открывает контекст учета запросов и отдает QueryStats"""
+    stats = QueryStats(track_statements, scope)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    start = getattr(context, "_query_start", None)
+    if stats is None or start is None:
+        return
+    stats.record(statement, perf_counter() - start)
+
+def install_query_hooks(engine):
+    """Подключает учет запросов к движку (повторный вызов безопасен)"""
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
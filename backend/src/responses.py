@@ -0,0 +1,50 @@
+# src/responses.py
+"""
+Быстрый JSON ответ на orjson.
+
+orjson сам сериализует datetime/date/UUID; Decimal (денежные суммы)
+отдаем числом, как и раньше. Если orjson не установлен, используется
+стандартный json с тем же поведением.
+
+Обработчики, возвращающие большие списки, отдают FastJSONResponse
+напрямую: так FastAPI не прогоняет данные через jsonable_encoder.
+"""
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+def _default(obj):
+    """Типы, которые orjson/json не сериализуют сами"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(content):
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
+else:
+    def dumps(content):
+        return json.dumps(
+            content, default=_default, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON ответ с нативной сериализацией Decimal, datetime и UUID"""
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
@@ -2,14 +2,33 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
+from uuid import UUID
 
 class OrderItemCreate(BaseModel):
     dish_id: str
     quantity: int
 
+class QueuedOrderItemCreate(OrderItemCreate):
+    """Позиция из очереди кассы: цена и название на момент пробития"""
+    price: Optional[Decimal] = None
+    dish_name: Optional[str] = None
+
 class OrderCreate(BaseModel):
     items: List[OrderItemCreate]
 
+class QueuedOrderCreate(BaseModel):
+    """
+    Заказ из локальной очереди кассы: id, время пробития и версию меню,
+    по которой пробит чек, задает касса
+    """
+    order_id: UUID
+    order_date: Optional[datetime] = None
+    menu_version: Optional[int] = None
+    items: List[QueuedOrderItemCreate]
+
+class OrderBatchCreate(BaseModel):
+    orders: List[QueuedOrderCreate]
+
 class OrderItemResponse(BaseModel):
     dish_name: str
     quantity: int
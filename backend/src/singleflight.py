@@ -0,0 +1,100 @@
+# src/singleflight.py
+"""
+Single-flight: объединение одинаковых параллельных GET запросов.
+
+В начале обеда десятки касс одновременно запрашивают /api/cashier/menu
+и /api/cashier/orders/today. Первый запрос (лидер) выполняется как
+обычно, а такие же запросы, пришедшие, пока он выполняется, ждут его
+ответ и получают копию с заголовком X-Coalesced: 1 - без обращения к БД.
+Копируются только успешные ответы (2xx и 304): если лидер упал или
+ответил ошибкой, ожидающие выполняют запрос сами.
+
+Запросы считаются одинаковыми, если совпадают путь, параметры (порядок
+не важен), выбранное сжатие и If-None-Match. Объединяются только
+маршруты чтения из COALESCE_PATHS; запросы с профилированием
+выполняются отдельно.
+
+Ответ, пришедший вместе с лидером, может не содержать запись,
+завершившуюся, пока лидер выполнялся, - как если бы запрос пришел
+на мгновение раньше.
+"""
+from urllib.parse import parse_qsl
+import asyncio
+import os
+
+from starlette.datastructures import Headers
+
+from . import metrics
+from .middleware import _accepted_encoding
+
+SINGLE_FLIGHT = os.getenv("SINGLE_FLIGHT", "True").lower() in ("true", "1", "t")
+
+# Ответы больше порога (байт) не копируются ожидающим - они выполняются сами
+COALESCE_MAX_BODY = int(os.getenv("COALESCE_MAX_BODY", 8 * 1024 * 1024))
+
+# Маршруты только для чтения, ответ которых зависит лишь от пути и параметров
+COALESCE_PATHS = (
+    "/api/cashier/menu",
+    "/api/cashier/orders/today",
+    "/api/admin/dishes",
+    "/api/admin/categories",
+    "/api/admin/orders/by-date",
+    "/api/reports/",
+)
+
+HTTP_COALESCED = metrics.REGISTRY.counter(
+    "http_coalesced_requests_total", "Запросы, получившие ответ другого такого же запроса",
+    ("route",)
+)
+
+def request_key(scope):
+    """Ключ объединения запроса или None, если запрос выполняется отдельно"""
+    if scope["method"] != "GET" or not scope["path"].startswith(COALESCE_PATHS):
+        return None
+
+    params = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+    if ("profile", "1") in params:
+        return None
+
+    headers = Headers(scope=scope)
+    if "x-profile" in headers:
+        return None
+
+    return (
+        scope["path"],
+        tuple(sorted(params)),
+        _accepted_encoding(headers.get("accept-encoding", "")),
+        headers.get("if-none-match"),
+    )
+
+class SingleFlight:
+    """Выполняющиеся вызовы по ключам"""
+
+    def __init__(self):
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, fn):
+        """
+        Результат fn() для ключа; вызовы с тем же ключом во время
+        выполнения ждут этот же результат.
+
+        Возвращает (результат, shared). Если первый вызов завершился
+        исключением, ожидающие получают None и выполняют работу сами.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            # shield: отмена ожидающего не отменяет общий результат
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        result = None
+        try:
+            result = await fn()
+            return result, False
+        finally:
+            del self._calls[key]
+            future.set_result(result)
@@ -0,0 +1,123 @@
+# src/slow_queries.py
+"""
+Журнал медленных SQL запросов.
+
+Любой statement дольше SLOW_QUERY_MS миллисекунд попадает в журнал
+вместе с параметрами, маршрутом, который его выполнил, и (для SQLite)
+выводом EXPLAIN QUERY PLAN. Записи пишутся JSON-строками в ротируемый
+файл instance/logs/slow_queries.log и хранятся в памяти для
+/api/admin/diagnostics/slow-queries.
+"""
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from time import perf_counter
+import json
+import logging
+import os
+
+from sqlalchemy import event
+
+from . import metrics
+from .database import DB_DIR
+from .query_stats import current_stats
+
+# Порог медленного запроса (мс); отрицательное значение отключает журнал
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", os.path.join(DB_DIR, "logs", "slow_queries.log"))
+SLOW_QUERY_LOG_BYTES = int(os.getenv("SLOW_QUERY_LOG_BYTES", 5 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", 5))
+
+# Последние записи для эндпоинта диагностики
+RECENT_LIMIT = 200
+_recent = deque(maxlen=RECENT_LIMIT)
+
+SLOW_QUERIES = metrics.REGISTRY.counter(
+    "db_slow_queries_total", "Медленные SQL запросы", ("route",)
+)
+
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+_logger = None
+
+def _get_logger():
+    """Логгер с ротацией файла (создается при первой медленной записи)"""
+    global _logger
+    if _logger is None:
+        logger = logging.getLogger("canteen.slow_queries")
+        logger.propagate = False
+        try:
+            os.makedirs(os.path.dirname(SLOW_QUERY_LOG), exist_ok=True)
+            handler = RotatingFileHandler(
+                SLOW_QUERY_LOG,
+                maxBytes=SLOW_QUERY_LOG_BYTES,
+                backupCount=SLOW_QUERY_LOG_BACKUPS,
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        except OSError:
+            # Нет прав на запись - остается только журнал в памяти
+            logger.addHandler(logging.NullHandler())
+        logger.setLevel(logging.INFO)
+        _logger = logger
+    return _logger
+
+def _explain(cursor, statement, parameters):
+    """EXPLAIN QUERY PLAN на том же соединении (только SQLite и чтение/изменение)"""
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [row[-1] for row in explain_cursor.fetchall()]
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        return [f"EXPLAIN недоступен: {e}"]
+
+def _route():
+    stats = current_stats()
+    if stats is None or stats.scope is None:
+        return "<background>"
+    from .middleware import route_label
+    return f"{stats.scope['method']} {route_label(stats.scope)}"
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    elapsed_ms = (perf_counter() - start) * 1000
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+
+    route = _route()
+    plan = None
+    if conn.dialect.name == "sqlite" and not executemany:
+        plan = _explain(cursor, statement, parameters)
+
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+        "duration_ms": round(elapsed_ms, 3),
+        "route": route,
+        "statement": " ".join(statement.split()),
+        "parameters": repr(parameters)[:500],
+        "executemany": executemany,
+        "plan": plan
+    }
+    _recent.append(entry)
+    SLOW_QUERIES.inc(route)
+    _get_logger().info(json.dumps(entry, ensure_ascii=False))
+
+def install_slow_query_log(engine):
+    """Подключает журнал медленных запросов к движку (после install_query_hooks)"""
+    if SLOW_QUERY_MS < 0:
+        return
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def recent_slow_queries(limit=50):
+    """Последние медленные запросы, новые первыми"""
+    return list(reversed(_recent))[:limit]
@@ -0,0 +1,253 @@
+# src/static_assets.py
+"""
+Сборка и раздача статики фронтенда.
+
+build_assets() копирует frontend/ в каталог сборки (frontend/dist):
+- CSS, JS, шрифты и картинки получают хеш содержимого в имени
+  (bootstrap.min.css -> bootstrap.min.3f2a9c0d1e4b.css), кроме
+  service worker'а (STABLE_NAMES);
+- ссылки в HTML (/static/...) и в CSS (url(...)) переписываются
+  на новые имена;
+- текстовые файлы дополнительно сжимаются в .gz и .br (если установлен
+  пакет brotli);
+- в manifest.json записываются соответствие имен и сжатые варианты.
+
+FrontendFiles раздает результат: файлы с хешем кэшируются браузером
+на год (immutable), HTML - с no-cache и ETag, то есть перепроверяется
+дешевым запросом с ответом 304.
+"""
+from mimetypes import guess_type
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from .middleware import brotli, parse_accept_encoding
+
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Что имеет смысл сжимать заранее (woff2, png и т.п. уже сжаты)
+PRECOMPRESS_EXTENSIONS = (".html", ".css", ".js", ".json", ".svg", ".txt", ".map")
+
+# Файлы, имя которых должно оставаться прежним: URL service worker'а
+# не может меняться, иначе браузер считает его новым воркером
+STABLE_NAMES = ("sw.js",)
+
+# Расширение сжатого файла для каждого кодирования, в порядке предпочтения
+ENCODING_EXTENSIONS = (("br", ".br"), ("gzip", ".gz"))
+
+_FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{%d}\.[A-Za-z0-9]+$" % HASH_LENGTH)
+_HTML_REF_RE = re.compile(r"""((?:href|src)=["'])/static/([^"'?#]+)""")
+_CSS_URL_RE = re.compile(r"""url\(\s*(["']?)([^"')?#]+)([?#][^"')]*)?\1\s*\)""")
+
+def is_fingerprinted(path):
+    """Имя файла содержит хеш содержимого"""
+    return bool(_FINGERPRINT_RE.search(path))
+
+def _fingerprint(rel_path, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    root, ext = posixpath.splitext(rel_path)
+    return f"{root}.{digest}{ext}"
+
+def _is_build_dir(path, output):
+    """Каталог сборки: текущий output или любой с манифестом прошлой сборки"""
+    return (
+        os.path.realpath(path) == output
+        or os.path.exists(os.path.join(path, MANIFEST_NAME))
+    )
+
+def _collect(source, output):
+    """Относительные пути (через /) всех файлов фронтенда, кроме каталогов сборки"""
+    output = os.path.realpath(output)
+    files = []
+    for dirpath, dirnames, filenames in os.walk(source):
+        dirnames[:] = [
+            d for d in dirnames
+            if not d.startswith(".") and not _is_build_dir(os.path.join(dirpath, d), output)
+        ]
+        for filename in filenames:
+            if filename.startswith("."):
+                continue
+            rel_path = os.path.relpath(os.path.join(dirpath, filename), source)
+            files.append(rel_path.replace(os.sep, "/"))
+    return sorted(files)
+
+def _rewrite_css(rel_path, text, assets):
+    """url(...) в CSS -> имена с хешем (относительно самого CSS файла)"""
+    base = posixpath.dirname(rel_path)
+
+    def replace(match):
+        quote, ref, _ = match.groups()
+        if ref.startswith(("data:", "http:", "https:", "//", "/")):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(base, ref))
+        if target not in assets:
+            return match.group(0)
+        # Хеш в имени заменяет ?v=... для сброса кэша
+        return f"url({quote}{posixpath.relpath(assets[target], base or '.')}{quote})"
+
+    return _CSS_URL_RE.sub(replace, text)
+
+def _rewrite_html(text, assets):
+    """/static/... в HTML -> имена с хешем"""
+    def replace(match):
+        prefix, ref = match.groups()
+        return f"{prefix}/static/{assets.get(ref, ref)}"
+
+    return _HTML_REF_RE.sub(replace, text)
+
+def _write(output, rel_path, content):
+    path = os.path.join(output, *rel_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+def _precompress(path, content):
+    """Сжатые варианты файла (только если они меньше оригинала)"""
+    encodings = []
+    variants = [("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ("br", ".br", lambda data: brotli.compress(data, quality=11)))
+
+    for encoding, ext, compress in variants:
+        compressed = compress(content)
+        if len(compressed) < len(content):
+            with open(path + ext, "wb") as f:
+                f.write(compressed)
+            encodings.append(encoding)
+    return encodings
+
+def build_assets(source, output, precompress=True):
+    """
+    Сборка статики из source в output (каталог пересоздается).
+
+    Возвращает манифест: {"assets": {исходное имя: имя с хешем},
+    "precompressed": {имя файла: [кодирования]}}.
+    """
+    files = _collect(source, output)
+    if os.path.exists(output):
+        shutil.rmtree(output)
+    os.makedirs(output)
+
+    def read(rel_path):
+        with open(os.path.join(source, *rel_path.split("/")), "rb") as f:
+            return f.read()
+
+    pages = [f for f in files if f.endswith(".html")]
+    styles = [f for f in files if f.endswith(".css")]
+    others = [f for f in files if f not in pages and f not in styles]
+
+    assets = {}
+    written = {}
+
+    # Сначала файлы, на которые ссылаются CSS (шрифты, картинки), потом сами CSS
+    for rel_path in others:
+        content = read(rel_path)
+        if rel_path in STABLE_NAMES:
+            written[rel_path] = content
+            continue
+        assets[rel_path] = _fingerprint(rel_path, content)
+        written[assets[rel_path]] = content
+
+    for rel_path in styles:
+        content = _rewrite_css(rel_path, read(rel_path).decode("utf-8"), assets).encode("utf-8")
+        assets[rel_path] = _fingerprint(rel_path, content)
+        written[assets[rel_path]] = content
+
+    # HTML остается под прежним именем и всегда перепроверяется браузером
+    for rel_path in pages:
+        written[rel_path] = _rewrite_html(read(rel_path).decode("utf-8"), assets).encode("utf-8")
+
+    precompressed = {}
+    for rel_path, content in written.items():
+        path = _write(output, rel_path, content)
+        if precompress and rel_path.endswith(PRECOMPRESS_EXTENSIONS):
+            encodings = _precompress(path, content)
+            if encodings:
+                precompressed[rel_path] = encodings
+
+    manifest = {"assets": assets, "precompressed": precompressed}
+    with open(os.path.join(output, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return manifest
+
+def load_manifest(directory):
+    """Манифест сборки или None, если каталог не собран build_assets()"""
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def is_stale(source, output):
+    """Исходники в source изменены после сборки output (или сборки нет)"""
+    try:
+        built = os.path.getmtime(os.path.join(output, MANIFEST_NAME))
+    except OSError:
+        return True
+    return any(
+        os.path.getmtime(os.path.join(source, *rel_path.split("/"))) > built
+        for rel_path in _collect(source, output)
+    )
+
+class FrontendFiles(StaticFiles):
+    """
+    StaticFiles с политикой кэширования и заранее сжатыми файлами.
+
+    Файлы с хешем в имени отдаются с Cache-Control immutable на год,
+    остальные (HTML) - с no-cache. Если клиент принимает br/gzip и рядом
+    лежит .br/.gz, отдается сжатый файл с Content-Encoding.
+    """
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.root = os.path.realpath(directory)
+        manifest = load_manifest(directory) or {}
+        self.precompressed = manifest.get("precompressed", {})
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        rel_path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE if is_fingerprinted(rel_path) else REVALIDATE_CACHE
+        }
+        media_type = guess_type(full_path)[0] or "text/plain"
+        request_headers = Headers(scope=scope)
+
+        encodings = self.precompressed.get(rel_path)
+        if encodings:
+            headers["Vary"] = "Accept-Encoding"
+            accepted = parse_accept_encoding(request_headers.get("accept-encoding", ""))
+            for encoding, ext in ENCODING_EXTENSIONS:
+                if encoding in encodings and accepted.get(encoding, 0) > 0:
+                    full_path += ext
+                    stat_result = os.stat(full_path)
+                    headers["Content-Encoding"] = encoding
+                    break
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            method=scope["method"],
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    async def page(self, request, path):
+        """HTML страница с теми же заголовками кэширования (для / и /admin)"""
+        return await self.get_response(path, request.scope)
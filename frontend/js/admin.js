@@ -150,14 +150,40 @@ async function deleteCategory(categoryId, categoryName) {
 
 // ========== БЛЮДА ==========
 
-// Загрузка блюд
+// Блюд на странице результатов поиска
+const DISH_SEARCH_LIMIT = 50;
+let dishSearchTimer = null;
+
+// Поиск по мере ввода (с паузой, чтобы не слать запрос на каждую букву)
+function searchDishes() {
+    clearTimeout(dishSearchTimer);
+    dishSearchTimer = setTimeout(loadDishes, 250);
+}
+
+// Загрузка блюд: все или найденные по строке поиска
 async function loadDishes() {
     try {
-        const response = await fetch('/api/admin/dishes');
+        const query = document.getElementById('dish-search').value.trim();
+        const url = query
+            ? `/api/admin/dishes/search?q=${encodeURIComponent(query)}&limit=${DISH_SEARCH_LIMIT}`
+            : '/api/admin/dishes';
+        const response = await fetch(url);
         if (!response.ok) throw new Error('Ошибка загрузки блюд');
         
-        dishes = await response.json();
+        const data = await response.json();
+        // Ответ мог устареть, пока печатали дальше
+        if (query !== document.getElementById('dish-search').value.trim()) return;
+        dishes = query ? data.items : data;
         displayDishes();
+        if (query && data.total > data.items.length) {
+            document.getElementById('dishes-table').insertAdjacentHTML('beforeend', `
+                <tr>
+                    <td colspan="4" class="text-center text-muted">
+                        Показаны первые ${data.items.length} из ${data.total} - уточните запрос
+                    </td>
+                </tr>
+            `);
+        }
         
         // Обновляем список категорий в модальном окне
         updateCategorySelect();
@@ -182,7 +208,7 @@ function displayDishes() {
         tableBody.innerHTML = `
             <tr>
                 <td colspan="4" class="text-center text-muted">
-                    <i class="bi bi-info-circle"></i> Блюда не добавлены
+                    <i class="bi bi-info-circle"></i> ${document.getElementById('dish-search').value.trim() ? 'Ничего не найдено' : 'Блюда не добавлены'}
                 </td>
             </tr>
         `;
@@ -368,6 +394,13 @@ async function loadOrders() {
         const orders = await response.json();
         displayOrders(orders);
         
+        // Детали всех заказов периода - одним запросом заранее, чтобы
+        // просмотр заказов не ходил на сервер по одному
+        if (orders.length > 0 && orders.length <= ORDER_DETAILS_PREFETCH_LIMIT) {
+            fetchOrderDetails(orders.map(order => order.order_id))
+                .catch(error => console.warn('Не удалось загрузить детали заказов:', error));
+        }
+        
     } catch (error) {
         console.error('Ошибка:', error);
         document.getElementById('orders-table').innerHTML = `
@@ -478,13 +511,33 @@ function displayOrders(orders) {
     tableBody.innerHTML = html;
 }
 
+// Детали заказов: пакетная загрузка через /api/cashier/orders/details
+const ORDER_DETAILS_BATCH_SIZE = 200;  // MAX_BATCH_ORDERS на сервере
+const ORDER_DETAILS_PREFETCH_LIMIT = 1000;
+const orderDetailsCache = new Map();
+
+async function fetchOrderDetails(orderIds) {
+    const missing = orderIds.filter(id => !orderDetailsCache.has(id));
+    
+    for (let i = 0; i < missing.length; i += ORDER_DETAILS_BATCH_SIZE) {
+        const params = new URLSearchParams();
+        missing.slice(i, i + ORDER_DETAILS_BATCH_SIZE).forEach(id => params.append('ids', id));
+        
+        const response = await fetch(`/api/cashier/orders/details?${params}`);
+        if (!response.ok) throw new Error('Ошибка загрузки деталей');
+        
+        const data = await response.json();
+        data.orders.forEach(order => orderDetailsCache.set(order.order_id, order));
+    }
+    
+    return orderIds.map(id => orderDetailsCache.get(id)).filter(Boolean);
+}
+
 // Просмотр деталей заказа
 async function viewOrderDetails(orderId) {
     try {
-        const response = await fetch(`/api/cashier/orders/${orderId}`);
-        if (!response.ok) throw new Error('Ошибка загрузки деталей');
-        
-        const order = await response.json();
+        const [order] = await fetchOrderDetails([orderId]);
+        if (!order) throw new Error('Заказ не найден');
         
         let itemsHtml = '';
         order.items.forEach(item => {
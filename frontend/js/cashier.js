@@ -2,26 +2,84 @@
 let currentOrder = [];
 let menuData = {};
 
+// Копия меню: синхронизируется дельтами /api/cashier/menu?since=.
+// Service worker (sw.js) отвечает на эти запросы из IndexedDB без ожидания
+// сети и сам обновляет копию в фоне
+const MENU_SYNC_INTERVAL = 60000;
+let menuState = OfflineStore.emptyMenu();
+
+// Очередь заказов: заказ сначала пишется в IndexedDB, затем уходит на
+// сервер пакетом. Заказы, пробитые за ORDER_FLUSH_DELAY, отправляются одним запросом
+const ORDER_FLUSH_DELAY = 1000;
+const ORDER_RETRY_INTERVAL = 15000;
+let flushTimer = null;
+
 // Загрузка страницы
 document.addEventListener('DOMContentLoaded', function() {
+    registerServiceWorker();
     loadMenu();
     loadTodayOrders();
     
     // Обновляем кнопку каждые 30 секунд
     setInterval(loadTodayOrders, 30000);
+    // Меню - только изменения, поэтому опрашивать можно часто
+    setInterval(loadMenu, MENU_SYNC_INTERVAL);
+
+    // Заказы, оставшиеся в очереди с прошлого раза, и восстановление связи
+    scheduleFlush();
+    window.addEventListener('online', () => flushOrders());
 });
 
-// Загрузка меню
+// Регистрация service worker'а и сообщения от него
+function registerServiceWorker() {
+    if (!('serviceWorker' in navigator)) return;
+
+    // offline-store.js после сборки статики имеет хеш в имени - передаем путь воркеру
+    const storeScript = document.querySelector('script[src*="offline-store"]');
+    const storePath = new URL(storeScript.src).pathname;
+    navigator.serviceWorker.register(`/sw.js?store=${encodeURIComponent(storePath)}`)
+        .catch(error => console.warn('Service worker не зарегистрирован:', error));
+
+    navigator.serviceWorker.addEventListener('message', event => {
+        if (event.data.type === 'menu-updated') loadMenu();
+        if (event.data.type === 'orders-flushed') handleFlushResult(event.data);
+    });
+}
+
+// Группировка локальной копии по категориям для отображения
+function buildMenuData() {
+    const grouped = {};
+    Object.values(menuState.dishes)
+        .sort((a, b) => a.name.localeCompare(b.name, 'ru'))
+        .forEach(dish => {
+            const category = menuState.categories[dish.category_id] || 'Без категории';
+            (grouped[category] = grouped[category] || []).push(dish);
+        });
+    return Object.fromEntries(
+        Object.entries(grouped).sort(([a], [b]) => a.localeCompare(b, 'ru'))
+    );
+}
+
+// Загрузка меню: только изменения после версии на странице
 async function loadMenu() {
+    const hasLocalCopy = menuState.version > 0;
+
     try {
-        const response = await fetch('/api/cashier/menu');
+        const response = await fetch(`/api/cashier/menu?since=${menuState.version}`);
         if (!response.ok) throw new Error('Ошибка загрузки меню');
         
-        menuData = await response.json();
+        const changes = await response.json();
+        const changed = changes.full || changes.version !== menuState.version
+            || changes.dishes.length > 0 || changes.categories.length > 0;
+        if (!changed && hasLocalCopy) return;
+
+        menuState = OfflineStore.mergeMenuChanges(menuState, changes);
+        menuData = buildMenuData();
         displayMenu();
         
     } catch (error) {
         console.error('Ошибка:', error);
+        if (hasLocalCopy) return;  // остаемся на загруженной копии
         document.getElementById('menu').innerHTML = `
             <div class="alert alert-danger">
                 <i class="bi bi-exclamation-triangle"></i> Ошибка загрузки меню: ${error.message}
@@ -92,12 +150,14 @@ function addToOrder(dishId, name, price) {
     
     if (existingItem) {
         existingItem.quantity += 1;
-        existingItem.total = existingItem.quantity * price;
+        existingItem.total = existingItem.quantity * existingItem.price;
     } else {
         currentOrder.push({
             dishId: dishId,
             name: name,
             price: price,
+            // Версия меню, из которой взята цена (сервер сверяет по ней)
+            menuVersion: menuState.version,
             quantity: 1,
             total: price
         });
@@ -191,17 +251,46 @@ function clearOrder() {
     }
 }
 
-// Оформление заказа
+// Оформление заказа: запись в локальную очередь без ожидания сервера
 async function submitOrder() {
     if (currentOrder.length === 0) return;
     
-    const orderData = {
+    // Цена и название - снимок на момент пробития: столько платит покупатель
+    const order = {
+        order_id: newOrderId(),
+        order_date: new Date().toISOString(),
+        menu_version: Math.min(...currentOrder.map(item => item.menuVersion)),
         items: currentOrder.map(item => ({
             dish_id: item.dishId,
-            quantity: item.quantity
+            quantity: item.quantity,
+            price: item.price,
+            dish_name: item.name
         }))
     };
+    const total = currentOrder.reduce((sum, item) => sum + item.total, 0);
     
+    try {
+        await OfflineStore.queueOrder(order);
+    } catch (error) {
+        // IndexedDB недоступна (например, приватный режим) - отправляем сразу
+        console.warn('Очередь заказов недоступна:', error);
+        await sendOrderNow(order);
+        return;
+    }
+    
+    showNotification(`Заказ #${order.order_id.substring(0, 8)} оформлен! Сумма: ${total.toFixed(2)} ₽`, 'success');
+    
+    // Сбрасываем заказ
+    currentOrder = [];
+    updateOrderDisplay();
+    updateSubmitButton();
+    
+    updateOutboxStatus();
+    scheduleFlush();
+}
+
+// Отправка одного заказа с ожиданием ответа (без локальной очереди)
+async function sendOrderNow(order) {
     const submitButton = document.getElementById('submit-order');
     const originalText = submitButton.innerHTML;
     
@@ -213,12 +302,12 @@ async function submitOrder() {
     `;
     
     try {
-        const response = await fetch('/api/cashier/order', {
+        const response = await fetch('/api/cashier/orders/batch', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify(orderData)
+            body: JSON.stringify({ orders: [order] })
         });
         
         if (!response.ok) {
@@ -226,10 +315,10 @@ async function submitOrder() {
             throw new Error(errorData.detail || 'Ошибка сервера');
         }
         
-        const result = await response.json();
+        const [result] = (await response.json()).results;
+        if (result.status === 'rejected') throw new Error(result.detail);
         
-        // Показываем уведомление об успехе
-        showNotification(`Заказ #${result.order_id.substring(0, 8)} оформлен! Сумма: ${result.total_amount.toFixed(2)} ₽`, 'success');
+        showNotification(`Заказ #${order.order_id.substring(0, 8)} оформлен! Сумма: ${result.total_amount.toFixed(2)} ₽`, 'success');
         
         // Сбрасываем заказ
         currentOrder = [];
@@ -249,6 +338,108 @@ async function submitOrder() {
     }
 }
 
+// ID заказа задает касса: по нему сервер отличает повторную отправку
+function newOrderId() {
+    if (crypto.randomUUID) return crypto.randomUUID();
+    // crypto.randomUUID есть только в защищенном контексте (https, localhost)
+    const bytes = crypto.getRandomValues(new Uint8Array(16));
+    bytes[6] = (bytes[6] & 0x0f) | 0x40;
+    bytes[8] = (bytes[8] & 0x3f) | 0x80;
+    const hex = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
+function scheduleFlush(delay = ORDER_FLUSH_DELAY) {
+    if (flushTimer) return;
+    flushTimer = setTimeout(flushOrders, delay);
+}
+
+// Отправка очереди заказов; при ошибке сети - повтор позже
+async function flushOrders() {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+    try {
+        handleFlushResult(await OfflineStore.flushOrders());
+    } catch (error) {
+        console.warn('Заказы остались в очереди:', error);
+        requestBackgroundSync();
+        scheduleFlush(ORDER_RETRY_INTERVAL);
+    }
+    updateOutboxStatus();
+}
+
+function handleFlushResult(summary) {
+    summary.rejected.forEach(result => {
+        showNotification(`Заказ #${result.order_id.substring(0, 8)} не принят: ${result.detail}. Он сохранен в списке непринятых`, 'danger');
+    });
+    if (summary.sent > 0) loadTodayOrders();
+    updateOutboxStatus();
+}
+
+// Background Sync: воркер отправит очередь, когда появится сеть,
+// даже если страница будет закрыта
+async function requestBackgroundSync() {
+    if (!('serviceWorker' in navigator)) return;
+    try {
+        const registration = await navigator.serviceWorker.ready;
+        if (registration.sync) await registration.sync.register('orders');
+    } catch (error) {
+        console.warn('Background Sync недоступен:', error);
+    }
+}
+
+async function updateOutboxStatus() {
+    const status = document.getElementById('outbox-status');
+    let count = 0;
+    try {
+        count = await OfflineStore.pendingCount();
+    } catch (error) {
+        // Без IndexedDB очереди нет
+    }
+    status.classList.toggle('d-none', count === 0);
+    status.innerHTML = `<i class="bi bi-cloud-arrow-up"></i> Ожидают отправки: ${count}`;
+    renderRejectedOrders();
+}
+
+// Не принятые сервером заказы (в том числе отправленные воркером,
+// пока страница была закрыта) - до повторной отправки или решения
+async function renderRejectedOrders() {
+    const container = document.getElementById('rejected-orders');
+    let orders = [];
+    try {
+        orders = await OfflineStore.rejectedOrders();
+    } catch (error) {
+        // Без IndexedDB очереди нет
+    }
+    container.classList.toggle('d-none', orders.length === 0);
+    container.innerHTML = orders.map(order => {
+        const total = order.items.reduce((sum, item) => sum + (item.price || 0) * item.quantity, 0);
+        const items = order.items.map(item => `${item.dish_name || item.dish_id} × ${item.quantity}`).join(', ');
+        return `
+            <div class="alert alert-danger small p-2 mb-2">
+                <div><strong>Заказ #${order.order_id.substring(0, 8)}</strong> не принят: ${order.detail || ''}</div>
+                <div class="text-muted">${items} — ${total.toFixed(2)} ₽</div>
+                <div class="mt-1">
+                    <button class="btn btn-sm btn-outline-primary" onclick="retryRejectedOrder('${order.order_id}')">Отправить снова</button>
+                    <button class="btn btn-sm btn-outline-secondary" onclick="resolveRejectedOrder('${order.order_id}')">Решено</button>
+                </div>
+            </div>
+        `;
+    }).join('');
+}
+
+async function retryRejectedOrder(orderId) {
+    await OfflineStore.retryRejected(orderId);
+    updateOutboxStatus();
+    scheduleFlush();
+}
+
+async function resolveRejectedOrder(orderId) {
+    if (!confirm('Заказ не попадет в отчеты. Отметить как решенный?')) return;
+    await OfflineStore.resolveRejected(orderId);
+    updateOutboxStatus();
+}
+
 // Показать уведомление
 function showNotification(message, type = 'info') {
     const alert = document.createElement('div');
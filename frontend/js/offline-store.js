@@ -0,0 +1,189 @@
+// Локальное хранилище кассы в IndexedDB (общее для страницы и service worker'а)
+//   menu   - копия меню: { version, dishes: {id: блюдо}, categories: {id: название} }
+//   outbox - пробитые заказы, еще не отправленные на сервер
+//   rejected - заказы, которые сервер не принял (покупатель уже заплатил):
+//              лежат, пока кассир не отправит их повторно или не отметит решенными
+(function (scope) {
+    const DB_NAME = 'canteen';
+    const DB_VERSION = 2;
+    const MENU_KEY = 'snapshot';
+    // Заказов в одном POST /api/cashier/orders/batch (не больше MAX_BATCH_ORDERS на сервере)
+    const FLUSH_BATCH_SIZE = 50;
+
+    let dbPromise = null;
+
+    function openDb() {
+        if (!dbPromise) {
+            dbPromise = new Promise((resolve, reject) => {
+                const request = indexedDB.open(DB_NAME, DB_VERSION);
+                request.onupgradeneeded = event => {
+                    const db = request.result;
+                    if (event.oldVersion < 1) {
+                        db.createObjectStore('menu');
+                        db.createObjectStore('outbox', { keyPath: 'order_id' });
+                    }
+                    if (event.oldVersion < 2) {
+                        db.createObjectStore('rejected', { keyPath: 'order_id' });
+                    }
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => {
+                    dbPromise = null;
+                    reject(request.error);
+                };
+            });
+        }
+        return dbPromise;
+    }
+
+    // Одна транзакция: callback получает хранилище (или транзакцию для
+    // нескольких хранилищ) и возвращает запрос или значение
+    async function withStore(name, mode, callback) {
+        const db = await openDb();
+        return new Promise((resolve, reject) => {
+            const tx = db.transaction(name, mode);
+            const result = callback(Array.isArray(name) ? tx : tx.objectStore(name));
+            tx.oncomplete = () => resolve(result instanceof IDBRequest ? result.result : result);
+            tx.onerror = () => reject(tx.error);
+            tx.onabort = () => reject(tx.error);
+        });
+    }
+
+    function emptyMenu() {
+        return { version: 0, dishes: {}, categories: {} };
+    }
+
+    // Слияние изменений меню (?since=) в копию; повторное применение безопасно
+    function mergeMenuChanges(state, changes) {
+        if (changes.full) {
+            state = emptyMenu();
+        }
+        changes.categories.forEach(category => {
+            state.categories[category.category_id] = category.name;
+        });
+        changes.dishes.forEach(dish => {
+            state.dishes[dish.dish_id] = dish;
+        });
+        changes.deleted.categories.forEach(id => delete state.categories[id]);
+        changes.deleted.dishes.forEach(id => delete state.dishes[id]);
+        state.version = changes.version;
+        return state;
+    }
+
+    async function getMenu() {
+        return (await withStore('menu', 'readonly', store => store.get(MENU_KEY))) || null;
+    }
+
+    async function putMenu(state) {
+        await withStore('menu', 'readwrite', store => store.put(state, MENU_KEY));
+    }
+
+    async function queueOrder(order) {
+        await withStore('outbox', 'readwrite', store => store.put(order));
+    }
+
+    async function pendingOrders(limit) {
+        return withStore('outbox', 'readonly', store => store.getAll(null, limit));
+    }
+
+    async function pendingCount() {
+        return withStore('outbox', 'readonly', store => store.count());
+    }
+
+    // Результаты пакета одной транзакцией: созданные и дубли уходят из
+    // очереди, отклоненные переносятся в rejected вместе с причиной
+    async function settleOrders(orders, results) {
+        const byId = new Map(orders.map(order => [order.order_id, order]));
+        await withStore(['outbox', 'rejected'], 'readwrite', tx => {
+            const outbox = tx.objectStore('outbox');
+            const rejected = tx.objectStore('rejected');
+            results.forEach(result => {
+                if (result.status === 'rejected' && byId.has(result.order_id)) {
+                    rejected.put({
+                        ...byId.get(result.order_id),
+                        detail: result.detail,
+                        rejected_at: new Date().toISOString()
+                    });
+                    outbox.delete(result.order_id);
+                } else if (result.status === 'created' || result.status === 'duplicate') {
+                    outbox.delete(result.order_id);
+                }
+            });
+        });
+    }
+
+    async function rejectedOrders() {
+        return withStore('rejected', 'readonly', store => store.getAll());
+    }
+
+    // Повторная отправка (например, после исправления меню)
+    async function retryRejected(orderId) {
+        await withStore(['outbox', 'rejected'], 'readwrite', tx => {
+            const request = tx.objectStore('rejected').get(orderId);
+            request.onsuccess = () => {
+                if (!request.result) return;
+                const { detail, rejected_at, ...order } = request.result;
+                tx.objectStore('outbox').put(order);
+                tx.objectStore('rejected').delete(orderId);
+            };
+        });
+    }
+
+    // Кассир разобрался с заказом вручную
+    async function resolveRejected(orderId) {
+        await withStore('rejected', 'readwrite', store => store.delete(orderId));
+    }
+
+    // Отправка очереди пакетами. Возвращает { sent, rejected: [результаты] }.
+    // Сетевая ошибка оставляет заказы в очереди; повтор безопасен -
+    // сервер узнает уже созданные заказы по order_id.
+    let flushing = null;
+
+    function flushOrders() {
+        if (!flushing) {
+            flushing = doFlush().finally(() => { flushing = null; });
+        }
+        return flushing;
+    }
+
+    async function doFlush() {
+        const summary = { sent: 0, rejected: [] };
+        for (;;) {
+            const orders = await pendingOrders(FLUSH_BATCH_SIZE);
+            if (orders.length === 0) return summary;
+
+            const response = await fetch('/api/cashier/orders/batch', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ orders })
+            });
+            if (!response.ok) {
+                throw new Error(`Сервер не принял заказы: ${response.status}`);
+            }
+
+            const { results } = await response.json();
+            await settleOrders(orders, results);
+            results.forEach(result => {
+                if (result.status === 'rejected') {
+                    summary.rejected.push(result);
+                } else {
+                    summary.sent += 1;
+                }
+            });
+            if (orders.length < FLUSH_BATCH_SIZE) return summary;
+        }
+    }
+
+    scope.OfflineStore = {
+        emptyMenu,
+        mergeMenuChanges,
+        getMenu,
+        putMenu,
+        queueOrder,
+        pendingCount,
+        rejectedOrders,
+        retryRejected,
+        resolveRejected,
+        flushOrders
+    };
+})(self);
@@ -53,6 +53,7 @@ function displayDailyReport(report) {
         html += `
             <div class="mt-3">
                 <h6>Детали заказов:</h6>
+                ${report.items_rolled_up ? '<p class="small text-muted">Позиции заказов этого дня свернуты в итоги по блюдам, количество позиций не хранится</p>' : ''}
                 <div class="table-responsive">
                     <table class="table table-sm">
                         <thead>
@@ -69,7 +70,7 @@ function displayDailyReport(report) {
             html += `
                 <tr>
                     <td>${order.time || 'N/A'}</td>
-                    <td>${order.item_count}</td>
+                    <td>${order.item_count ?? '—'}</td>
                     <td class="fw-bold">${order.total.toFixed(2)} ₽</td>
                 </tr>
             `;
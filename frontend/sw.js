@@ -0,0 +1,111 @@
+// Service worker кассы (отдается по /sw.js, область - весь сайт)
+//
+// GET /api/cashier/menu?since=N отвечается из копии меню в IndexedDB
+// без ожидания сети; копия обновляется в фоне дельтой ?since=, и
+// открытые страницы получают сообщение 'menu-updated'.
+// Событие Background Sync 'orders' отправляет очередь заказов,
+// даже если страница кассы уже закрыта.
+
+// Путь к offline-store.js передается при регистрации: после сборки
+// статики у него хеш в имени (см. cashier.js)
+const STORE_URL = new URL(self.location).searchParams.get('store') || '/static/js/offline-store.js';
+importScripts(STORE_URL);
+
+// Не чаще одной фоновой проверки меню за этот интервал
+const MENU_REVALIDATE_INTERVAL = 10000;
+
+let lastRevalidate = 0;
+let revalidating = null;
+
+self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', event => event.waitUntil(self.clients.claim()));
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (event.request.method === 'GET' && url.origin === self.location.origin
+            && url.pathname === '/api/cashier/menu' && url.searchParams.has('since')) {
+        event.respondWith(menuResponse(event, Number(url.searchParams.get('since')) || 0));
+    }
+});
+
+self.addEventListener('sync', event => {
+    if (event.tag === 'orders') {
+        event.waitUntil(OfflineStore.flushOrders().then(notifyFlushed));
+    }
+});
+
+function jsonResponse(data) {
+    return new Response(JSON.stringify(data), {
+        headers: { 'Content-Type': 'application/json', 'X-Menu-Version': String(data.version) }
+    });
+}
+
+// Копия меню в формате ответа ?since=: пустая дельта, если у страницы
+// та же версия, иначе все меню с full=true
+function menuFromState(state, since) {
+    const deleted = { dishes: [], categories: [] };
+    if (since === state.version) {
+        return { version: state.version, full: false, categories: [], dishes: [], deleted };
+    }
+    return {
+        version: state.version,
+        full: true,
+        categories: Object.entries(state.categories)
+            .map(([category_id, name]) => ({ category_id, name })),
+        dishes: Object.values(state.dishes),
+        deleted
+    };
+}
+
+async function menuResponse(event, since) {
+    let state = null;
+    try {
+        state = await OfflineStore.getMenu();
+    } catch (error) {
+        console.warn('IndexedDB недоступна:', error);
+    }
+
+    if (!state || state.version === 0) {
+        // Копии еще нет: идем в сеть и сохраняем полное меню
+        const fresh = await revalidate(OfflineStore.emptyMenu());
+        return jsonResponse(menuFromState(fresh, since));
+    }
+
+    if (Date.now() - lastRevalidate > MENU_REVALIDATE_INTERVAL) {
+        event.waitUntil(revalidate(state).catch(error => console.warn('Меню не обновлено:', error)));
+    }
+    return jsonResponse(menuFromState(state, since));
+}
+
+// Дельта с сервера -> IndexedDB; страницы узнают об изменениях сообщением
+function revalidate(state) {
+    if (!revalidating) {
+        revalidating = (async () => {
+            lastRevalidate = Date.now();
+            const response = await fetch(`/api/cashier/menu?since=${state.version}`);
+            if (!response.ok) throw new Error(`Ошибка загрузки меню: ${response.status}`);
+
+            const changes = await response.json();
+            const changed = changes.full || changes.version !== state.version
+                || changes.dishes.length > 0 || changes.categories.length > 0;
+            if (!changed) return state;
+
+            const merged = OfflineStore.mergeMenuChanges(state, changes);
+            await OfflineStore.putMenu(merged);
+            if (state.version > 0) {
+                await notifyClients({ type: 'menu-updated', version: merged.version });
+            }
+            return merged;
+        })().finally(() => { revalidating = null; });
+    }
+    return revalidating;
+}
+
+async function notifyClients(message) {
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach(client => client.postMessage(message));
+}
+
+function notifyFlushed(summary) {
+    return notifyClients({ type: 'orders-flushed', ...summary });
+}
@@ -0,0 +1,125 @@
+# load_testing/benchmarks/conftest.py
+"""
+Фикстуры in-process бенчмарков.
+
+Приложение вызывается напрямую через httpx.ASGITransport - без uvicorn,
+сети и Locust. Для каждого размера датасета шаблонная БД генерируется
+один раз (кэшируется в test_databases/), а бенчмарки работают с ее копией.
+
+Размеры задаются переменной BENCH_SIZES (количество заказов), например:
+    BENCH_SIZES=1000,10000 pytest load_testing/benchmarks
+"""
+import asyncio
+import os
+import shutil
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "load_testing"))
+
+# Приложение не должно трогать рабочую БД
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import httpx
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from backend.src.main import app
+from backend.src.database import create_tables, get_db
+from backend.src.models import Dish, Order, current_menu_version
+from backend.src.query_stats import install_query_hooks
+from create_test_db import create_sized_database
+
+BENCH_SIZES = [
+    int(size) for size in os.getenv("BENCH_SIZES", "1000,10000,100000,1000000").split(",")
+]
+DATASET_DIR = os.getenv("BENCH_DATASET_DIR", os.path.join(ROOT, "test_databases"))
+
+def pytest_generate_tests(metafunc):
+    """Каждый бенчмарк прогоняется на всех размерах датасета"""
+    if "dataset_size" in metafunc.fixturenames:
+        metafunc.parametrize(
+            "dataset_size", BENCH_SIZES, scope="session", ids=lambda size: f"{size}_orders"
+        )
+
+class Dataset:
+    """Рабочая копия датасета определенного размера"""
+
+    def __init__(self, size, path):
+        self.size = size
+        self.path = path
+        self.engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False}
+        )
+        install_query_hooks(self.engine)
+        # Шаблон мог быть создан старой версией схемы
+        create_tables(bind=self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        with self.SessionLocal() as session:
+            self.dish_ids = session.scalars(select(Dish.dish_id).limit(3)).all()
+            self.menu_version = current_menu_version(session)
+            self.recent_order_ids = session.scalars(
+                select(Order.order_id).order_by(Order.order_date.desc()).limit(200)
+            ).all()
+
+@pytest.fixture(scope="session")
+def dataset(dataset_size, tmp_path_factory):
+    """Копия шаблонной БД нужного размера (шаблон строится один раз)"""
+    os.makedirs(DATASET_DIR, exist_ok=True)
+    template = os.path.join(DATASET_DIR, f"bench_{dataset_size}.db")
+    if not os.path.exists(template):
+        create_sized_database(template, dataset_size)
+
+    # Бенчмарк создания заказов пишет в БД - работаем с копией
+    path = str(tmp_path_factory.mktemp(f"bench_{dataset_size}") / "bench.db")
+    shutil.copy2(template, path)
+
+    data = Dataset(dataset_size, path)
+    yield data
+    data.engine.dispose()
+
+@pytest.fixture(scope="session")
+def run_async():
+    """Отдельный event loop для синхронного pytest-benchmark"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+@pytest.fixture(scope="session")
+def api(dataset, run_async):
+    """Синхронная обертка над httpx.AsyncClient с ASGITransport"""
+
+    def override_get_db():
+        db = dataset.SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+    def request(method, path, **kwargs):
+        response = run_async(client.request(method, path, **kwargs))
+        assert response.status_code < 400, (path, response.status_code, response.text[:200])
+        return response
+
+    async def burst(path, count, **kwargs):
+        responses = await asyncio.gather(*(client.get(path, **kwargs) for _ in range(count)))
+        for response in responses:
+            assert response.status_code < 400, (path, response.status_code, response.text[:200])
+        return responses
+
+    # Одновременные одинаковые GET запросы (как кассы в начале обеда)
+    request.burst = lambda path, count, **kwargs: run_async(burst(path, count, **kwargs))
+
+    yield request
+
+    run_async(client.aclose())
+    app.dependency_overrides.pop(get_db, None)
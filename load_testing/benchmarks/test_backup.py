@@ -0,0 +1,62 @@
+# load_testing/benchmarks/test_backup.py
+"""
+Резервная копия работающей базы (src/backup.py) в зависимости от ее размера.
+
+Кроме общего времени копии, в extra_info - размер файла, число шагов,
+перезапуски копирования из-за записей и самая долгая задержка записи
+во время копирования (между шагами backup API блокировка отпущена).
+"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import text
+
+from backend.src.backup import copy_database, database_path
+
+@pytest.mark.benchmark(group="backup")
+def test_backup(benchmark, dataset, tmp_path):
+    """Копия базы по BACKUP_PAGES_PER_STEP страниц за шаг"""
+    target = str(tmp_path / "backup.db")
+    stats = benchmark.pedantic(
+        copy_database, args=(database_path(dataset.engine), target), rounds=3, iterations=1
+    )
+    benchmark.extra_info["dataset_orders"] = dataset.size
+    benchmark.extra_info["db_bytes"] = stats["bytes"]
+    benchmark.extra_info["steps"] = stats["steps"]
+
+@pytest.mark.benchmark(group="backup_under_writes")
+def test_backup_under_writes(benchmark, dataset, tmp_path):
+    """Копия базы, пока другой поток пишет заказы; худшая задержка записи"""
+    target = str(tmp_path / "backup.db")
+    worst = []
+    with dataset.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS bench_writes (id INTEGER PRIMARY KEY, at REAL)"))
+
+    def copy_with_writer():
+        done = threading.Event()
+        delays = [0.0]
+
+        def writer():
+            # Отдельная таблица: данные остальных бенчмарков не меняются
+            while not done.is_set():
+                start = time.perf_counter()
+                with dataset.engine.begin() as conn:
+                    conn.execute(text("INSERT INTO bench_writes (at) VALUES (:at)"), {"at": time.time()})
+                delays.append(time.perf_counter() - start)
+                time.sleep(0.005)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            stats = copy_database(database_path(dataset.engine), target)
+        finally:
+            done.set()
+            thread.join()
+        worst.append(max(delays))
+        return stats
+
+    stats = benchmark.pedantic(copy_with_writer, rounds=3, iterations=1)
+    benchmark.extra_info["dataset_orders"] = dataset.size
+    benchmark.extra_info["restarts"] = stats["restarts"]
+    benchmark.extra_info["worst_write_ms"] = round(max(worst) * 1000, 1)
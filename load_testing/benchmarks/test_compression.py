@@ -0,0 +1,63 @@
+# load_testing/benchmarks/test_compression.py
+"""
+Сжатие больших JSON ответов: трафик и время до/после.
+
+Каждый листинг запрашивается без сжатия (identity), с gzip и с brotli
+(если установлен пакет brotli). В extra_info попадают байты, ушедшие
+в сеть (wire_bytes), и исходный размер JSON (response_bytes).
+
+Отдельный бенчмарк сравнивает уровни gzip на теле отчета за 30 дней,
+чтобы подобрать GZIP_LEVEL по соотношению размер/CPU.
+"""
+from datetime import date, timedelta
+import zlib
+
+import pytest
+
+from backend.src.middleware import brotli
+
+ENCODINGS = ["identity", "gzip", "br"]
+
+def _listings():
+    month = {
+        "start_date": (date.today() - timedelta(days=30)).isoformat(),
+        "end_date": date.today().isoformat(),
+    }
+    return {
+        "orders_by_date": ("/api/admin/orders/by-date", month),
+        "report_daily": ("/api/reports/daily", {}),
+        "menu": ("/api/cashier/menu", {}),
+    }
+
+@pytest.mark.parametrize("listing", list(_listings()))
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_listing_encoding(benchmark, api, dataset, listing, encoding):
+    """Листинг с заданным Accept-Encoding"""
+    if encoding == "br" and brotli is None:
+        pytest.skip("пакет brotli не установлен")
+    path, params = _listings()[listing]
+    benchmark.group = f"compression_{listing}"
+
+    response = benchmark(api, "GET", path, params=params, headers={"Accept-Encoding": encoding})
+
+    benchmark.extra_info["dataset_orders"] = dataset.size
+    benchmark.extra_info["content_encoding"] = response.headers.get("Content-Encoding", "identity")
+    benchmark.extra_info["response_bytes"] = len(response.content)
+    benchmark.extra_info["wire_bytes"] = response.num_bytes_downloaded
+
+@pytest.mark.parametrize("level", [1, 4, 6, 9])
+def test_gzip_level(benchmark, api, dataset, level):
+    """Стоимость gzip на теле листинга заказов за 30 дней"""
+    path, params = _listings()["orders_by_date"]
+    body = api("GET", path, params=params, headers={"Accept-Encoding": "identity"}).content
+    benchmark.group = "compression_gzip_level"
+
+    def compress():
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+
+    compressed = benchmark(compress)
+
+    benchmark.extra_info["dataset_orders"] = dataset.size
+    benchmark.extra_info["response_bytes"] = len(body)
+    benchmark.extra_info["wire_bytes"] = len(compressed)
@@ -0,0 +1,119 @@
+# load_testing/benchmarks/test_hot_endpoints.py
+"""
+Бенчмарки горячих эндпоинтов на датасетах разного размера.
+
+Запуск (результаты в JSON для сравнения прогонов):
+    python load_testing/run_benchmarks.py
+"""
+from datetime import date, timedelta
+import tracemalloc
+import uuid
+
+import pytest
+
+def _peak_alloc(api, method, path, **kwargs):
+    """Пиковый объем памяти, выделенной за один запрос (КиБ)"""
+    tracemalloc.start()
+    try:
+        api(method, path, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+def _bench(benchmark, api, dataset, method, path, **kwargs):
+    """Замер одного эндпоинта + количество SQL запросов и память в extra_info"""
+    response = benchmark(api, method, path, **kwargs)
+    benchmark.extra_info["dataset_orders"] = dataset.size
+    benchmark.extra_info["query_count"] = int(response.headers.get("X-Query-Count", -1))
+    benchmark.extra_info["response_bytes"] = len(response.content)
+    if method == "GET":
+        benchmark.extra_info["peak_alloc_kib"] = _peak_alloc(api, method, path, **kwargs)
+    return response
+
+@pytest.mark.benchmark(group="menu")
+def test_menu(benchmark, api, dataset):
+    """Меню кассира"""
+    _bench(benchmark, api, dataset, "GET", "/api/cashier/menu")
+
+@pytest.mark.benchmark(group="menu_burst")
+def test_menu_burst(benchmark, api, dataset):
+    """50 касс одновременно запрашивают меню (single-flight)"""
+    responses = benchmark(api.burst, "/api/cashier/menu", 50)
+    benchmark.extra_info["dataset_orders"] = dataset.size
+    benchmark.extra_info["coalesced"] = sum(1 for r in responses if "X-Coalesced" in r.headers)
+
+@pytest.mark.benchmark(group="menu_delta")
+def test_menu_delta(benchmark, api, dataset):
+    """Синхронизация меню кассы без изменений (?since=текущая версия)"""
+    _bench(benchmark, api, dataset, "GET", "/api/cashier/menu", params={"since": dataset.menu_version})
+
+@pytest.mark.benchmark(group="admin_dishes")
+def test_admin_dishes(benchmark, api, dataset):
+    """Список блюд в админке"""
+    _bench(benchmark, api, dataset, "GET", "/api/admin/dishes")
+
+@pytest.mark.benchmark(group="dish_search")
+def test_dish_search(benchmark, api, dataset):
+    """Поиск блюда по префиксу в админке (FTS5)"""
+    _bench(benchmark, api, dataset, "GET", "/api/admin/dishes/search", params={"q": "суп"})
+
+@pytest.mark.benchmark(group="create_order")
+def test_create_order(benchmark, api, dataset):
+    """Создание заказа (чек на 3 позиции)"""
+    payload = {"items": [{"dish_id": dish_id, "quantity": 1} for dish_id in dataset.dish_ids]}
+    _bench(benchmark, api, dataset, "POST", "/api/cashier/order", json=payload)
+
+@pytest.mark.benchmark(group="create_orders_batch")
+def test_create_orders_batch(benchmark, api, dataset):
+    """Очередь кассы: 50 заказов (чеки на 3 позиции) одним запросом"""
+    items = [{"dish_id": dish_id, "quantity": 1} for dish_id in dataset.dish_ids]
+
+    def send():
+        orders = [{"order_id": str(uuid.uuid4()), "items": items} for _ in range(50)]
+        return api("POST", "/api/cashier/orders/batch", json={"orders": orders})
+
+    response = benchmark(send)
+    benchmark.extra_info["dataset_orders"] = dataset.size
+    benchmark.extra_info["query_count"] = int(response.headers.get("X-Query-Count", -1))
+
+@pytest.mark.benchmark(group="orders_today")
+def test_orders_today(benchmark, api, dataset):
+    """Сегодняшние заказы"""
+    _bench(benchmark, api, dataset, "GET", "/api/cashier/orders/today")
+
+@pytest.mark.benchmark(group="order_details_batch")
+def test_order_details_batch(benchmark, api, dataset):
+    """Детали 200 последних заказов одним запросом"""
+    _bench(
+        benchmark, api, dataset, "GET", "/api/cashier/orders/details",
+        params={"ids": dataset.recent_order_ids}
+    )
+
+@pytest.mark.benchmark(group="orders_by_date")
+def test_orders_by_date(benchmark, api, dataset):
+    """Заказы за последнюю неделю"""
+    params = {
+        "start_date": (date.today() - timedelta(days=7)).isoformat(),
+        "end_date": date.today().isoformat(),
+    }
+    _bench(benchmark, api, dataset, "GET", "/api/admin/orders/by-date", params=params)
+
+@pytest.mark.benchmark(group="report_daily")
+def test_report_daily(benchmark, api, dataset):
+    """Отчет за день"""
+    _bench(benchmark, api, dataset, "GET", "/api/reports/daily")
+
+@pytest.mark.benchmark(group="report_by_category")
+def test_report_by_category(benchmark, api, dataset):
+    """Отчет по категориям за 30 дней"""
+    params = {
+        "start_date": (date.today() - timedelta(days=30)).isoformat(),
+        "end_date": date.today().isoformat(),
+    }
+    _bench(benchmark, api, dataset, "GET", "/api/reports/by-category", params=params)
+
+@pytest.mark.benchmark(group="report_popular_dishes")
+def test_report_popular_dishes(benchmark, api, dataset):
+    """Популярные блюда за все время"""
+    _bench(benchmark, api, dataset, "GET", "/api/reports/popular-dishes")
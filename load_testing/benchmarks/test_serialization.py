@@ -0,0 +1,64 @@
+# load_testing/benchmarks/test_serialization.py
+"""
+Сериализация листинга из 10 000 заказов.
+
+Сравнивает прежний путь (float()/isoformat() в обработчике +
+jsonable_encoder + стандартный JSONResponse) с FastJSONResponse,
+который сериализует Decimal и datetime сам.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+import uuid
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.src.responses import FastJSONResponse
+
+LISTING_SIZE = 10_000
+
+@pytest.fixture(scope="module")
+def rows():
+    """Строки заказов в том виде, в каком их отдает БД"""
+    start = datetime(2024, 1, 15, 12, 0)
+    return [
+        (str(uuid.uuid4()), start - timedelta(minutes=i), Decimal(f"{150 + i % 500}.50"), 1 + i % 5)
+        for i in range(LISTING_SIZE)
+    ]
+
+@pytest.mark.benchmark(group="serialization_10k_orders")
+def test_legacy_json(benchmark, rows):
+    """Поштучные float()/isoformat() + jsonable_encoder + json.dumps"""
+    def render():
+        result = [
+            {
+                "order_id": order_id,
+                "order_date": order_date.isoformat(),
+                "total_amount": float(total_amount),
+                "item_count": item_count
+            }
+            for order_id, order_date, total_amount, item_count in rows
+        ]
+        return JSONResponse(jsonable_encoder(result)).body
+
+    body = benchmark(render)
+    benchmark.extra_info["response_bytes"] = len(body)
+
+@pytest.mark.benchmark(group="serialization_10k_orders")
+def test_fast_json(benchmark, rows):
+    """Нативная сериализация FastJSONResponse"""
+    def render():
+        result = [
+            {
+                "order_id": order_id,
+                "order_date": order_date,
+                "total_amount": total_amount,
+                "item_count": item_count
+            }
+            for order_id, order_date, total_amount, item_count in rows
+        ]
+        return FastJSONResponse(result).body
+
+    body = benchmark(render)
+    benchmark.extra_info["response_bytes"] = len(body)
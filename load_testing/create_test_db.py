@@ -1,66 +1,180 @@
 # load_testing/create_test_db.py
+"""
+Генерация тестовых баз данных.
+
+Генератор детерминирован (seed) и пишет данные пачками через executemany
+в больших транзакциях, минуя ORM. Распределения приближены к реальной
+столовой:
+  - обеденный пик (12:00-14:00) и небольшой утренний поток;
+  - сезонность по дням недели (в выходные заказов меньше);
+  - популярность блюд по закону Ципфа (несколько хитов и длинный хвост).
+
+Примеры:
+    python load_testing/create_test_db.py                       # 10, 100, 1000, 10000
+    python load_testing/create_test_db.py --orders 1000000 --output test_databases/big.db
+"""
 import sys
 import os
 sys.path.insert(0, os.path.abspath('.'))
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from backend.src.database import Base
-from backend.src.models import Category, Dish, Order, OrderItem
+from backend.src.database import create_tables
+from backend.src.models import Category, Dish, Order, OrderItem, business_date
+from backend.src.models.order import BUSINESS_DAY_CUTOVER_HOUR, business_day_key, order_epoch_ms
+import argparse
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, time as dt_time, timedelta
+from itertools import accumulate
+import math
 import random
 import shutil
+import time
+
+DEFAULT_SEED = 42
+
+# Размер пачки заказов на один executemany
+BATCH_ORDERS = 50_000
+
+# Относительная загрузка по дням недели (пн..вс)
+WEEKDAY_WEIGHTS = [1.0, 1.05, 1.05, 1.0, 0.9, 0.35, 0.25]
+
+# Количество позиций в чеке (1..5) и количество одного блюда (1..3)
+ITEMS_PER_ORDER_WEIGHTS = [0.25, 0.35, 0.25, 0.10, 0.05]
+QUANTITY_WEIGHTS = [0.85, 0.12, 0.03]
+
+# Показатель распределения Ципфа для популярности блюд
+ZIPF_EXPONENT = 1.1
+
+CATEGORY_NAMES = [
+    "Супы", "Горячее", "Гарниры", "Салаты", "Выпечка", "Десерты", "Напитки", "Завтраки"
+]
+
+DISH_NAMES = [
+    "Борщ", "Щи", "Солянка", "Греческий салат", "Цезарь",
+    "Стейк", "Котлета по-киевски", "Плов", "Пельмени", "Пицца",
+    "Тирамису", "Чизкейк", "Мороженое", "Кофе", "Чай",
+    "Компот", "Морс", "Лимонад", "Пиво", "Вино"
+]
+
+def _fast_engine(db_path):
+    """Engine для генерации: без fsync и с журналом в памяти"""
+    engine = create_engine(f"sqlite:///{db_path}")
 
-def create_test_database(data_sizes=[10, 100, 1000, 10000]):
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA journal_mode = MEMORY")
+        cursor.close()
+
+    return engine
+
+def _new_db(db_path):
+    """Пересоздание файла БД со свежей схемой"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    engine = _fast_engine(db_path)
+    create_tables(bind=engine)
+    return engine
+
+def create_test_database(data_sizes=[10, 100, 1000, 10000], seed=DEFAULT_SEED):
     """Создание тестовых баз данных разных размеров"""
-    
+
     # Создаем папку для тестовых БД
     os.makedirs("test_databases", exist_ok=True)
-    
+
     for size in data_sizes:
         print(f"\n{'='*60}")
         print(f"Создание БД с {size} записями...")
         print(f"{'='*60}")
-        
-        # Создаем файл БД
+
+        # Создаем файл БД (старый удаляется)
         db_path = f"test_databases/test_{size}.db"
-        
-        # Удаляем старый файл если существует
-        if os.path.exists(db_path):
-            os.remove(db_path)
-        
-        # Создаем engine для новой БД
-        engine = create_engine(f"sqlite:///{db_path}")
-        
-        # Создаем таблицы
-        Base.metadata.create_all(bind=engine)
-        
-        # Создаем сессию
+        engine = _new_db(db_path)
+
+        # Создаем сессию и генерируем данные
         Session = sessionmaker(bind=engine)
         session = Session()
-        
-        # Генерируем данные
-        stats = generate_test_data(session, size)
-        
-        # Сохраняем (коммитим)
-        session.commit()
+        stats = generate_test_data(session, size, seed=seed)
         session.close()
-        
+        engine.dispose()
+
         print(f"✓ Создана БД: {db_path}")
         print(f"  - Категорий: {stats['categories']}")
         print(f"  - Блюд: {stats['dishes']}")
         print(f"  - Заказов: {stats['orders']}")
         print(f"  - Позиций заказов: {stats['order_items']}")
         print(f"  - Всего записей: {stats['total']}")
-        
+
         # Проверяем размер файла
         file_size = os.path.getsize(db_path) / 1024  # в КБ
         print(f"  - Размер файла: {file_size:.2f} KB")
 
-def generate_test_data(session, target_size):
-    """Генерация тестовых данных"""
-    
+def create_sized_database(db_path, num_orders, num_categories=8, num_dishes=60,
+                          seed=DEFAULT_SEED, end_date=None):
+    """Создание БД для бенчмарков: меню фиксированного размера и num_orders заказов"""
+    engine = _new_db(db_path)
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    started = time.perf_counter()
+    stats = generate_test_data(
+        session, num_orders,
+        num_categories=num_categories, num_dishes=num_dishes, num_orders=num_orders,
+        seed=seed, end_date=end_date
+    )
+    elapsed = time.perf_counter() - started
+    session.close()
+    engine.dispose()
+
+    print(f"✓ Создана БД {db_path}: {stats['orders']} заказов, "
+          f"{stats['order_items']} позиций за {elapsed:.1f} с")
+    return stats
+
+def _uuid_factory(rng):
+    """Детерминированные UUID4 из генератора случайных чисел"""
+    getrandbits = rng.getrandbits
+    return lambda: str(uuid.UUID(int=getrandbits(128), version=4))
+
+def _minute_cum_weights():
+    """Кумулятивные веса минут дня: работа 8:00-18:00, пик в обед"""
+    weights = []
+    for minute in range(24 * 60):
+        hour = minute / 60
+        if not 8 <= hour < 18:
+            weights.append(0.0)
+            continue
+        lunch = 10 * math.exp(-((hour - 13.0) ** 2) / (2 * 0.6 ** 2))
+        breakfast = 2 * math.exp(-((hour - 9.0) ** 2) / (2 * 0.5 ** 2))
+        weights.append(1 + lunch + breakfast)
+    return list(accumulate(weights))
+
+def _orders_per_day(rng, num_orders, days, end_date):
+    """Распределение количества заказов по дням с учетом дня недели"""
+    day_list = [end_date - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+    weights = [WEEKDAY_WEIGHTS[d.weekday()] * rng.uniform(0.9, 1.1) for d in day_list]
+    total_weight = sum(weights)
+
+    counts = [int(num_orders * w / total_weight) for w in weights]
+    # Остаток от округления раздаем дням пропорционально весам
+    for index in rng.choices(range(days), weights=weights, k=num_orders - sum(counts)):
+        counts[index] += 1
+    return list(zip(day_list, counts))
+
+def generate_test_data(session, target_size, num_categories=None, num_dishes=None,
+                       num_orders=None, seed=DEFAULT_SEED, days=365, end_date=None):
+    """Генерация тестовых данных
+
+    По умолчанию количество категорий, блюд и заказов считается от target_size;
+    их можно задать явно. При одинаковых seed и end_date результат одинаков.
+    """
+
+    rng = random.Random(seed)
+    new_id = _uuid_factory(rng)
+    end_date = end_date or business_date()
+    conn = session.connection()
+
     stats = {
         'categories': 0,
         'dishes': 0,
@@ -68,164 +182,203 @@ def generate_test_data(session, target_size):
         'order_items': 0,
         'total': 0
     }
-    
-    # 1. Создаем категории (10% от целевого размера, но не менее 2)
-    num_categories = max(2, target_size // 10)
+
+    # 1. Категории (10% от целевого размера, но не менее 2)
+    num_categories = num_categories or max(2, target_size // 10)
     categories = []
-    
     for i in range(num_categories):
-        category = Category(
-            category_id=str(uuid.uuid4()),
-            name=f"Категория {i+1}"
-        )
-        session.add(category)
-        categories.append(category)
-    
-    session.commit()
+        base_name = CATEGORY_NAMES[i % len(CATEGORY_NAMES)]
+        name = base_name if i < len(CATEGORY_NAMES) else f"{base_name} {i + 1}"
+        categories.append((new_id(), name))
+
+    conn.exec_driver_sql(
+        f"INSERT INTO {Category.__tablename__} (category_id, name) VALUES (?, ?)",
+        categories
+    )
     stats['categories'] = num_categories
-    
-    # 2. Создаем блюда (70% от целевого размера)
-    num_dishes = max(target_size * 7 // 10, num_categories * 2)
+
+    # 2. Блюда (70% от целевого размера)
+    num_dishes = num_dishes or max(target_size * 7 // 10, num_categories * 2)
     dishes = []
-    
-    dish_names = [
-        "Борщ", "Щи", "Солянка", "Греческий салат", "Цезарь",
-        "Стейк", "Котлета по-киевски", "Плов", "Пельмени", "Пицца",
-        "Тирамису", "Чизкейк", "Мороженое", "Кофе", "Чай",
-        "Компот", "Морс", "Лимонад", "Пиво", "Вино"
-    ]
-    
     for i in range(num_dishes):
-        dish = Dish(
-            dish_id=str(uuid.uuid4()),
-            name=f"{random.choice(dish_names)} {i+1}",
-            price=round(random.uniform(50, 500), 2),
-            category_id=random.choice(categories).category_id
-        )
-        session.add(dish)
-        dishes.append(dish)
-    
-    session.commit()
+        dishes.append((
+            new_id(),
+            categories[i % num_categories][0],
+            f"{rng.choice(DISH_NAMES)} {i + 1}",
+            round(rng.uniform(50, 500), 2)
+        ))
+
+    conn.exec_driver_sql(
+        f"INSERT INTO {Dish.__tablename__} (dish_id, category_id, name, price) VALUES (?, ?, ?, ?)",
+        dishes
+    )
     stats['dishes'] = num_dishes
-    
-    # 3. Создаем заказы (20% от целевого размера)
-    num_orders = max(target_size // 5, 10)
-    
-    customer_names = [
-        "Иван Иванов", "Петр Петров", "Анна Сидорова", "Мария Кузнецова",
-        "Алексей Смирнов", "Елена Попова", "Дмитрий Васильев", "Ольга Новикова",
-        "Сергей Федоров", "Наталья Морозова"
-    ]
-    
-    for i in range(num_orders):
-        # Случайная дата за последний год
-        days_ago = random.randint(0, 365)
-        order_date = datetime.utcnow() - timedelta(days=days_ago)
-        
-        order = Order(
-            order_id=str(uuid.uuid4()),
-            total_amount=0,  # Пока 0, посчитаем после добавления позиций
-            order_date=order_date
-        )
-        session.add(order)
-        session.flush()  # Получаем ID без коммита
-        
-        # 4. Добавляем позиции заказа (1-5 позиций)
-        num_items = random.randint(1, 5)
-        order_items = []
-        order_total = 0
-        
-        for _ in range(num_items):
-            dish = random.choice(dishes)
-            quantity = random.randint(1, 3)
-            item_total = dish.price * quantity
-            order_total += item_total
-            
-            order_item = OrderItem(
-                order_item_id=str(uuid.uuid4()),
-                order_id=order.order_id,
-                dish_id=dish.dish_id,
-                quantity=quantity,
-                item_total=item_total
-            )
-            session.add(order_item)
-            order_items.append(order_item)
-        
-        # Обновляем общую сумму заказа
-        order.total_amount = order_total
-        
-        stats['order_items'] += num_items
-    
+
+    # Популярность блюд: Ципф по случайной перестановке
+    ranking = list(range(num_dishes))
+    rng.shuffle(ranking)
+    dish_cum_weights = list(accumulate(
+        1 / (ranking[i] + 1) ** ZIPF_EXPONENT for i in range(num_dishes)
+    ))
+    dish_ids = [d[0] for d in dishes]
+    dish_names = [d[2] for d in dishes]
+    dish_prices = [d[3] for d in dishes]
+    dish_indexes = range(num_dishes)
+
+    # 3. Заказы (20% от целевого размера) и позиции
+    num_orders = num_orders or max(target_size // 5, 10)
+    minute_labels = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)]
+    minute_cum_weights = _minute_cum_weights()
+    minute_indexes = range(24 * 60)
+    item_count_cum = list(accumulate(ITEMS_PER_ORDER_WEIGHTS))
+    quantity_cum = list(accumulate(QUANTITY_WEIGHTS))
+
+    order_sql = (
+        f"INSERT INTO {Order.__tablename__} "
+        f"(order_id, order_date, total_amount, business_day, order_epoch_ms) VALUES (?, ?, ?, ?, ?)"
+    )
+    item_sql = (
+        f"INSERT INTO {OrderItem.__tablename__} "
+        f"(order_item_id, order_id, dish_id, quantity, item_total, dish_name, price_per_item) "
+        f"VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+
+    # Вторичные индексы дешевле построить один раз после загрузки
+    bulk_indexes = list(Order.__table__.indexes) + list(OrderItem.__table__.indexes)
+    for index in bulk_indexes:
+        index.drop(bind=conn, checkfirst=True)
+
+    order_rows = []
+    item_rows = []
+    choices = rng.choices
+    randrange = rng.randrange
+
+    def flush():
+        conn.exec_driver_sql(order_sql, order_rows)
+        conn.exec_driver_sql(item_sql, item_rows)
+        stats['orders'] += len(order_rows)
+        stats['order_items'] += len(item_rows)
+        order_rows.clear()
+        item_rows.clear()
+
+    for day, count in _orders_per_day(rng, num_orders, days, end_date):
+        if not count:
+            continue
+        day_prefix = day.isoformat()
+        # Производные колонки заказа (см. Order): до часа смены дня заказ
+        # относится к предыдущему рабочему дню; переход на летнее время
+        # внутри дня не учитывается
+        day_keys = (business_day_key(day - timedelta(days=1)), business_day_key(day))
+        cutover_minute = BUSINESS_DAY_CUTOVER_HOUR * 60
+        midnight_ms = order_epoch_ms(datetime.combine(day, dt_time.min))
+        minutes = sorted(choices(minute_indexes, cum_weights=minute_cum_weights, k=count))
+        item_counts = choices((1, 2, 3, 4, 5), cum_weights=item_count_cum, k=count)
+
+        for minute, n_items in zip(minutes, item_counts):
+            order_id = new_id()
+            order_total = 0.0
+            picked = choices(dish_indexes, cum_weights=dish_cum_weights, k=n_items)
+            quantities = choices((1, 2, 3), cum_weights=quantity_cum, k=n_items)
+            for dish_index, quantity in zip(picked, quantities):
+                item_total = round(dish_prices[dish_index] * quantity, 2)
+                order_total += item_total
+                item_rows.append((
+                    new_id(), order_id, dish_ids[dish_index], quantity, item_total,
+                    dish_names[dish_index], dish_prices[dish_index]
+                ))
+
+            second = randrange(60)
+            order_date = f"{day_prefix} {minute_labels[minute]}:{second:02d}.000000"
+            order_rows.append((
+                order_id, order_date, round(order_total, 2),
+                day_keys[minute >= cutover_minute], midnight_ms + (minute * 60 + second) * 1000
+            ))
+
+        if len(order_rows) >= BATCH_ORDERS:
+            flush()
+
+    flush()
+    for index in bulk_indexes:
+        index.create(bind=conn)
     session.commit()
-    stats['orders'] = num_orders
     stats['total'] = stats['categories'] + stats['dishes'] + stats['orders'] + stats['order_items']
-    
+
     return stats
 
-def create_in_memory_database(size):
+def create_in_memory_database(size, seed=DEFAULT_SEED):
     """Создание БД в памяти для быстрого тестирования"""
-    
+
     print(f"Создание in-memory БД с {size} записями...")
-    
+
     # Создаем engine для БД в памяти
     engine = create_engine("sqlite:///:memory:")
-    
+
     # Создаем таблицы
-    Base.metadata.create_all(bind=engine)
-    
+    create_tables(bind=engine)
+
     # Создаем сессию
     Session = sessionmaker(bind=engine)
     session = Session()
-    
+
     # Генерируем данные
-    stats = generate_test_data(session, size)
-    
-    session.commit()
-    
+    stats = generate_test_data(session, size, seed=seed)
+
     print(f"✓ Создана in-memory БД:")
     print(f"  - Категорий: {stats['categories']}")
     print(f"  - Блюд: {stats['dishes']}")
     print(f"  - Заказов: {stats['orders']}")
-    
+
     return engine, session
 
 def load_test_database_to_app(size, app_db_path="restaurant.db"):
     """Загрузка тестовой БД в приложение"""
-    
+
     print(f"\nЗагрузка БД с {size} записями в приложение...")
-    
+
     source_db = f"test_databases/test_{size}.db"
-    
+
     if not os.path.exists(source_db):
         print(f"❌ Файл {source_db} не найден")
         return False
-    
+
     # Копируем тестовую БД поверх основной
     shutil.copy2(source_db, app_db_path)
-    
+
     print(f"✓ БД загружена в {app_db_path}")
-    
+
     # Проверяем что данные загрузились
     engine = create_engine(f"sqlite:///{app_db_path}")
     Session = sessionmaker(bind=engine)
     session = Session()
-    
-    from backend.src.models import Category, Dish, Order
-    
+
     categories_count = session.query(Category).count()
     dishes_count = session.query(Dish).count()
     orders_count = session.query(Order).count()
-    
+
     print(f"  - Проверка: {categories_count} категорий, {dishes_count} блюд, {orders_count} заказов")
-    
+
     session.close()
-    
+
     return True
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Генерация тестовых БД")
+    parser.add_argument("--orders", type=int, help="Количество заказов (одна БД)")
+    parser.add_argument("--output", help="Путь к файлу БД для --orders")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed генератора")
+    parser.add_argument("--end-date", type=date.fromisoformat,
+                        help="Последний день данных (YYYY-MM-DD), по умолчанию сегодня")
+    args = parser.parse_args()
+
+    if args.orders:
+        os.makedirs("test_databases", exist_ok=True)
+        output = args.output or f"test_databases/orders_{args.orders}.db"
+        create_sized_database(output, args.orders, seed=args.seed, end_date=args.end_date)
+        return
+
     # Создаем все тестовые БД
-    create_test_database([10, 100, 1000, 10000])
-    
+    create_test_database([10, 100, 1000, 10000], seed=args.seed)
+
     print("\n" + "="*60)
     print("ИНСТРУКЦИЯ ПО ИСПОЛЬЗОВАНИЮ:")
     print("="*60)
@@ -234,10 +387,16 @@ if __name__ == "__main__":
     print("2. test_databases/test_100.db    - 100 записей")
     print("3. test_databases/test_1000.db   - 1000 записей")
     print("4. test_databases/test_10000.db  - 10000 записей")
-    
+
     print("\nКак использовать:")
     print("1. Загрузить БД в приложение:")
     print("   load_test_database_to_app(100)  # Для 100 записей")
-    
+
     print("\n2. Создать in-memory БД для тестов:")
     print("   engine, session = create_in_memory_database(1000)")
+
+    print("\n3. Создать большую БД (1 000 000 заказов):")
+    print("   python load_testing/create_test_db.py --orders 1000000")
+
+if __name__ == "__main__":
+    main()
@@ -1,136 +1,153 @@
 # load_testing/locustfile.py
-from locust import HttpUser, task, between, TaskSet
+"""
+Модель нагрузки столовой.
+
+Типы пользователей:
+  - TillUser      - касса: берет меню, пробивает чеки (POST /api/cashier/order),
+                    иногда смотрит детали только что пробитого чека;
+  - DashboardUser - экран на кухне/у администратора: опрашивает сегодняшние
+                    заказы и дневной отчет с постоянным периодом;
+  - ManagerUser   - менеджер: отчеты по категориям, популярные блюда,
+                    заказы за период, справочник блюд.
+
+Профиль обеденного пика (LunchPeakShape) включается переменной
+LUNCH_PROFILE=1; без нее работают обычные --users/--run-time.
+Параметры профиля: PEAK_USERS (по умолчанию 60), PROFILE_DURATION (сек, 300).
+"""
+from locust import HttpUser, LoadTestShape, task, between, constant_pacing
+import os
 import random
-import string
-import json
-from datetime import datetime, timedelta
-
-def generate_random_string(length=10):
-    """Генерация случайной строки"""
-    letters = string.ascii_letters
-    return ''.join(random.choice(letters) for i in range(length))
-
-def generate_random_phone():
-    """Генерация случайного номера телефона"""
-    return f"+7{random.randint(900, 999)}{random.randint(100, 999)}{random.randint(10, 99)}{random.randint(10, 99)}"
-
-class AdminTasks(TaskSet):
-    """Задачи администратора (CRUD операции)"""
-    
+from datetime import date, timedelta
+
+class TillUser(HttpUser):
+    """Касса: основной поток заказов"""
+    weight = 6
+    # Между чеками кассир собирает поднос покупателя
+    wait_time = between(3, 10)
+
     def on_start(self):
-        """Выполняется при старте каждого пользователя"""
-        # Получаем список категорий для использования в других запросах
-        self.categories = []
-        response = self.client.get("/static/admin.html")
-        if response.status_code == 200:
-            self.categories = response.json()
-    
-    @task(5)
-    def get_categories(self):
-        """Получение списка категорий (самый частый запрос)"""
-        self.client.get("/api/admin/categories")
-    
-    @task(5)
-    def get_dishes(self):
-        """Получение списка блюд"""
-        self.client.get("/api/admin/dishes")
-    
+        self.dishes = []
+        self.last_order_id = None
+        self.refresh_menu()
+
+    def refresh_menu(self):
+        with self.client.get("/api/cashier/menu", name="/api/cashier/menu",
+                             catch_response=True) as response:
+            if response.status_code != 200:
+                response.failure(f"menu: {response.status_code}")
+                return
+            menu = response.json()
+            self.dishes = [dish for items in menu.values() for dish in items]
+
+    @task(20)
+    def ring_up_receipt(self):
+        """Пробить чек на 1-5 позиций"""
+        if not self.dishes:
+            self.refresh_menu()
+            return
+
+        count = random.choices((1, 2, 3, 4, 5), weights=(25, 35, 25, 10, 5))[0]
+        items = [
+            {"dish_id": dish["dish_id"], "quantity": random.choices((1, 2, 3), weights=(85, 12, 3))[0]}
+            for dish in random.sample(self.dishes, min(count, len(self.dishes)))
+        ]
+        with self.client.post("/api/cashier/order", json={"items": items},
+                              name="/api/cashier/order", catch_response=True) as response:
+            if response.status_code == 200 and response.json().get("success"):
+                self.last_order_id = response.json()["order_id"]
+            else:
+                response.failure(f"order: {response.status_code}")
+
+    @task(3)
+    def reload_menu(self):
+        """Перезагрузка страницы кассы"""
+        self.refresh_menu()
+
+    @task(2)
+    def view_last_receipt(self):
+        """Просмотр/повторная печать последнего чека"""
+        if self.last_order_id:
+            self.client.get(f"/api/cashier/orders/{self.last_order_id}",
+                            name="/api/cashier/orders/{order_id}")
+
+    @task(1)
+    def today_orders(self):
+        """Список сегодняшних чеков на кассе"""
+        self.client.get("/api/cashier/orders/today", name="/api/cashier/orders/today")
+
+class DashboardUser(HttpUser):
+    """Экран с заказами дня: опрос раз в 10 секунд"""
+    weight = 1
+    wait_time = constant_pacing(10)
+
+    @task(3)
+    def poll_today_orders(self):
+        self.client.get("/api/cashier/orders/today", name="/api/cashier/orders/today")
+
+    @task(1)
+    def poll_daily_report(self):
+        self.client.get("/api/reports/daily", name="/api/reports/daily")
+
+class ManagerUser(HttpUser):
+    """Менеджер: отчеты и справочники"""
+    weight = 1
+    wait_time = between(10, 30)
+
+    @staticmethod
+    def _period(max_days):
+        end = date.today()
+        start = end - timedelta(days=random.choice([d for d in (1, 7, 30, 90, 365) if d <= max_days]))
+        return {"start_date": start.isoformat(), "end_date": end.isoformat()}
+
     @task(4)
-    def get_orders_by_date(self):
-        """Получение заказов по дате"""
-        # Генерируем случайные даты
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=random.randint(1, 30))
-        
-        params = {
-            "start_date": start_date.strftime("%Y-%m-%d"),
-            "end_date": end_date.strftime("%Y-%m-%d")
-        }
-        self.client.get("/api/admin/orders/by-date", params=params)
-    
-   
-    
+    def report_by_category(self):
+        self.client.get("/api/reports/by-category", params=self._period(90),
+                        name="/api/reports/by-category")
+
+    @task(3)
+    def orders_by_date(self):
+        self.client.get("/api/admin/orders/by-date", params=self._period(30),
+                        name="/api/admin/orders/by-date")
+
     @task(2)
-    def create_category(self):
-        """Создание новой категории"""
-        data = {"name": f"Категория {generate_random_string(5)}"}
-        self.client.post("/api/admin/categories", json=data)
-    
+    def popular_dishes(self):
+        self.client.get("/api/reports/popular-dishes", params={"limit": 10},
+                        name="/api/reports/popular-dishes")
+
     @task(2)
-    def create_dish(self):
-        """Создание нового блюда"""
-        if self.categories:
-            category = random.choice(self.categories)
-            data = {
-                "name": f"Блюдо {generate_random_string(6)}",
-                "price": round(random.uniform(50, 500), 2),
-                "category_id": category["category_id"]
-            }
-            self.client.post("/api/admin/dishes", json=data)
-    
+    def dishes(self):
+        self.client.get("/api/admin/dishes", name="/api/admin/dishes")
+
     @task(1)
-    def create_order(self):
-        """Создание нового заказа (самый редкий и сложный запрос)"""
-        # Сначала получаем список блюд
-        response = self.client.get("/api/admin/dishes")
-        if response.status_code == 200 and response.json():
-            dishes = response.json()
-            
-            # Выбираем 1-3 случайных блюда
-            selected_dishes = random.sample(dishes, min(3, len(dishes)))
-            
-            # Формируем позиции заказа
-            items = []
-            for dish in selected_dishes:
-                items.append({
-                    "dish_id": dish["dish_id"],
-                    "quantity": random.randint(1, 3)
-                })
-            
-            # Данные заказа
-            order_data = {
-                "customer_name": f"Клиент {generate_random_string(6)}",
-                "customer_phone": generate_random_phone(),
-                "items": items
-            }
-            
-            self.client.post("/api/cashier/orders/today", json=order_data)
-
-class PublicTasks(TaskSet):
-    """Задачи публичной части API (меню)"""
-    
-    @task(10)
-    def get_public_menu(self):
-        """Получение публичного меню (самый частый запрос)"""
-        self.client.get("/api/cashier/menu")
-    
-    @task(3)
-    def get_categories_public(self):
-        """Получение категорий для меню"""
-        self.client.get("/api/cashier/orders/today")
-    
-
-class WebsiteUser(HttpUser):
-    """
-    Виртуальный пользователь для нагрузочного тестирования.
-    
-    Настройки:
-    - wait_time: время между запросами (1-3 секунды)
-    - tasks: какие задачи выполняет пользователь
-    - weight: вероятность выбора этого класса пользователя
-    """
-    wait_time = between(1, 3)  # Ожидание 1-3 секунды между запросами
-    tasks = [AdminTasks, PublicTasks]  # Может выполнять обе задачи
-    weight = 3  # Вероятность выбора этого пользователя
-
-class AdminUser(HttpUser):
-    """Пользователь-администратор (только админские задачи)"""
-    wait_time = between(2, 5)  # Админы работают медленнее
-    tasks = [AdminTasks]
-    weight = 1  # Меньше администраторов, чем обычных пользователей
-
-class PublicUser(HttpUser):
-    """Публичный пользователь (только просмотр меню)"""
-    wait_time = between(0.5, 2)  # Быстро листают меню
-    tasks = [PublicTasks]
-    weight = 5  # Больше всего публичных пользователей
+    def categories(self):
+        self.client.get("/api/admin/categories", name="/api/admin/categories")
+
+if os.getenv("LUNCH_PROFILE", "").lower() in ("1", "true", "t"):
+
+    class LunchPeakShape(LoadTestShape):
+        """
+        Сжатый во времени рабочий день: утро -> обеденный пик -> спад.
+
+        Этапы заданы долями длительности и долями пикового числа пользователей.
+        """
+        peak_users = int(os.getenv("PEAK_USERS", 60))
+        duration = int(os.getenv("PROFILE_DURATION", 300))
+
+        # (конец этапа в долях длительности, доля пиковых пользователей, скорость роста/с)
+        stages = [
+            (0.15, 0.15, 2),   # утро
+            (0.30, 0.40, 5),   # поздний завтрак
+            (0.40, 1.00, 10),  # начало обеда - резкий рост
+            (0.65, 1.00, 10),  # обеденный пик
+            (0.80, 0.35, 10),  # спад
+            (1.00, 0.20, 5),   # вторая половина дня
+        ]
+
+        def tick(self):
+            run_time = self.get_run_time()
+            if run_time >= self.duration:
+                return None
+            for end, users_share, spawn_rate in self.stages:
+                if run_time < end * self.duration:
+                    return max(1, round(self.peak_users * users_share)), spawn_rate
+            return None
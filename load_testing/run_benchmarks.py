@@ -0,0 +1,68 @@
+# load_testing/run_benchmarks.py
+"""
+Запуск in-process бенчмарков с сохранением результатов в JSON.
+
+    python load_testing/run_benchmarks.py                  # все размеры
+    python load_testing/run_benchmarks.py --sizes 1000,10000
+    python load_testing/run_benchmarks.py --compare A.json B.json
+
+Сравнение двух прогонов выводит медианы и изменение в процентах.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+RESULTS_DIR = "load_testing/results/benchmarks"
+
+def run(sizes=None, extra_args=()):
+    """Прогон бенчмарков; возвращает путь к JSON с результатами"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = os.path.join(RESULTS_DIR, f"bench_{timestamp}.json")
+
+    env = dict(os.environ)
+    if sizes:
+        env["BENCH_SIZES"] = sizes
+
+    cmd = [
+        sys.executable, "-m", "pytest", "load_testing/benchmarks",
+        "-p", "no:cacheprovider",
+        "--benchmark-json", output,
+        "--benchmark-columns", "min,median,mean,ops,rounds",
+        "--benchmark-sort", "name",
+        *extra_args
+    ]
+    print(f"Запуск: {' '.join(cmd)}")
+    subprocess.run(cmd, env=env, check=True)
+    print(f"\nРезультаты сохранены в {output}")
+    return output
+
+def _load_medians(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {b["name"]: b["stats"]["median"] for b in data["benchmarks"]}
+
+def compare(old_path, new_path):
+    """Сравнение медиан двух прогонов"""
+    old, new = _load_medians(old_path), _load_medians(new_path)
+    print(f"{'Бенчмарк':<45} {'было, мс':>10} {'стало, мс':>10} {'изм.':>8}")
+    for name in sorted(set(old) & set(new)):
+        change = (new[name] - old[name]) / old[name] * 100
+        print(f"{name:<45} {old[name] * 1000:>10.2f} {new[name] * 1000:>10.2f} {change:>+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process бенчмарки горячих эндпоинтов")
+    parser.add_argument("--sizes", help="Размеры датасетов (заказов) через запятую")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Сравнить два JSON")
+    args, extra = parser.parse_known_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args.sizes, extra)
+
+if __name__ == "__main__":
+    main()
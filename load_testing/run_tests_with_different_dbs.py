@@ -2,11 +2,14 @@
 import subprocess
 import time
 import os
-import shutil
+import sys
 from datetime import datetime
 import matplotlib.pyplot as plt
 import pandas as pd
 
+sys.path.insert(0, os.path.abspath('.'))
+from backend.src.backup import copy_database, restore_backup
+
 class DatabaseSwitcher:
     """Класс для переключения между тестовыми БД"""
     
@@ -18,9 +21,9 @@ class DatabaseSwitcher:
         os.makedirs("load_testing/results", exist_ok=True)
     
     def backup_current_db(self):
-        """Создание резервной копии текущей БД"""
+        """Создание резервной копии текущей БД (backup API: приложение может работать)"""
         if os.path.exists(self.app_db_path):
-            shutil.copy2(self.app_db_path, self.backup_path)
+            copy_database(self.app_db_path, self.backup_path)
             print(f"✓ Создана резервная копия: {self.backup_path}")
             return True
         return False
@@ -28,7 +31,7 @@ class DatabaseSwitcher:
     def restore_backup(self):
         """Восстановление БД из резервной копии"""
         if os.path.exists(self.backup_path):
-            shutil.copy2(self.backup_path, self.app_db_path)
+            restore_backup(self.backup_path, self.app_db_path)
             print(f"✓ Восстановлена БД из резервной копии")
             return True
         return False
@@ -41,8 +44,8 @@ class DatabaseSwitcher:
             print(f"❌ Тестовая БД не найдена: {test_db_path}")
             return False
         
-        # Копируем тестовую БД
-        shutil.copy2(test_db_path, self.app_db_path)
+        # Переносим страницы тестовой БД в рабочую (не подменяя файл под приложением)
+        restore_backup(test_db_path, self.app_db_path)
         print(f"✓ Переключено на БД с {size} записями")
         return True
     
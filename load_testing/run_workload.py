@@ -0,0 +1,141 @@
+# load_testing/run_workload.py
+"""
+Прогон модели нагрузки (locustfile.py) с профилем обеденного пика
+и проверкой SLO по перцентилям.
+
+    # прогон + проверка против сохраненного baseline
+    python load_testing/run_workload.py
+
+    # сохранить результаты прогона как новый baseline
+    python load_testing/run_workload.py --update-baseline
+
+    # только проверить уже имеющийся CSV Locust
+    python load_testing/run_workload.py --stats-csv load_testing/results/workload_X_stats.csv
+
+Код возврата 1, если p50/p95/p99 какого-либо эндпоинта вырос больше
+чем на допуск (--tolerance) относительно baseline или доля ошибок
+превысила --max-failure-rate.
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+BASELINE_FILE = "load_testing/slo_baseline.json"
+RESULTS_DIR = "load_testing/results"
+PERCENTILES = ("50%", "95%", "99%")
+
+def run_locust(host, peak_users, duration):
+    """Запуск Locust в headless режиме с профилем обеденного пика"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base_name = os.path.join(RESULTS_DIR, f"workload_{timestamp}")
+
+    env = dict(
+        os.environ,
+        LUNCH_PROFILE="1",
+        PEAK_USERS=str(peak_users),
+        PROFILE_DURATION=str(duration)
+    )
+    cmd = [
+        "locust",
+        "-f", "load_testing/locustfile.py",
+        "--host", host,
+        "--headless",
+        "--only-summary",
+        "--csv", base_name
+    ]
+    print(f"Запуск: {' '.join(cmd)} (пик {peak_users} пользователей, {duration} с)")
+    subprocess.run(cmd, env=env, timeout=duration + 120)
+    return f"{base_name}_stats.csv"
+
+def _to_ms(value):
+    # Для эндпоинтов без запросов Locust пишет N/A
+    return float(value) if value not in ("", "N/A") else 0.0
+
+def read_stats(stats_csv):
+    """Перцентили и ошибки по эндпоинтам из CSV Locust"""
+    stats = {}
+    with open(stats_csv, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row["Name"] == "Aggregated":
+                continue
+            requests = int(row["Request Count"])
+            stats[f"{row['Type']} {row['Name']}"] = {
+                "requests": requests,
+                "failure_rate": int(row["Failure Count"]) / requests if requests else 0.0,
+                **{f"p{p[:-1]}": _to_ms(row[p]) for p in PERCENTILES}
+            }
+    return stats
+
+def print_report(stats):
+    print(f"\n{'Эндпоинт':<45} {'запр.':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'ошибки':>8}")
+    for name, s in sorted(stats.items()):
+        print(f"{name:<45} {s['requests']:>7} {s['p50']:>7.0f} {s['p95']:>7.0f} "
+              f"{s['p99']:>7.0f} {s['failure_rate'] * 100:>7.2f}%")
+
+def check_slo(stats, baseline, tolerance, max_failure_rate):
+    """Список нарушений SLO (пустой - все в порядке)"""
+    violations = []
+    for name, s in sorted(stats.items()):
+        if s["failure_rate"] > max_failure_rate:
+            violations.append(f"{name}: ошибки {s['failure_rate'] * 100:.2f}%")
+
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        for key in ("p50", "p95", "p99"):
+            limit = expected[key] * (1 + tolerance)
+            if s[key] > limit:
+                violations.append(
+                    f"{name}: {key} {s[key]:.0f} мс > {limit:.0f} мс (baseline {expected[key]:.0f} мс)"
+                )
+    return violations
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон с проверкой SLO")
+    parser.add_argument("--host", default="http://localhost:8000")
+    parser.add_argument("--peak-users", type=int, default=60)
+    parser.add_argument("--duration", type=int, default=300, help="Длительность профиля, с")
+    parser.add_argument("--stats-csv", help="Проверить готовый CSV без прогона")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Допустимый рост перцентилей")
+    parser.add_argument("--max-failure-rate", type=float, default=0.01)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    stats_csv = args.stats_csv or run_locust(args.host, args.peak_users, args.duration)
+    if not os.path.exists(stats_csv):
+        print(f"❌ Файл результатов не найден: {stats_csv}")
+        sys.exit(2)
+
+    stats = read_stats(stats_csv)
+    print_report(stats)
+
+    if args.update_baseline:
+        baseline = {name: {k: s[k] for k in ("p50", "p95", "p99")} for name, s in stats.items()}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n✓ Baseline сохранен в {args.baseline}")
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    else:
+        print(f"\n⚠️  Baseline {args.baseline} не найден, проверяются только ошибки")
+
+    violations = check_slo(stats, baseline, args.tolerance, args.max_failure_rate)
+    if violations:
+        print("\n❌ Нарушения SLO:")
+        for violation in violations:
+            print(f"  - {violation}")
+        sys.exit(1)
+    print("\n✅ SLO соблюдены")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# load_testing/startup_benchmark.py
+"""
+Бенчмарк холодного старта: импорт приложения + первый запрос.
+
+Каждый замер выполняется в отдельном процессе (честный холодный старт),
+результаты дописываются в load_testing/results/startup_history.csv,
+чтобы отслеживать время старта от коммита к коммиту.
+
+Запуск из корня репозитория:
+    python load_testing/startup_benchmark.py --runs 10
+"""
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+HISTORY_FILE = "load_testing/results/startup_history.csv"
+
+# Код, выполняемый в дочернем процессе. Печатает JSON с замерами в мс.
+CHILD_SCRIPT = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, os.path.abspath('backend'))
+from backend.src.main import app
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    t2 = time.perf_counter()
+    response = client.get("/api/cashier/menu")
+    t3 = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "startup_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "total_ms": (t3 - t0) * 1000,
+}))
+"""
+
+def measure_once(db_url):
+    """Один холодный старт в отдельном процессе"""
+    env = dict(os.environ, DATABASE_URL=db_url)
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True
+    )
+    # Последняя строка stdout - JSON с замерами
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def git_revision():
+    """Текущий коммит (для истории замеров)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def run_benchmark(runs=5):
+    """Серия холодных стартов на временной файловой БД"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+
+        # Первый старт создает схему - это "деплой", он не входит в статистику
+        first_deploy = measure_once(db_url)
+        samples = [measure_once(db_url) for _ in range(runs)]
+
+    summary = {"first_deploy_total_ms": round(first_deploy["total_ms"], 2)}
+    for key in ("import_ms", "startup_ms", "first_request_ms", "total_ms"):
+        values = [s[key] for s in samples]
+        summary[f"{key}_median"] = round(statistics.median(values), 2)
+        summary[f"{key}_min"] = round(min(values), 2)
+    return summary
+
+def append_history(summary, runs):
+    """Дописываем результат в CSV с историей"""
+    os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
+    row = {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "runs": runs,
+        **summary
+    }
+    write_header = not os.path.exists(HISTORY_FILE)
+    with open(HISTORY_FILE, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(row.keys()))
+        if write_header:
+            writer.writeheader()
+        writer.writerow(row)
+    return row
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк холодного старта приложения")
+    parser.add_argument("--runs", type=int, default=5, help="Количество замеров")
+    parser.add_argument("--no-history", action="store_true", help="Не записывать в историю")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("БЕНЧМАРК ХОЛОДНОГО СТАРТА (импорт + первый запрос)")
+    print("=" * 60)
+
+    summary = run_benchmark(args.runs)
+    for key, value in summary.items():
+        print(f"  {key:<28} {value:>10.2f} мс")
+
+    if not args.no_history:
+        append_history(summary, args.runs)
+        print(f"\nРезультат добавлен в {HISTORY_FILE}")
+
+if __name__ == "__main__":
+    main()
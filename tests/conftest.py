@@ -1,12 +1,18 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 import sys
 import os
 
 os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+# В тестах включаем поиск повторяющихся SQL запросов (N+1)
+os.environ.setdefault("QUERY_DEBUG", "True")
+# Фоновый прогрев работает с рабочим engine; тесты запускают его явно
+os.environ.setdefault("PRECOMPUTE_ENABLED", "False")
+os.environ.setdefault("MAINTENANCE_ENABLED", "False")
+os.environ.setdefault("BACKUP_ENABLED", "False")
 
 # Добавляем путь к проекту
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
@@ -19,38 +25,153 @@ from backend.src.database import Base
 # ВАЖНО: Затем импортируем ВСЕ модели
 from backend.src.models import Category, Dish, Order, OrderItem
 
-# Создаем тестовый engine
+def _explicit_transactions(engine):
+    """
+    pysqlite сам открывает и закрывает транзакции, из-за чего SAVEPOINT
+    внутри теста мог бы зафиксировать данные. Отключаем это поведение
+    и открываем транзакцию явно (рецепт из документации SQLAlchemy).
+    """
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+# Создаем тестовый engine. БД в памяти своя у каждого процесса,
+# поэтому воркеры pytest-xdist не мешают друг другу
 test_engine = create_engine(
     "sqlite:///:memory:",
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+_explicit_transactions(test_engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# Учет SQL запросов и на тестовом движке (заголовки X-Query-Count)
+from backend.src.query_stats import install_query_hooks
+install_query_hooks(test_engine)
+
 from backend.src.main import app
 from backend.src.database import get_db
 import uuid
 from datetime import datetime
 
-@pytest.fixture(scope="function")
-def db_session():
-    """Создание тестовой сессии БД"""
+LOAD_TESTING_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../load_testing"))
 
+@pytest.fixture(scope="session")
+def db_schema():
+    """Схема создается один раз на сессию (процесс)"""
     Base.metadata.create_all(bind=test_engine)
-      
-    session = TestingSessionLocal()
+    yield test_engine
+    Base.metadata.drop_all(bind=test_engine)
+
+def _dataset_key(size):
+    """Имя шаблона: меняется вместе со схемой, генератором и датой (данные - до текущего рабочего дня)"""
+    import hashlib
+    from backend.src.database import SCHEMA_VERSION
+    from backend.src.models import business_date
+
+    with open(os.path.join(LOAD_TESTING_PATH, "create_test_db.py"), "rb") as f:
+        generator = hashlib.sha256(f.read()).hexdigest()[:8]
+    return f"dataset_{size}_v{SCHEMA_VERSION}_{generator}_{business_date():%Y%m%d}"
+
+def _dataset_dir(config, tmp_path_factory):
+    """Каталог шаблонов: TEST_DATASET_DIR, кэш pytest или (с -p no:cacheprovider) временный"""
+    from pathlib import Path
+
+    if os.getenv("TEST_DATASET_DIR"):
+        root = Path(os.environ["TEST_DATASET_DIR"])
+        root.mkdir(parents=True, exist_ok=True)
+        return root
+    cache = getattr(config, "cache", None)
+    if cache is not None:
+        return cache.mkdir("datasets")
+    return tmp_path_factory.mktemp("datasets")
+
+@pytest.fixture(scope="session")
+def dataset_template(request, tmp_path_factory):
+    """
+    Путь к шаблонной БД с size заказами.
+
+    Шаблоны хранятся в кэше pytest (.pytest_cache/d/datasets, см. _dataset_dir) и
+    пересобираются, только если изменились схема, генератор или дата.
+    Каталог общий для воркеров pytest-xdist: файл собирается под
+    временным именем и переименовывается атомарно, поэтому одновременная
+    сборка двумя воркерами безопасна.
+    """
+    root = _dataset_dir(request.config, tmp_path_factory)
+    built = {}
+
+    def template(size):
+        if size not in built:
+            key = _dataset_key(size)
+            path = root / f"{key}.db"
+            if not path.exists():
+                sys.path.insert(0, LOAD_TESTING_PATH)
+                from create_test_db import create_sized_database
+
+                tmp = root / f"{key}.{os.getpid()}.tmp"
+                create_sized_database(str(tmp), size)
+                os.replace(tmp, path)
+                # Устаревшие шаблоны этого размера
+                for old in root.glob(f"dataset_{size}_*.db"):
+                    if old != path:
+                        old.unlink(missing_ok=True)
+            built[size] = str(path)
+        return built[size]
+
+    return template
+
+def _clone_engine(path):
+    """Копия шаблона в памяти через backup API SQLite"""
+    import sqlite3
+
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    source = sqlite3.connect(path)
+    try:
+        source.backup(connection)
+    finally:
+        source.close()
+
+    engine = create_engine("sqlite://", creator=lambda: connection, poolclass=StaticPool)
+    _explicit_transactions(engine)
+    install_query_hooks(engine)
+    return engine
+
+@pytest.fixture(scope="function")
+def db_session(request, db_schema):
+    """
+    Тестовая сессия БД.
+
+    Тест выполняется во внешней транзакции, которая откатывается после
+    теста; commit() в коде и тестах фиксирует лишь SAVEPOINT.
+    С маркером @pytest.mark.dataset(size) сессия работает с копией
+    сгенерированной БД (load_testing/create_test_db.py) с size заказами.
+    """
+    marker = request.node.get_closest_marker("dataset")
+    # Шаблон нужен (и собирается) только тестам с маркером
+    engine = _clone_engine(request.getfixturevalue("dataset_template")(marker.args[0])) if marker else db_schema
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     try:
         yield session
     finally:
         session.close()
-        Base.metadata.drop_all(bind=test_engine)
+        transaction.rollback()
+        connection.close()
+        if marker:
+            engine.dispose()
 
 
 @pytest.fixture(scope="function")
 def client(db_session):
     """Тестовый клиент FastAPI"""
     print(f"\n[client fixture] Переопределяем get_db")
-    print(f"[client fixture] db_session.bind: {db_session.bind.url}")
+    print(f"[client fixture] db_session.bind: {db_session.bind.engine.url}")
     
     def override_get_db():
         print(f"[override_get_db] Вызывается dependency")
@@ -172,7 +293,9 @@ def create_test_order(db_session, create_test_dish):
             order_id=order.order_id,
             dish_id=dish.dish_id,
             quantity=2,
-            item_total=200.00
+            item_total=200.00,
+            dish_name=dish.name,
+            price_per_item=dish.price
         )
         db_session.add(order_item)
         db_session.commit()
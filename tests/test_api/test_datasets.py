@@ -0,0 +1,76 @@
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import func
+
+from backend.src.models import Category, Order, OrderItem, business_date, business_day_range
+
+class TestTransactionIsolation:
+    """Тесты отката данных между тестами (порядок тестов не важен)"""
+
+    @pytest.mark.parametrize("name", ["Первая", "Вторая"])
+    def test_committed_data_rolled_back(self, client, db_session, name):
+        """Тест: закоммиченное в прошлом тесте не видно в следующем"""
+        # Arrange
+        assert db_session.query(Category).count() == 0
+
+        # Act
+        response = client.post("/api/admin/categories", json={"name": name})
+
+        # Assert
+        assert response.status_code == 200
+        assert db_session.query(Category).count() == 1
+
+    @pytest.mark.dataset(1000)
+    @pytest.mark.parametrize("attempt", [1, 2])
+    def test_dataset_clone_isolated(self, db_session, attempt):
+        """Тест: изменения копии датасета не попадают в шаблон"""
+        # Arrange
+        assert db_session.query(Order).count() == 1000
+
+        # Act
+        db_session.query(OrderItem).delete()
+        db_session.query(Order).delete()
+        db_session.commit()
+
+        # Assert
+        assert db_session.query(Order).count() == 0
+
+class TestReportsOnDatasets:
+    """Отчеты на сгенерированных данных совпадают с прямыми агрегатами SQL"""
+
+    @pytest.mark.dataset(1000)
+    def test_daily_report(self, client, db_session):
+        """Тест: отчет за сегодня на 1000 заказов"""
+        # Arrange
+        today = business_date()
+        expected = db_session.query(func.count(), func.sum(Order.total_amount)).filter(
+            business_day_range(today, today)
+        ).one()
+
+        # Act
+        report = client.get("/api/reports/daily").json()
+
+        # Assert
+        assert report["orders_count"] == expected[0] > 0
+        assert report["daily_total"] == pytest.approx(float(expected[1]))
+
+    @pytest.mark.slow
+    @pytest.mark.dataset(100_000)
+    def test_category_report_month(self, client, db_session):
+        """Тест: отчет по категориям за 30 дней на 100 000 заказов"""
+        # Arrange
+        end = business_date()
+        start = end - timedelta(days=30)
+        expected = db_session.query(func.sum(OrderItem.item_total)).join(Order).filter(
+            business_day_range(start, end)
+        ).scalar()
+
+        # Act
+        report = client.get(
+            "/api/reports/by-category",
+            params={"start_date": start.isoformat(), "end_date": end.isoformat()}
+        ).json()
+
+        # Assert
+        assert report["total_amount"] == pytest.approx(float(expected))
+        assert sum(c["amount"] for c in report["categories"]) == pytest.approx(float(expected))
@@ -0,0 +1,118 @@
+import pytest
+from decimal import Decimal
+
+from backend.src.models import Category, Dish
+from backend.src.models.dish_search import match_expression
+
+@pytest.fixture
+def menu(db_session):
+    """Меню из двух категорий"""
+    soups = Category(name="Супы")
+    hot = Category(name="Горячее")
+    db_session.add_all([soups, hot])
+    db_session.flush()
+    dishes = {
+        "borsch": Dish(name="Борщ украинский", price=Decimal("120.50"), category_id=soups.category_id),
+        "noodles": Dish(name="Суп-лапша", price=Decimal("90.00"), category_id=soups.category_id),
+        "hedgehogs": Dish(name="Ёжики в сметане", price=Decimal("150.00"), category_id=hot.category_id),
+    }
+    db_session.add_all(dishes.values())
+    db_session.commit()
+    return soups, hot, dishes
+
+def _search(client, query, url="/api/admin/dishes/search", **params):
+    response = client.get(url, params={"q": query, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _names(result):
+    return [item["name"] for item in result["items"]]
+
+class TestDishSearch:
+    """Тесты поиска блюд (FTS5)"""
+
+    @pytest.mark.parametrize("query,expected", [
+        ("бор", ["Борщ украинский"]),
+        ("БОРЩ УКР", ["Борщ украинский"]),
+        ("ежик", ["Ёжики в сметане"]),
+        ("лапш", ["Суп-лапша"]),
+        ("горяч", ["Ёжики в сметане"]),
+        ("борщ лапша", []),
+    ])
+    def test_prefix_case_insensitive(self, client, menu, query, expected):
+        """Тест: каждое слово - префикс, регистр и "ё" не важны, ищется и по категории"""
+        # Act
+        result = _search(client, query)
+
+        # Assert
+        assert _names(result) == expected
+        assert result["total"] == len(expected)
+
+    def test_dish_name_ranked_above_category(self, client, menu):
+        """Тест: совпадение в названии блюда выше совпадения в категории"""
+        # Act
+        result = _search(client, "суп")
+
+        # Assert
+        assert _names(result) == ["Суп-лапша", "Борщ украинский"]
+        assert result["items"][0]["category_name"] == "Супы"
+        assert result["items"][0]["price"] == 90.0
+
+    def test_pagination(self, client, menu):
+        """Тест: limit/offset и общее число найденных"""
+        # Act
+        first = _search(client, "суп", limit=1)
+        second = _search(client, "суп", limit=1, offset=1)
+        past_end = _search(client, "суп", limit=1, offset=5)
+
+        # Assert
+        assert (first["total"], _names(first)) == (2, ["Суп-лапша"])
+        assert (second["total"], _names(second)) == (2, ["Борщ украинский"])
+        assert (past_end["total"], past_end["items"]) == (2, [])
+
+    def test_index_follows_admin_changes(self, client, menu):
+        """Тест: изменения через api/admin сразу видны в поиске"""
+        # Arrange
+        soups, _, dishes = menu
+
+        # Act
+        client.put(f"/api/admin/dishes/{dishes['borsch'].dish_id}", json={"name": "Щи"})
+        client.put(f"/api/admin/categories/{soups.category_id}", json={"name": "Первое"})
+        client.delete(f"/api/admin/dishes/{dishes['noodles'].dish_id}")
+        created = client.post(
+            "/api/admin/dishes",
+            json={"name": "Борщ зеленый", "price": 110, "category_id": soups.category_id},
+        )
+
+        # Assert
+        assert created.status_code == 200
+        assert _names(_search(client, "щи")) == ["Щи"]
+        assert _names(_search(client, "борщ")) == ["Борщ зеленый"]
+        assert _names(_search(client, "лапша")) == []
+        assert sorted(_names(_search(client, "перв"))) == ["Борщ зеленый", "Щи"]
+        assert _search(client, "суп")["total"] == 0
+
+    def test_cashier_search(self, client, menu):
+        """Тест: касса ищет по тому же индексу"""
+        # Act
+        result = _search(client, "ёж", url="/api/cashier/menu/search")
+
+        # Assert
+        assert _names(result) == ["Ёжики в сметане"]
+
+    def test_query_syntax_is_escaped(self, client, menu):
+        """Тест: операторы FTS5 в запросе - обычный текст, а не синтаксис"""
+        # Act
+        result = _search(client, 'борщ" OR * NEAR(')
+
+        # Assert
+        assert match_expression('борщ" OR * NEAR(') == '"борщ"* "OR"* "NEAR"*'
+        assert result["total"] == 0
+
+    def test_query_required(self, client):
+        """Тест: пустой запрос - 422"""
+        # Act
+        response = client.get("/api/admin/dishes/search", params={"q": ""})
+
+        # Assert
+        assert response.status_code == 422
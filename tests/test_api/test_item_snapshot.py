@@ -0,0 +1,76 @@
+import pytest
+from decimal import Decimal
+import uuid
+
+from sqlalchemy import event
+
+from backend.src.models import Category, Dish
+
+@pytest.fixture
+def borsch(db_session):
+    """Блюдо, которое потом переименуют и подорожают"""
+    category = Category(name="Супы")
+    db_session.add(category)
+    db_session.flush()
+    dish = Dish(name="Борщ", price=Decimal("120.50"), category_id=category.category_id)
+    db_session.add(dish)
+    db_session.commit()
+    return dish
+
+def _change_dish(client, dish):
+    response = client.put(f"/api/admin/dishes/{dish.dish_id}", json={"name": "Борщ с пампушками", "price": 150})
+    assert response.status_code == 200
+
+class TestItemSnapshot:
+    """Тесты снимка названия и цены блюда в позициях заказа"""
+
+    def test_order_details_keep_price_at_sale(self, client, borsch):
+        """Тест: детали заказа показывают цену и название на момент продажи"""
+        # Arrange
+        created = client.post("/api/cashier/order", json={"items": [{"dish_id": borsch.dish_id, "quantity": 2}]})
+        order_id = created.json()["order_id"]
+
+        # Act
+        _change_dish(client, borsch)
+        single = client.get(f"/api/cashier/orders/{order_id}").json()
+        batch = client.get("/api/cashier/orders/details", params={"ids": order_id}).json()
+
+        # Assert
+        for details in (single, batch["orders"][0]):
+            item = details["items"][0]
+            assert (item["dish_name"], item["price_per_item"], item["item_total"]) == ("Борщ", 120.5, 241.0)
+            assert details["total_amount"] == 241.0
+
+    def test_batch_orders_store_snapshot(self, client, borsch):
+        """Тест: пакетная отправка заказов тоже сохраняет снимок"""
+        # Arrange
+        order = {"order_id": str(uuid.uuid4()), "items": [{"dish_id": borsch.dish_id, "quantity": 1}]}
+        client.post("/api/cashier/orders/batch", json={"orders": [order]})
+
+        # Act
+        _change_dish(client, borsch)
+        item = client.get(f"/api/cashier/orders/{order['order_id']}").json()["items"][0]
+
+        # Assert
+        assert (item["dish_name"], item["price_per_item"]) == ("Борщ", 120.5)
+
+    def test_order_details_do_not_read_dishes(self, client, borsch, db_session):
+        """Тест: детали заказа читаются без обращения к таблице dishes"""
+        # Arrange
+        created = client.post("/api/cashier/order", json={"items": [{"dish_id": borsch.dish_id, "quantity": 1}]})
+        order_id = created.json()["order_id"]
+        statements = []
+        connection = db_session.connection()
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+
+        # Act
+        event.listen(connection, "before_cursor_execute", listener)
+        try:
+            client.get(f"/api/cashier/orders/{order_id}")
+            client.get("/api/cashier/orders/details", params={"ids": order_id})
+        finally:
+            event.remove(connection, "before_cursor_execute", listener)
+
+        # Assert
+        assert statements
+        assert not [statement for statement in statements if "dishes" in statement]
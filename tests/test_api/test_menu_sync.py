@@ -0,0 +1,161 @@
+import pytest
+from decimal import Decimal
+
+from backend.src.models import Category, Dish, MenuTombstone, current_menu_version
+
+@pytest.fixture
+def menu(db_session):
+    """Две категории по два блюда"""
+    soups = Category(name="Супы")
+    drinks = Category(name="Напитки")
+    db_session.add_all([soups, drinks])
+    db_session.flush()
+    dishes = [
+        Dish(name="Борщ", price=Decimal("120.50"), category_id=soups.category_id),
+        Dish(name="Щи", price=Decimal("100.00"), category_id=soups.category_id),
+        Dish(name="Чай", price=Decimal("30.00"), category_id=drinks.category_id),
+        Dish(name="Морс", price=Decimal("45.00"), category_id=drinks.category_id),
+    ]
+    db_session.add_all(dishes)
+    db_session.commit()
+    return {"soups": soups, "drinks": drinks, "dishes": dishes}
+
+def _sync(client, since):
+    response = client.get("/api/cashier/menu", params={"since": since})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+class TestMenuVersioning:
+    """Тесты версий меню на уровне моделей"""
+
+    def test_versions_stamped(self, db_session, menu):
+        """Тест: новые строки получают версию, счетчик растет на каждый flush"""
+        # Arrange
+        version = current_menu_version(db_session)
+
+        # Act
+        menu["dishes"][0].price = Decimal("130.00")
+        db_session.commit()
+
+        # Assert
+        assert version > 0
+        assert menu["dishes"][0].version == version + 1
+        assert menu["dishes"][1].version <= version
+        assert current_menu_version(db_session) == version + 1
+
+    def test_unmodified_flush_keeps_version(self, db_session, menu):
+        """Тест: flush без изменений меню не увеличивает версию"""
+        # Arrange
+        version = current_menu_version(db_session)
+
+        # Act
+        menu["dishes"][0].price = menu["dishes"][0].price
+        db_session.commit()
+
+        # Assert
+        assert current_menu_version(db_session) == version
+
+    def test_delete_writes_tombstone(self, db_session, menu):
+        """Тест: удаление оставляет tombstone"""
+        # Arrange
+        dish = menu["dishes"][3]
+
+        # Act
+        db_session.delete(dish)
+        db_session.commit()
+
+        # Assert
+        tombstone = db_session.query(MenuTombstone).one()
+        assert (tombstone.entity, tombstone.entity_id) == ("dish", dish.dish_id)
+        assert tombstone.version == current_menu_version(db_session)
+
+class TestMenuSync:
+    """Тесты /api/cashier/menu?since="""
+
+    def test_full_sync(self, client, menu):
+        """Тест since=0: все меню и текущая версия"""
+        # Act
+        data = _sync(client, 0)
+
+        # Assert
+        assert data["full"] is True
+        assert len(data["dishes"]) == 4
+        assert {c["name"] for c in data["categories"]} == {"Супы", "Напитки"}
+        assert data["deleted"] == {"dishes": [], "categories": []}
+
+    def test_no_changes(self, client, menu):
+        """Тест: без изменений приходит пустая дельта"""
+        # Arrange
+        version = _sync(client, 0)["version"]
+
+        # Act
+        data = _sync(client, version)
+
+        # Assert
+        assert data["version"] == version
+        assert data["full"] is False
+        assert data["dishes"] == [] and data["categories"] == []
+
+    def test_price_change_delta(self, client, menu):
+        """Тест: после изменения цены приходит только это блюдо"""
+        # Arrange
+        version = _sync(client, 0)["version"]
+        dish = menu["dishes"][0]
+        client.put(f"/api/admin/dishes/{dish.dish_id}", json={"price": 135.0})
+
+        # Act
+        data = _sync(client, version)
+
+        # Assert
+        assert data["version"] > version
+        assert [d["dish_id"] for d in data["dishes"]] == [dish.dish_id]
+        assert data["dishes"][0]["price"] == 135.0
+        assert data["categories"] == []
+
+    def test_deleted_dish_and_category(self, client, menu):
+        """Тест: удаленные блюдо и категория приходят в deleted"""
+        # Arrange
+        version = _sync(client, 0)["version"]
+        empty = client.post("/api/admin/categories", json={"name": "Десерты"}).json()
+        dish = menu["dishes"][2]
+        client.delete(f"/api/admin/dishes/{dish.dish_id}")
+        client.delete(f"/api/admin/categories/{empty['category_id']}")
+
+        # Act
+        data = _sync(client, version)
+
+        # Assert
+        assert data["deleted"]["dishes"] == [dish.dish_id]
+        assert data["deleted"]["categories"] == [empty["category_id"]]
+
+    def test_category_rename(self, client, menu):
+        """Тест: переименованная категория приходит без ее блюд"""
+        # Arrange
+        version = _sync(client, 0)["version"]
+        soups = menu["soups"]
+        client.put(f"/api/admin/categories/{soups.category_id}", json={"name": "Первые блюда"})
+
+        # Act
+        data = _sync(client, version)
+
+        # Assert
+        assert data["categories"] == [{"category_id": soups.category_id, "name": "Первые блюда"}]
+        assert data["dishes"] == []
+
+    def test_version_ahead_of_server(self, client, menu):
+        """Тест: версия клиента новее сервера (БД пересоздана) - полная выдача"""
+        # Act
+        data = _sync(client, 10_000)
+
+        # Assert
+        assert data["full"] is True
+        assert len(data["dishes"]) == 4
+
+    def test_legacy_format_has_version_header(self, client, menu):
+        """Тест: меню без since - прежний формат и заголовок X-Menu-Version"""
+        # Act
+        response = client.get("/api/cashier/menu")
+
+        # Assert
+        assert set(response.json()) == {"Супы", "Напитки"}
+        assert int(response.headers["x-menu-version"]) == _sync(client, 0)["version"]
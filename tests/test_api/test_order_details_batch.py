@@ -0,0 +1,93 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from backend.src.api.cashier import MAX_BATCH_ORDERS
+from backend.src.models import Category, Dish, Order, OrderItem, local_order_time
+import uuid
+
+@pytest.fixture
+def orders(db_session):
+    """Пять заказов: у каждого i+1 позиций, у последнего позиций нет"""
+    category = Category(name="Супы")
+    db_session.add(category)
+    db_session.flush()
+    dish = Dish(name="Борщ", price=Decimal("120.50"), category_id=category.category_id)
+    db_session.add(dish)
+    db_session.flush()
+
+    now = local_order_time()
+    result = []
+    for i in range(5):
+        order = Order(order_id=str(uuid.uuid4()), order_date=now - timedelta(minutes=i))
+        db_session.add(order)
+        for _ in range(i + 1 if i < 4 else 0):
+            db_session.add(OrderItem(
+                order_id=order.order_id, dish_id=dish.dish_id,
+                quantity=2, item_total=Decimal("241.00"),
+                dish_name=dish.name, price_per_item=dish.price
+            ))
+        result.append(order)
+    db_session.commit()
+    return result
+
+class TestOrderDetailsBatch:
+    """Тесты пакетного получения деталей заказов"""
+
+    def test_details_in_requested_order(self, client, orders):
+        """Тест: заказы в порядке ids, позиции и суммы как у одиночного эндпоинта"""
+        # Arrange
+        ids = [orders[2].order_id, orders[0].order_id]
+
+        # Act
+        response = client.get("/api/cashier/orders/details", params={"ids": ids})
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert [o["order_id"] for o in data["orders"]] == ids
+        assert len(data["orders"][0]["items"]) == 3
+        assert data["orders"][0]["total_amount"] == 723.0
+        single = client.get(f"/api/cashier/orders/{orders[0].order_id}").json()
+        assert data["orders"][1] == single
+
+    def test_comma_separated_and_missing(self, client, orders):
+        """Тест: ids через запятую, повторы и ненайденные ID"""
+        # Arrange
+        unknown = str(uuid.uuid4())
+        ids = f"{orders[1].order_id},{unknown},{orders[1].order_id},{orders[4].order_id}"
+
+        # Act
+        data = client.get(f"/api/cashier/orders/details?ids={ids}").json()
+
+        # Assert
+        assert [o["order_id"] for o in data["orders"]] == [orders[1].order_id, orders[4].order_id]
+        assert data["orders"][1]["items"] == []
+        assert data["missing"] == [unknown]
+
+    def test_single_query(self, client, orders):
+        """Тест: один SQL запрос на любой размер пакета"""
+        # Act
+        response = client.get(
+            "/api/cashier/orders/details", params={"ids": [o.order_id for o in orders]}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert int(response.headers["X-Query-Count"]) == 1
+
+    def test_batch_limit(self, client):
+        """Тест ограничения размера пакета"""
+        # Arrange
+        ids = [str(uuid.uuid4()) for _ in range(MAX_BATCH_ORDERS + 1)]
+
+        # Act
+        response = client.get("/api/cashier/orders/details", params={"ids": ids})
+
+        # Assert
+        assert response.status_code == 400
+
+    def test_ids_required(self, client):
+        """Тест запроса без ids"""
+        # Act & Assert
+        assert client.get("/api/cashier/orders/details").status_code == 400
+        assert client.get("/api/cashier/orders/details?ids=,").status_code == 400
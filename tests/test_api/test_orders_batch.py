@@ -0,0 +1,204 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import uuid
+
+from backend.src.api.cashier import MAX_BATCH_ORDERS
+from backend.src.models import Category, Dish, Order, OrderItem, current_menu_version, local_order_time
+
+@pytest.fixture
+def dishes(db_session):
+    """Два блюда"""
+    category = Category(name="Супы")
+    db_session.add(category)
+    db_session.flush()
+    borsch = Dish(name="Борщ", price=Decimal("120.50"), category_id=category.category_id)
+    tea = Dish(name="Чай", price=Decimal("30.00"), category_id=category.category_id)
+    db_session.add_all([borsch, tea])
+    db_session.commit()
+    return borsch, tea
+
+def _order(*items, order_date=None):
+    order = {
+        "order_id": str(uuid.uuid4()),
+        "items": [{"dish_id": dish.dish_id, "quantity": quantity} for dish, quantity in items],
+    }
+    if order_date is not None:
+        order["order_date"] = order_date.isoformat()
+    return order
+
+def _send(client, *orders):
+    response = client.post("/api/cashier/orders/batch", json={"orders": list(orders)})
+    assert response.status_code == 200, response.text
+    return response.json()["results"]
+
+class TestOrdersBatch:
+    """Тесты пакетной отправки заказов из очереди кассы"""
+
+    def test_orders_created(self, client, db_session, dishes):
+        """Тест: заказы создаются с id и временем пробития кассы"""
+        # Arrange
+        borsch, tea = dishes
+        rung_at = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(minutes=5)
+        first = _order((borsch, 2), (tea, 1), order_date=rung_at)
+        second = _order((tea, 3))
+
+        # Act
+        results = _send(client, first, second)
+
+        # Assert
+        assert [r["status"] for r in results] == ["created", "created"]
+        assert results[0]["total_amount"] == 271.0
+        order = db_session.get(Order, first["order_id"])
+        assert order.total_amount == Decimal("271.00")
+        assert order.order_date == local_order_time(rung_at)
+        assert db_session.query(OrderItem).filter_by(order_id=first["order_id"]).count() == 2
+
+    def test_resend_is_idempotent(self, client, db_session, dishes):
+        """Тест: повторная отправка (в том числе внутри пакета) не создает дублей"""
+        # Arrange
+        borsch, _ = dishes
+        order = _order((borsch, 1))
+        _send(client, order)
+
+        # Act
+        results = _send(client, order, order)
+
+        # Assert
+        assert [r["status"] for r in results] == ["duplicate", "duplicate"]
+        assert db_session.query(Order).count() == 1
+        assert db_session.query(OrderItem).count() == 1
+
+    def test_rejected_order_does_not_block_batch(self, client, db_session, dishes):
+        """Тест: заказ с удаленным блюдом отклоняется, остальные создаются"""
+        # Arrange
+        borsch, tea = dishes
+        bad = _order((borsch, 1))
+        bad["items"].append({"dish_id": str(uuid.uuid4()), "quantity": 1})
+        empty = _order()
+        good = _order((tea, 2))
+
+        # Act
+        results = _send(client, bad, empty, good)
+
+        # Assert
+        assert [r["status"] for r in results] == ["rejected", "rejected", "created"]
+        assert "Блюдо не найдено" in results[0]["detail"]
+        assert db_session.query(Order.order_id).all() == [(good["order_id"],)]
+
+    def test_future_date_clamped(self, client, db_session, dishes):
+        """Тест: время пробития из будущего заменяется серверным"""
+        # Arrange
+        borsch, _ = dishes
+        order = _order((borsch, 1), order_date=datetime.now(timezone.utc) + timedelta(hours=2))
+
+        # Act
+        _send(client, order)
+
+        # Assert
+        assert db_session.get(Order, order["order_id"]).order_date <= local_order_time()
+
+    def test_too_many_orders(self, client, dishes):
+        """Тест: больше MAX_BATCH_ORDERS заказов - 400"""
+        # Arrange
+        borsch, _ = dishes
+        orders = [_order((borsch, 1)) for _ in range(MAX_BATCH_ORDERS + 1)]
+
+        # Act
+        response = client.post("/api/cashier/orders/batch", json={"orders": orders})
+
+        # Assert
+        assert response.status_code == 400
+
+def _rung_up(version, *items):
+    """Заказ со снимком кассы: цена и название на момент пробития"""
+    order = _order(*[(dish, quantity) for dish, quantity, _ in items])
+    order["menu_version"] = version
+    for item, (dish, _, price) in zip(order["items"], items):
+        item.update(price=price, dish_name=dish.name)
+    return order
+
+class TestRungUpPrices:
+    """Тесты цен на момент пробития для заказов из очереди"""
+
+    def test_price_changed_after_ring_up(self, client, db_session, dishes):
+        """Тест: цена изменилась после пробития - заказ по цене кассы"""
+        # Arrange
+        borsch, tea = dishes
+        version = current_menu_version(db_session)
+        order = _rung_up(version, (borsch, 2, 120.5), (tea, 1, 30.0))
+        borsch.price = Decimal("150.00")
+        db_session.commit()
+
+        # Act
+        results = _send(client, order)
+
+        # Assert
+        assert results[0]["status"] == "created"
+        assert db_session.get(Order, order["order_id"]).total_amount == Decimal("271.00")
+        item = db_session.query(OrderItem).filter_by(order_id=order["order_id"], dish_id=borsch.dish_id).one()
+        assert item.price_per_item == Decimal("120.50")
+
+    def test_made_up_price_for_changed_dish(self, client, db_session, dishes):
+        """Тест: блюдо менялось после пробития, но такой цены в меню не было - отклоняется"""
+        # Arrange
+        borsch, _ = dishes
+        version = current_menu_version(db_session)
+        borsch.price = Decimal("150.00")
+        db_session.commit()
+        made_up = _rung_up(version, (borsch, 1, 1.0))
+        future_price = _rung_up(version, (borsch, 1, 150.0))
+
+        # Act
+        results = _send(client, made_up, future_price)
+
+        # Assert
+        assert [r["status"] for r in results] == ["rejected", "rejected"]
+        assert "не совпадает" in results[0]["detail"]
+        assert db_session.query(Order).count() == 0
+
+    def test_price_history_between_versions(self, client, db_session, dishes):
+        """Тест: цена берется из истории на момент версии кассы, а не последняя прежняя"""
+        # Arrange
+        borsch, _ = dishes
+        borsch.price = Decimal("130.00")
+        db_session.commit()
+        version = current_menu_version(db_session)
+        borsch.price = Decimal("150.00")
+        db_session.commit()
+        at_version = _rung_up(version, (borsch, 1, 130.0))
+        older = _rung_up(version, (borsch, 1, 120.5))
+
+        # Act
+        results = _send(client, at_version, older)
+
+        # Assert
+        assert [r["status"] for r in results] == ["created", "rejected"]
+        assert db_session.get(Order, at_version["order_id"]).total_amount == Decimal("130.00")
+
+    def test_price_mismatch_for_unchanged_dish(self, client, db_session, dishes):
+        """Тест: блюдо не менялось с версии кассы, а цена другая - отклоняется"""
+        # Arrange
+        borsch, _ = dishes
+        order = _rung_up(current_menu_version(db_session), (borsch, 1, 1.0))
+
+        # Act
+        results = _send(client, order)
+
+        # Assert
+        assert results[0]["status"] == "rejected"
+        assert "не совпадает" in results[0]["detail"]
+
+    def test_unknown_menu_version(self, client, db_session, dishes):
+        """Тест: версия меню из будущего или цена без версии - отклоняется"""
+        # Arrange
+        borsch, _ = dishes
+        future = _rung_up(current_menu_version(db_session) + 10, (borsch, 1, 120.5))
+        unversioned = _rung_up(None, (borsch, 1, 120.5))
+
+        # Act
+        results = _send(client, future, unversioned)
+
+        # Assert
+        assert [r["status"] for r in results] == ["rejected", "rejected"]
+        assert db_session.query(Order).count() == 0
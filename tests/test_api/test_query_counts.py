@@ -0,0 +1,84 @@
+import pytest
+from decimal import Decimal
+from backend.src.models import Category, Dish, Order, OrderItem, local_order_time
+import uuid
+
+# Горячие эндпоинты, количество SQL запросов которых не должно зависеть от объема данных
+HOT_ENDPOINTS = [
+    "/api/cashier/menu",
+    "/api/cashier/orders/today",
+    "/api/admin/dishes",
+    "/api/admin/orders/by-date",
+    "/api/reports/daily",
+    "/api/reports/by-category",
+    "/api/reports/popular-dishes",
+]
+
+def _seed(db_session, orders_count, dishes_per_category=3):
+    """Наполнение БД: 2 категории, блюда и заказы по 2 позиции"""
+    dishes = []
+    for c in range(2):
+        category = Category(category_id=str(uuid.uuid4()), name=f"Категория {c}")
+        db_session.add(category)
+        for d in range(dishes_per_category):
+            dish = Dish(
+                dish_id=str(uuid.uuid4()),
+                name=f"Блюдо {c}-{d}",
+                price=Decimal("100.00"),
+                category_id=category.category_id
+            )
+            db_session.add(dish)
+            dishes.append(dish)
+
+    for i in range(orders_count):
+        order = Order(
+            order_id=str(uuid.uuid4()),
+            order_date=local_order_time(),
+            total_amount=Decimal("300.00")
+        )
+        db_session.add(order)
+        for dish in (dishes[i % len(dishes)], dishes[(i + 1) % len(dishes)]):
+            db_session.add(OrderItem(
+                order_item_id=str(uuid.uuid4()),
+                order_id=order.order_id,
+                dish_id=dish.dish_id,
+                quantity=1,
+                item_total=Decimal("100.00")
+            ))
+    db_session.commit()
+    return dishes
+
+class TestQueryCounts:
+    """Тесты количества SQL запросов на эндпоинт (защита от N+1)"""
+
+    @pytest.mark.parametrize("path", HOT_ENDPOINTS)
+    def test_query_count_does_not_grow_with_data(self, client, db_session, path):
+        """Тест: количество запросов одинаково для 2 и 20 заказов"""
+        # Arrange
+        _seed(db_session, orders_count=2)
+        small = client.get(path)
+
+        # Act
+        _seed(db_session, orders_count=20, dishes_per_category=6)
+        large = client.get(path)
+
+        # Assert
+        assert small.status_code == 200
+        assert large.status_code == 200
+        assert int(large.headers["X-Query-Count"]) == int(small.headers["X-Query-Count"])
+        assert large.headers["X-Query-Duplicates"] == "0"
+        assert float(large.headers["X-DB-Time"]) >= 0
+
+    def test_order_details_single_round_trip_per_table(self, client, db_session):
+        """Тест: детали заказа не подгружают блюда по одному"""
+        # Arrange
+        _seed(db_session, orders_count=1)
+        order = db_session.query(Order).first()
+
+        # Act
+        response = client.get(f"/api/cashier/orders/{order.order_id}")
+
+        # Assert
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 2
+        assert int(response.headers["X-Query-Count"]) == 2
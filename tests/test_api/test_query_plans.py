@@ -0,0 +1,166 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from sqlalchemy import event
+from backend.src.models import Category, Dish, Order, OrderItem, business_date, local_order_time
+import uuid
+
+# Таблицы, полный просмотр которых недопустим на горячих путях
+BIG_TABLES = ("orders", "order_items")
+
+def _populate(db_session, orders_count=300, days=60):
+    """Наполнение БД заказами за несколько недель"""
+    categories = [Category(category_id=str(uuid.uuid4()), name=f"Категория {i}") for i in range(4)]
+    db_session.add_all(categories)
+    dishes = [
+        Dish(
+            dish_id=str(uuid.uuid4()),
+            name=f"Блюдо {i}",
+            price=Decimal("100.00"),
+            category_id=categories[i % len(categories)].category_id
+        )
+        for i in range(20)
+    ]
+    db_session.add_all(dishes)
+
+    now = local_order_time()
+    orders = []
+    for i in range(orders_count):
+        order = Order(
+            order_id=str(uuid.uuid4()),
+            order_date=now - timedelta(days=i % days, minutes=i),
+            total_amount=Decimal("200.00")
+        )
+        orders.append(order)
+        db_session.add(order)
+        for j in range(2):
+            db_session.add(OrderItem(
+                order_item_id=str(uuid.uuid4()),
+                order_id=order.order_id,
+                dish_id=dishes[(i + j) % len(dishes)].dish_id,
+                quantity=1,
+                item_total=Decimal("100.00")
+            ))
+    db_session.commit()
+    return orders
+
+@pytest.fixture
+def populated(db_session):
+    return _populate(db_session)
+
+@pytest.fixture
+def capture_plans(db_session):
+    """Перехватывает SELECT'ы эндпоинта и возвращает их EXPLAIN QUERY PLAN"""
+    # Соединение теста: его транзакция откатывается после теста
+    connection = db_session.connection()
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+
+    def plans(client, path, **kwargs):
+        captured.clear()
+        response = client.get(path, **kwargs)
+        assert response.status_code == 200, response.text
+        result = []
+        for statement, parameters in list(captured):
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            result.append((statement, [row[-1] for row in rows]))
+        return result
+
+    yield plans
+    event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+def _steps(plans):
+    return [step for _, steps in plans for step in steps]
+
+def _assert_no_full_scan(plans):
+    """Нет полного просмотра orders/order_items (просмотр покрывающего индекса допустим)"""
+    for statement, steps in plans:
+        for step in steps:
+            for table in BIG_TABLES:
+                if step.startswith(f"SCAN {table}") and "COVERING INDEX" not in step:
+                    pytest.fail(f"Полный просмотр {table}: {step}\n{statement}")
+
+def _assert_index_used(plans, index_name):
+    assert any(index_name in step for step in _steps(plans)), _steps(plans)
+
+def _primary_key_index(db_session, table):
+    """Имя индекса первичного ключа (sqlite_autoindex_...) таблицы"""
+    rows = db_session.connection().exec_driver_sql(f"PRAGMA index_list({table})").fetchall()
+    return next(row[1] for row in rows if row[3] == "pk")
+
+class TestQueryPlans:
+    """Тесты планов выполнения горячих запросов (EXPLAIN QUERY PLAN)"""
+
+    def test_menu(self, client, db_session, populated, capture_plans):
+        """Меню: блюда с категориями по первичному ключу"""
+        plans = capture_plans(client, "/api/cashier/menu")
+
+        _assert_no_full_scan(plans)
+        categories_pk = _primary_key_index(db_session, "categories")
+        _assert_index_used(plans, f"SEARCH categories USING INDEX {categories_pk} (category_id=?)")
+
+    def test_today_orders(self, client, populated, capture_plans):
+        """Заказы за сегодня: день по индексу business_day, уже по порядку времени"""
+        plans = capture_plans(client, "/api/cashier/orders/today")
+
+        _assert_no_full_scan(plans)
+        _assert_index_used(plans, "ix_orders_business_day")
+        _assert_index_used(plans, "ix_order_items_order_id")
+        assert not [step for step in _steps(plans) if "TEMP B-TREE" in step]
+
+    def test_orders_by_date(self, client, populated, capture_plans):
+        """Заказы за период: диапазон по индексу business_day"""
+        params = {
+            "start_date": (business_date() - timedelta(days=7)).isoformat(),
+            "end_date": business_date().isoformat(),
+        }
+        plans = capture_plans(client, "/api/admin/orders/by-date", params=params)
+
+        _assert_no_full_scan(plans)
+        _assert_index_used(plans, "ix_orders_business_day")
+
+    def test_order_details(self, client, populated, capture_plans):
+        """Детали заказа: поиск по ключу и позиции по индексу order_id"""
+        order_id = populated[0].order_id
+        plans = capture_plans(client, f"/api/cashier/orders/{order_id}")
+
+        _assert_no_full_scan(plans)
+        _assert_index_used(plans, "ix_order_items_order_id")
+
+    def test_order_details_batch(self, client, populated, capture_plans):
+        """Пакет деталей: заказы по ключу, позиции по индексу order_id"""
+        ids = [order.order_id for order in populated[:50]]
+        plans = capture_plans(client, "/api/cashier/orders/details", params={"ids": ids})
+
+        _assert_no_full_scan(plans)
+        _assert_index_used(plans, "ix_order_items_order_id")
+
+    def test_daily_report(self, client, populated, capture_plans):
+        """Отчет за день: день по индексу business_day, без сортировки"""
+        plans = capture_plans(client, "/api/reports/daily")
+
+        _assert_no_full_scan(plans)
+        _assert_index_used(plans, "ix_orders_business_day")
+        assert not [step for step in _steps(plans) if "TEMP B-TREE" in step]
+
+    def test_category_report(self, client, populated, capture_plans):
+        """Отчет по категориям: заказы периода по индексу, позиции по order_id"""
+        plans = capture_plans(client, "/api/reports/by-category")
+
+        _assert_no_full_scan(plans)
+        _assert_index_used(plans, "ix_orders_business_day")
+        _assert_index_used(plans, "ix_order_items_order_id")
+
+    def test_popular_dishes(self, client, db_session, populated, capture_plans):
+        """Популярные блюда: агрегация без просмотра таблицы order_items"""
+        plans = capture_plans(client, "/api/reports/popular-dishes")
+
+        _assert_no_full_scan(plans)
+        _assert_index_used(plans, "SEARCH order_items USING INDEX ix_order_items_dish_id (dish_id=?)")
+        categories_pk = _primary_key_index(db_session, "categories")
+        _assert_index_used(plans, f"SEARCH categories USING INDEX {categories_pk} (category_id=?)")
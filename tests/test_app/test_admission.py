@@ -0,0 +1,128 @@
+import asyncio
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from backend.src.admission import (
+    ADMISSION_REJECTED, AdmissionController, ClassLimiter, Rejected, parse_limits, route_class
+)
+from backend.src.middleware import AdmissionMiddleware
+
+class TestRouteClasses:
+    """Тесты классификации маршрутов"""
+
+    @pytest.mark.parametrize("method, path, expected", [
+        ("POST", "/api/cashier/order", "ordering"),
+        ("POST", "/api/cashier/orders/batch", "ordering"),
+        ("GET", "/api/cashier/menu", "menu"),
+        ("GET", "/api/admin/dishes", "menu"),
+        ("GET", "/api/cashier/orders/today", "listings"),
+        ("GET", "/api/admin/orders/by-date", "listings"),
+        ("GET", "/api/reports/by-category", "reports"),
+        ("PUT", "/api/admin/dishes/1", None),
+        ("GET", "/health", None),
+        ("GET", "/static/app.css", None),
+    ])
+    def test_route_class(self, method, path, expected):
+        """Тест класса маршрута"""
+        assert route_class(method, path) == expected
+
+    def test_parse_limits(self):
+        """Тест переопределения лимитов из строки настроек"""
+        # Act
+        limits = parse_limits("reports=1:2, listings=3")
+
+        # Assert
+        assert limits["reports"][:2] == (1, 2)
+        assert limits["listings"][0] == 3
+        assert limits["ordering"] == parse_limits("")["ordering"]
+        with pytest.raises(ValueError):
+            parse_limits("unknown=1:1")
+
+class TestClassLimiter:
+    """Тесты лимитера класса"""
+
+    def test_queue_full(self):
+        """Тест: при заполненной очереди запрос отклоняется сразу"""
+        async def scenario():
+            limiter = ClassLimiter("test_queue", concurrency=1, queue_size=1, retry_after=7)
+            await limiter.acquire()
+            waiter = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+
+            with pytest.raises(Rejected) as rejected:
+                await limiter.acquire()
+
+            limiter.release()
+            await waiter
+            limiter.release()
+            return rejected.value, limiter
+
+        # Act
+        rejected, limiter = asyncio.run(scenario())
+
+        # Assert
+        assert (rejected.reason, rejected.retry_after) == ("queue_full", 7)
+        assert (limiter.in_flight, limiter.waiting) == (0, 0)
+        assert ADMISSION_REJECTED.value("test_queue", "queue_full") == 1
+
+    def test_wait_timeout(self):
+        """Тест: ожидание в очереди ограничено по времени"""
+        async def scenario():
+            limiter = ClassLimiter("test_timeout", concurrency=1, queue_size=5, retry_after=1, timeout=0.01)
+            await limiter.acquire()
+            with pytest.raises(Rejected) as rejected:
+                await limiter.acquire()
+            return rejected.value, limiter
+
+        # Act
+        rejected, limiter = asyncio.run(scenario())
+
+        # Assert
+        assert rejected.reason == "timeout"
+        assert (limiter.in_flight, limiter.waiting) == (1, 0)
+
+class TestAdmissionMiddleware:
+    """Тесты 503 и резерва для приема заказов"""
+
+    def test_reports_shed_orders_admitted(self):
+        """Тест: лишний отчет получает 503, заказ проходит"""
+        async def scenario():
+            release = asyncio.Event()
+
+            async def report(request):
+                await release.wait()
+                return PlainTextResponse("report")
+
+            async def order(request):
+                return PlainTextResponse("order")
+
+            app = Starlette(routes=[
+                Route("/api/reports/by-category", report),
+                Route("/api/cashier/order", order, methods=["POST"]),
+            ])
+            limits = {"ordering": (1, 1, 1), "reports": (1, 0, 30)}
+            app.add_middleware(AdmissionMiddleware, controller=AdmissionController(limits))
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                running = asyncio.ensure_future(client.get("/api/reports/by-category"))
+                await asyncio.sleep(0.05)
+
+                shed = await client.get("/api/reports/by-category")
+                ordered = await client.post("/api/cashier/order")
+
+                release.set()
+                first = await running
+            return first, shed, ordered
+
+        # Act
+        first, shed, ordered = asyncio.run(scenario())
+
+        # Assert
+        assert first.status_code == 200
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "30"
+        assert ordered.status_code == 200
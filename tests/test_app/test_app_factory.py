@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine, inspect
+from backend.src.app import create_app
+from backend.src.database import create_tables, SCHEMA_VERSION
+
+class TestAppFactory:
+    """Тесты фабрики приложения и инициализации схемы"""
+
+    def test_create_app_registers_routers(self):
+        """Тест подключения роутеров фабрикой"""
+        # Act
+        app = create_app(lifespan=None)
+        paths = {route.path for route in app.routes}
+
+        # Assert
+        assert "/api/cashier/menu" in paths
+        assert "/api/admin/dishes" in paths
+        assert "/api/reports/daily" in paths
+        assert "/health" in paths
+
+    def test_create_tables_runs_once_per_schema_version(self, tmp_path):
+        """Тест: схема проверяется один раз на версию, а не на каждый старт"""
+        # Arrange
+        engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+
+        # Act
+        first = create_tables(bind=engine)
+        second = create_tables(bind=engine)
+
+        # Assert
+        assert first is True
+        assert second is False
+        assert "orders" in inspect(engine).get_table_names()
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA user_version").scalar() == SCHEMA_VERSION
+
+    def test_create_tables_force(self, tmp_path):
+        """Тест принудительной проверки схемы"""
+        # Arrange
+        engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+        create_tables(bind=engine)
+
+        # Act & Assert
+        assert create_tables(bind=engine, force=True) is True
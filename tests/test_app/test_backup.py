@@ -0,0 +1,169 @@
+import sqlite3
+import pytest
+from decimal import Decimal
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.src import backup
+from backend.src.backup import BackupScheduler, copy_database, create_backup, list_backups, restore_backup
+from backend.src.database import create_tables
+from backend.src.models import Category, Dish
+
+@pytest.fixture
+def live_db(tmp_path):
+    """Файловая БД с меню из 300 блюд (несколько десятков страниц)"""
+    path = str(tmp_path / "canteen.db")
+    engine = create_engine(f"sqlite:///{path}")
+    create_tables(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        soups = Category(name="Супы")
+        db.add(soups)
+        db.flush()
+        db.add_all(
+            Dish(name=f"Суп {n} " + "x" * 200, price=Decimal("100.00"), category_id=soups.category_id)
+            for n in range(300)
+        )
+        db.commit()
+    yield engine
+    engine.dispose()
+
+def _scalar(path, sql):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(sql).fetchone()[0]
+    finally:
+        connection.close()
+
+def _dish_count(path):
+    return _scalar(path, "SELECT count(*) FROM dishes")
+
+class TestCopyDatabase:
+    """Тесты копирования через backup API"""
+
+    def test_copy_in_steps(self, live_db, tmp_path):
+        """Тест: копия по шагам совпадает с базой и проходит проверку"""
+        # Arrange
+        target = str(tmp_path / "copy.db")
+
+        # Act
+        stats = copy_database(live_db.url.database, target, pages=5, pause=0)
+
+        # Assert
+        assert stats["steps"] > 1
+        assert stats["restarts"] == 0
+        assert _dish_count(target) == 300
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_writes_during_copy(self, live_db, tmp_path, monkeypatch):
+        """Тест: запись между шагами перезапускает копирование, копия согласована"""
+        # Arrange: каждая пауза между шагами - запись другим соединением
+        writer = sqlite3.connect(live_db.url.database)
+        def write(seconds):
+            writer.execute("UPDATE dishes SET price = price + 1 WHERE rowid = 1")
+            writer.commit()
+        monkeypatch.setattr(backup.time, "sleep", write)
+        target = str(tmp_path / "copy.db")
+
+        # Act
+        stats = copy_database(live_db.url.database, target, pages=5, pause=0.01, max_restarts=2)
+        writer.close()
+
+        # Assert
+        assert stats["restarts"] == 2
+        assert _dish_count(target) == 300
+        price = "SELECT price FROM dishes WHERE rowid = 1"
+        assert _scalar(target, price) == _scalar(live_db.url.database, price)
+
+    def test_memory_database_rejected(self):
+        """Тест: базу в памяти копировать нельзя"""
+        with pytest.raises(backup.BackupError):
+            create_backup(create_engine("sqlite:///:memory:"))
+
+class TestBackupFiles:
+    """Тесты каталога копий и восстановления"""
+
+    def test_rotation(self, live_db, tmp_path):
+        """Тест: хранятся только keep последних копий"""
+        # Arrange
+        directory = str(tmp_path / "backups")
+
+        # Act
+        reports = [create_backup(live_db, directory, keep=2, pause=0) for _ in range(3)]
+
+        # Assert
+        names = [item["name"] for item in list_backups(directory)]
+        assert names == [reports[2]["name"], reports[1]["name"]]
+        assert reports[0]["bytes"] == reports[2]["bytes"]
+
+    def test_restore(self, live_db, tmp_path):
+        """Тест: восстановление возвращает данные на момент копии"""
+        # Arrange
+        report = create_backup(live_db, str(tmp_path / "backups"), pause=0)
+        with live_db.begin() as conn:
+            conn.exec_driver_sql("DELETE FROM dishes")
+
+        # Act
+        restore_backup(report["path"], live_db.url.database)
+
+        # Assert
+        assert _dish_count(live_db.url.database) == 300
+
+    def test_restore_rejects_damaged_backup(self, live_db, tmp_path):
+        """Тест: поврежденная копия не восстанавливается"""
+        # Arrange
+        damaged = tmp_path / "canteen-damaged.db"
+        damaged.write_bytes(b"not a database" * 100)
+
+        # Act / Assert
+        with pytest.raises(sqlite3.DatabaseError):
+            restore_backup(str(damaged), live_db.url.database)
+        assert _dish_count(live_db.url.database) == 300
+
+    def test_schedule_due(self, live_db, tmp_path):
+        """Тест: плановая копия нужна, когда последней нет или она старая"""
+        # Arrange
+        scheduler = BackupScheduler(live_db, directory=str(tmp_path / "backups"), interval=3600)
+
+        # Act
+        due_empty = scheduler._seconds_until_due()
+        create_backup(live_db, scheduler.directory, pause=0)
+
+        # Assert
+        assert due_empty == 0
+        assert 3500 < scheduler._seconds_until_due() <= 3600
+
+class TestBackupEndpoint:
+    """Тесты эндпоинтов резервных копий"""
+
+    def test_create_and_list(self, client, live_db, tmp_path, monkeypatch):
+        """Тест: копия по запросу администратора и список копий"""
+        # Arrange
+        from backend.src import profiling
+        monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(client.app.state, "backups", BackupScheduler(
+            live_db, directory=str(tmp_path / "backups"), interval=0
+        ))
+        headers = {"X-Admin-Token": "secret"}
+
+        # Act
+        created = client.post("/api/admin/diagnostics/backups", headers=headers)
+        listed = client.get("/api/admin/diagnostics/backups", headers=headers)
+
+        # Assert
+        assert created.status_code == 200
+        assert created.json()["bytes"] > 0
+        assert listed.json()["enabled"] is True
+        assert [item["name"] for item in listed.json()["backups"]] == [created.json()["name"]]
+        assert listed.json()["last_report"]["name"] == created.json()["name"]
+
+    def test_memory_database_conflict(self, client, monkeypatch):
+        """Тест: для базы в памяти - 409"""
+        # Arrange
+        from backend.src import profiling
+        monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+
+        # Act
+        response = client.post("/api/admin/diagnostics/backups", headers={"X-Admin-Token": "secret"})
+
+        # Assert
+        assert response.status_code == 409
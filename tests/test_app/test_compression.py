@@ -0,0 +1,153 @@
+import gzip
+import pytest
+from decimal import Decimal
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from starlette.testclient import TestClient
+
+from backend.src.middleware import CompressionMiddleware, _accepted_encoding
+from backend.src.models import Category, Dish
+
+BIG_TEXT = '{"order_id": "x", "total_amount": 100.0}' * 200
+
+async def big(request):
+    return PlainTextResponse(BIG_TEXT)
+
+async def small(request):
+    return PlainTextResponse("ok")
+
+async def image(request):
+    return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+async def precompressed(request):
+    return Response(
+        gzip.compress(BIG_TEXT.encode()),
+        media_type="application/javascript",
+        headers={"Content-Encoding": "gzip"}
+    )
+
+async def stream(request):
+    async def chunks():
+        for _ in range(5):
+            yield BIG_TEXT[:500]
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+@pytest.fixture
+def compress_client():
+    app = Starlette(routes=[
+        Route("/big", big),
+        Route("/small", small),
+        Route("/image", image),
+        Route("/precompressed", precompressed),
+        Route("/stream", stream),
+    ])
+    app.add_middleware(CompressionMiddleware, minimum_size=1000)
+    return TestClient(app)
+
+class TestCompressionMiddleware:
+    """Тесты сжатия ответов"""
+
+    def test_large_response_gzipped(self, compress_client):
+        """Тест сжатия ответа больше порога"""
+        # Act
+        response = compress_client.get("/big", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < len(BIG_TEXT)
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.text == BIG_TEXT
+
+    def test_small_response_not_compressed(self, compress_client):
+        """Тест ответа меньше порога"""
+        # Act
+        response = compress_client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert "content-encoding" not in response.headers
+        assert response.text == "ok"
+
+    def test_identity_requested(self, compress_client):
+        """Тест клиента без поддержки сжатия"""
+        # Act
+        response = compress_client.get("/big", headers={"Accept-Encoding": "identity"})
+
+        # Assert
+        assert "content-encoding" not in response.headers
+        assert response.text == BIG_TEXT
+
+    def test_image_skipped(self, compress_client):
+        """Тест пропуска уже сжатых форматов (картинки)"""
+        # Act
+        response = compress_client.get("/image", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert "content-encoding" not in response.headers
+        assert response.content == b"\x89PNG" * 1000
+
+    def test_precompressed_not_compressed_twice(self, compress_client):
+        """Тест заранее сжатого файла: повторно не сжимается"""
+        # Act
+        response = compress_client.get("/precompressed", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == BIG_TEXT
+
+    def test_streaming_response(self, compress_client):
+        """Тест потокового сжатия без Content-Length"""
+        # Act
+        response = compress_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text == BIG_TEXT[:500] * 5
+
+    def test_etag_weak_when_compressed(self, tmp_path):
+        """Тест: у сжатого файла слабый ETag, 304 по нему работает"""
+        # Arrange
+        (tmp_path / "app.js").write_text(BIG_TEXT)
+        app = Starlette(routes=[Mount("/static", StaticFiles(directory=tmp_path))])
+        app.add_middleware(CompressionMiddleware, minimum_size=1000)
+        client = TestClient(app)
+
+        # Act
+        plain = client.get("/static/app.js", headers={"Accept-Encoding": "identity"})
+        compressed = client.get("/static/app.js", headers={"Accept-Encoding": "gzip"})
+        revalidated = client.get("/static/app.js", headers={
+            "Accept-Encoding": "gzip", "If-None-Match": compressed.headers["etag"]
+        })
+
+        # Assert
+        assert not plain.headers["etag"].startswith("W/")
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["etag"] == "W/" + plain.headers["etag"]
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == compressed.headers["etag"]
+
+    def test_accept_encoding_quality(self):
+        """Тест разбора q-значений Accept-Encoding"""
+        assert _accepted_encoding("gzip;q=0, deflate") is None
+        assert _accepted_encoding("deflate, gzip;q=0.5") == "gzip"
+        assert _accepted_encoding("") is None
+
+    def test_api_listing_compressed(self, client, db_session):
+        """Тест сжатия JSON ответа API"""
+        # Arrange
+        category = Category(name="Супы")
+        db_session.add(category)
+        db_session.flush()
+        for i in range(40):
+            db_session.add(Dish(name=f"Блюдо {i}", price=Decimal("100.00"), category_id=category.category_id))
+        db_session.commit()
+
+        # Act
+        response = client.get("/api/cashier/menu", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()["Супы"]) == 40
@@ -0,0 +1,273 @@
+import json
+import pytest
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from backend.src.api import reports
+from backend.src.database import create_tables
+from backend.src.maintenance import Maintenance, MaintenanceScheduler, database_stats, in_window, parse_window
+from backend.src.models import Category, DailyDishSales, Dish, Order, OrderItem, business_date
+
+@pytest.fixture
+def file_engine(tmp_path):
+    """Отдельная файловая БД: обслуживание коммитит и меняет сам файл"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'canteen.db'}")
+    create_tables(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def history(file_engine):
+    """Заказы за последние 10 дней: по два блюда в каждом"""
+    Session = sessionmaker(bind=file_engine)
+    with Session() as db:
+        soups = Category(name="Супы")
+        db.add(soups)
+        db.flush()
+        borsch = Dish(name="Борщ", price=Decimal("120.50"), category_id=soups.category_id)
+        shchi = Dish(name="Щи", price=Decimal("100.00"), category_id=soups.category_id)
+        db.add_all([borsch, shchi])
+        db.flush()
+        today = business_date()
+        for days_ago in range(10):
+            moment = datetime.combine(today - timedelta(days=days_ago), time(12, 0))
+            for n in range(3):
+                order = Order(order_date=moment + timedelta(minutes=n), total_amount=Decimal("340.50"))
+                db.add(order)
+                db.flush()
+                db.add_all([
+                    OrderItem(order_id=order.order_id, dish_id=borsch.dish_id, quantity=2,
+                              item_total=Decimal("241.00"), dish_name="Борщ", price_per_item=Decimal("120.50")),
+                    OrderItem(order_id=order.order_id, dish_id=shchi.dish_id, quantity=1,
+                              item_total=Decimal("100.00"), dish_name="Щи", price_per_item=Decimal("100.00")),
+                ])
+        db.commit()
+    return Session
+
+def _reports(Session):
+    today = business_date()
+    with Session() as db:
+        week = json.loads(reports.category_report(db, today - timedelta(days=7), today).body)
+        month = json.loads(reports.category_report(db, today - timedelta(days=30), today).body)
+        popular = reports.get_popular_dishes(limit=10, db=db)
+    return week, month, popular
+
+class TestMaintenanceWindow:
+    """Тесты окна обслуживания"""
+
+    def test_parse_window(self):
+        """Тест: окно разбирается из ЧЧ:ММ-ЧЧ:ММ"""
+        assert parse_window("02:00-05:30") == (time(2, 0), time(5, 30))
+        with pytest.raises(ValueError):
+            parse_window("ночью")
+
+    def test_window_wraps_midnight(self):
+        """Тест: окно через полночь"""
+        # Arrange
+        window = parse_window("23:00-04:00")
+
+        # Assert
+        assert in_window(time(23, 30), window)
+        assert in_window(time(1, 0), window)
+        assert not in_window(time(4, 0), window)
+        assert not in_window(time(12, 0), window)
+        assert in_window(time(3, 0), parse_window("02:00-05:00"))
+
+class TestRetention:
+    """Тесты сворачивания старых позиций заказов"""
+
+    def test_reports_unchanged_after_compaction(self, file_engine, history):
+        """Тест: отчеты совпадают до и после сворачивания, старые позиции удалены"""
+        # Arrange
+        before = _reports(history)
+
+        # Act
+        report = Maintenance(file_engine, retention_days=5, pause=0).run(budget=60)
+
+        # Assert
+        assert report["status"] == "completed"
+        # Хранятся сегодняшний день и 5 предыдущих, свернуты 4 дня
+        assert report["steps"]["retention"]["runs"] == 4
+        assert report["steps"]["retention"]["rows"] == 4 * 3 * 2
+        assert _reports(history) == before
+        with history() as db:
+            assert db.query(OrderItem).count() == 6 * 3 * 2
+            assert db.query(DailyDishSales).count() == 4 * 2
+            assert db.query(Order).count() == 10 * 3
+            borsch = db.query(DailyDishSales).filter_by(dish_name="Борщ").first()
+            assert (borsch.quantity, borsch.revenue) == (6, Decimal("723.00"))
+
+    def test_compaction_idempotent(self, file_engine, history):
+        """Тест: повторный запуск не трогает уже свернутые дни"""
+        # Arrange
+        maintenance = Maintenance(file_engine, retention_days=5, pause=0)
+        maintenance.run(budget=60)
+        before = _reports(history)
+
+        # Act
+        report = maintenance.run(budget=60)
+
+        # Assert
+        assert report["steps"]["retention"]["rows"] == 0
+        assert _reports(history) == before
+
+    def test_compaction_invalidates_cache(self, file_engine, history):
+        """Тест: прогретые отчеты по заказам сбрасываются после сворачивания"""
+        # Arrange
+        from backend.src.precompute import CACHE, Snapshot
+        CACHE.put("daily", Snapshot(b"{}", "application/json", {}), {"orders"}, CACHE.generation(("orders",)))
+
+        # Act
+        Maintenance(file_engine, retention_days=5, pause=0).run(budget=60)
+
+        # Assert
+        assert "daily" not in CACHE._entries
+
+    def test_daily_report_flags_rolled_up_day(self, file_engine, history):
+        """Тест: в отчете за свернутый день суммы есть, число позиций - null"""
+        # Arrange
+        Maintenance(file_engine, retention_days=5, pause=0).run(budget=60)
+        today = business_date()
+
+        # Act
+        with history() as db:
+            old = json.loads(reports.daily_report(db, today - timedelta(days=7)).body)
+            recent = json.loads(reports.daily_report(db, today).body)
+
+        # Assert
+        assert old["items_rolled_up"] is True
+        assert Decimal(str(old["daily_total"])) == Decimal("340.50") * 3
+        assert [order["item_count"] for order in old["orders"]] == [None] * 3
+        assert recent["items_rolled_up"] is False
+        assert [order["item_count"] for order in recent["orders"]] == [2] * 3
+
+    def test_retention_disabled_by_default(self, file_engine, history):
+        """Тест: без срока хранения позиции не удаляются"""
+        # Act
+        report = Maintenance(file_engine, retention_days=0, pause=0).run(budget=60)
+
+        # Assert
+        assert "retention" not in report["steps"]
+        with history() as db:
+            assert db.query(OrderItem).count() == 10 * 3 * 2
+
+class TestIncrementalVacuum:
+    """Тесты сжатия файла базы"""
+
+    def test_new_database_incremental(self, file_engine):
+        """Тест: новая база создается с auto_vacuum=INCREMENTAL"""
+        assert database_stats(file_engine)["auto_vacuum"] == "incremental"
+
+    def test_free_pages_returned(self, file_engine, history):
+        """Тест: после удаления данных файл уменьшается по частям"""
+        # Arrange
+        with history() as db:
+            db.add_all(Category(name=f"Категория {n} " + "x" * 500) for n in range(2000))
+            db.commit()
+            db.query(Category).filter(Category.name.like("Категория %")).delete(synchronize_session=False)
+            db.commit()
+
+        # Act
+        report = Maintenance(file_engine, vacuum_pages=50, pause=0).run(budget=60)
+
+        # Assert
+        before, after = report["before"], report["after"]
+        assert before["freelist_count"] > 100
+        assert after["freelist_count"] == 0
+        assert after["page_count"] < before["page_count"]
+        assert after["file_bytes"] < before["file_bytes"]
+        assert report["steps"]["incremental_vacuum"]["runs"] > 1
+        assert report["steps"]["incremental_vacuum"]["rows"] == before["freelist_count"]
+        assert report["steps"]["analyze"]["runs"] == 1
+
+    def test_stops_when_freelist_not_shrinking(self, file_engine, history):
+        """Тест: если шаг не освобождает страниц, сжатие прекращается, а не ждет бюджета"""
+        # Arrange
+        with history() as db:
+            db.add_all(Category(name=f"Категория {n} " + "x" * 500) for n in range(500))
+            db.commit()
+            db.query(Category).filter(Category.name.like("Категория %")).delete(synchronize_session=False)
+            db.commit()
+        maintenance = Maintenance(file_engine, pause=0)
+        maintenance._vacuum_step = lambda: 0
+
+        # Act
+        report = maintenance.run(budget=60)
+
+        # Assert
+        assert report["status"] == "completed"
+        assert report["steps"]["incremental_vacuum"]["runs"] == 1
+        assert report["after"]["freelist_count"] > 0
+        assert report["steps"]["analyze"]["runs"] == 1
+
+    def test_budget_exhausted(self, file_engine, history):
+        """Тест: с нулевым бюджетом шаги не выполняются"""
+        # Act
+        report = Maintenance(file_engine, retention_days=5, pause=0).run(budget=0)
+
+        # Assert
+        assert report["status"] == "budget_exhausted"
+        assert report["steps"] == {}
+        with history() as db:
+            assert db.query(func.count(OrderItem.order_item_id)).scalar() == 10 * 3 * 2
+
+class TestMaintenanceEndpoint:
+    """Тесты эндпоинтов обслуживания"""
+
+    def test_requires_admin(self, client):
+        """Тест: без токена администратора - 403"""
+        assert client.get("/api/admin/diagnostics/maintenance").status_code == 403
+
+    def test_status_and_run(self, client, monkeypatch, file_engine, history):
+        """Тест: статус и запуск вне расписания"""
+        # Arrange
+        from backend.src import profiling
+        monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(client.app.state, "maintenance", MaintenanceScheduler(
+            file_engine, maintenance=Maintenance(file_engine, retention_days=5, pause=0)
+        ))
+        headers = {"X-Admin-Token": "secret"}
+
+        # Act
+        status = client.get("/api/admin/diagnostics/maintenance", headers=headers)
+        run = client.post("/api/admin/diagnostics/maintenance/run", headers=headers)
+        last = client.get("/api/admin/diagnostics/maintenance", headers=headers)
+
+        # Assert
+        assert status.status_code == 200
+        assert status.json()["enabled"] is True
+        assert status.json()["window"] == "02:00-05:00"
+        assert status.json()["last_report"] is None
+        assert status.json()["database"]["auto_vacuum"] == "incremental"
+        assert run.status_code == 200
+        assert run.json()["status"] == "completed"
+        assert run.json()["steps"]["retention"]["rows"] == 4 * 3 * 2
+        assert last.json()["last_report"]["after"]["page_count"] > 0
+
+class TestRolledUpDish:
+    """Тесты блюд, продажи которых свернуты в итоги"""
+
+    def test_delete_blocked(self, client, db_session):
+        """Тест: блюдо с итогами продаж не удаляется (итоги выпали бы из отчетов)"""
+        # Arrange
+        soups = Category(name="Супы")
+        db_session.add(soups)
+        db_session.flush()
+        borsch = Dish(name="Борщ", price=Decimal("120.50"), category_id=soups.category_id)
+        db_session.add(borsch)
+        db_session.flush()
+        db_session.add(DailyDishSales(
+            business_day=20240315, dish_id=borsch.dish_id, dish_name="Борщ",
+            quantity=3, revenue=Decimal("361.50")
+        ))
+        db_session.commit()
+
+        # Act
+        response = client.delete(f"/api/admin/dishes/{borsch.dish_id}")
+
+        # Assert
+        assert response.status_code == 400
+        assert "итогах продаж" in response.json()["detail"]
+        assert db_session.get(Dish, borsch.dish_id) is not None
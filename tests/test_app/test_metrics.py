@@ -0,0 +1,100 @@
+import sys
+import threading
+import pytest
+from backend.src.metrics import Registry
+
+class TestMetricsRegistry:
+    """Тесты метрик в формате Prometheus"""
+
+    def test_histogram_render(self):
+        """Тест кумулятивных корзин гистограммы"""
+        # Arrange
+        registry = Registry()
+        histogram = registry.histogram("latency", "Время", ("route",), buckets=(0.1, 1.0))
+
+        # Act
+        histogram.observe(0.05, "/menu")
+        histogram.observe(0.5, "/menu")
+        histogram.observe(5.0, "/menu")
+        text = registry.render()
+
+        # Assert
+        assert '# TYPE latency histogram' in text
+        assert 'latency_bucket{route="/menu",le="0.1"} 1' in text
+        assert 'latency_bucket{route="/menu",le="1"} 2' in text
+        assert 'latency_bucket{route="/menu",le="+Inf"} 3' in text
+        assert 'latency_count{route="/menu"} 3' in text
+
+    def test_counter_label_escaping(self):
+        """Тест экранирования значений меток"""
+        # Arrange
+        registry = Registry()
+        counter = registry.counter("hits", "Попадания", ("path",))
+
+        # Act
+        counter.inc('a"b')
+        counter.inc('a"b', amount=2)
+
+        # Assert
+        assert 'hits{path="a\\"b"} 3' in registry.render()
+
+    def test_updates_from_threads(self):
+        """Тест: обновления из рабочих потоков не теряются и не ломают рендеринг"""
+        # Arrange: частое переключение потоков, чтобы гонки проявлялись
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        registry = Registry()
+        counter = registry.counter("steps", "Шаги", ("job",))
+        histogram = registry.histogram("seconds", "Время", ("job",), buckets=(0.1, 1.0))
+        def work(n):
+            for i in range(2000):
+                counter.inc(f"job{i % 5}")
+                histogram.observe(0.5, f"job{n}-{i % 50}")
+                if i % 200 == 0:
+                    registry.render()
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+
+        # Act
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        # Assert
+        assert sum(counter.value(f"job{j}") for j in range(5)) == 8 * 2000
+        assert sum(histogram.count(f"job{n}-{k}") for n in range(8) for k in range(50)) == 8 * 2000
+
+    def test_metrics_endpoint_uses_route_templates(self, client):
+        """Тест: /metrics группирует запросы по шаблону маршрута"""
+        # Act
+        client.get("/api/cashier/menu")
+        client.get("/api/cashier/orders/unknown-id")
+        response = client.get("/metrics")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'route="/api/cashier/menu",status="200"' in response.text
+        assert 'route="/api/cashier/orders/{order_id}"' in response.text
+        assert "unknown-id" not in response.text
+
+    def test_conditional_request_keeps_route(self, client):
+        """Тест: перепроверка по слабому ETag (304) учитывается по своему маршруту"""
+        # Arrange
+        headers = {"Accept-Encoding": "gzip"}
+        first = client.get("/static/js/reports.js", headers=headers)
+
+        # Act
+        revalidated = client.get(
+            "/static/js/reports.js", headers={**headers, "If-None-Match": first.headers["etag"]}
+        )
+        response = client.get("/metrics")
+
+        # Assert
+        assert first.headers["etag"].startswith("W/")
+        assert revalidated.status_code == 304
+        assert 'route="/static/{path}",status="304"' in response.text
+        assert 'route="<unmatched>",status="304"' not in response.text
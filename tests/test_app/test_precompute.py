@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import pytest
+from decimal import Decimal
+from sqlalchemy.orm import sessionmaker
+from starlette.responses import Response
+
+from backend.src.models import Category, Dish
+from backend.src.precompute import CACHE, Job, PrecomputedCache, Scheduler, Snapshot
+
+@pytest.fixture
+def warmed(db_session):
+    """Меню из двух блюд и прогретый кэш на тестовой БД"""
+    soups = Category(name="Супы")
+    db_session.add(soups)
+    db_session.flush()
+    borsch = Dish(name="Борщ", price=Decimal("120.50"), category_id=soups.category_id)
+    db_session.add_all([borsch, Dish(name="Щи", price=Decimal("100.00"), category_id=soups.category_id)])
+    db_session.commit()
+
+    CACHE.engine = db_session.get_bind()
+    scheduler = Scheduler(sessionmaker(bind=db_session.get_bind()))
+    for job in scheduler.jobs:
+        scheduler.run_job(job)
+    yield {"scheduler": scheduler, "dish": borsch}
+    CACHE.engine = None
+    CACHE.clear()
+
+class TestPrecomputedResponses:
+    """Тесты прогретых ответов"""
+
+    def test_warmed_responses_served(self, client, warmed):
+        """Тест: меню и отчеты отдаются из кэша и совпадают с живым расчетом"""
+        # Act
+        menu = client.get("/api/cashier/menu")
+        report = client.get("/api/reports/by-category")
+        CACHE.clear()
+        live_menu = client.get("/api/cashier/menu")
+
+        # Assert
+        assert len(warmed["scheduler"].jobs) == 4
+        assert all(job.last_error is None for job in warmed["scheduler"].jobs)
+        assert menu.headers["x-precomputed"] == "1"
+        assert report.headers["x-precomputed"] == "1"
+        assert menu.json() == live_menu.json()
+        assert menu.headers["x-menu-version"] == live_menu.headers["x-menu-version"]
+        assert "x-precomputed" not in live_menu.headers
+
+    def test_write_invalidates(self, client, warmed):
+        """Тест: изменение блюда сразу убирает зависящие ответы"""
+        # Arrange
+        dish = warmed["dish"]
+
+        # Act
+        client.put(f"/api/admin/dishes/{dish.dish_id}", json={"price": 135.0})
+        menu = client.get("/api/cashier/menu")
+        daily = client.get("/api/reports/daily")
+
+        # Assert
+        assert "x-precomputed" not in menu.headers
+        assert menu.json()["Супы"][0]["price"] == 135.0
+        assert daily.headers["x-precomputed"] == "1"
+        assert len(CACHE) == 1
+
+    def test_other_database_not_served(self, client, warmed):
+        """Тест: кэш, прогретый на другом engine, не используется"""
+        # Arrange
+        CACHE.engine = object()
+
+        # Act
+        response = client.get("/api/cashier/menu")
+
+        # Assert
+        assert "x-precomputed" not in response.headers
+
+    def test_stale_result_discarded(self):
+        """Тест: ответ, посчитанный до изменения данных, не сохраняется"""
+        # Arrange
+        cache = PrecomputedCache()
+        generation = cache.generation({"orders"})
+        snapshot = Snapshot.from_response(Response(b"{}", media_type="application/json"))
+
+        # Act
+        cache.invalidate(frozenset({"orders"}))
+        stored = cache.put(("daily",), snapshot, {"orders"}, generation)
+
+        # Assert
+        assert stored is False
+        assert len(cache) == 0
+
+class TestScheduler:
+    """Тесты фонового планировщика"""
+
+    def test_jobs_do_not_overlap_and_rerun_on_invalidate(self, db_session):
+        """Тест: задачи выполняются по одной, инвалидация запускает пересчет"""
+        runs = []
+        active = []
+        overlaps = []
+        lock = threading.Lock()
+
+        def compute(name):
+            def run(db):
+                with lock:
+                    active.append(name)
+                    overlaps.append(len(active) > 1)
+                threading.Event().wait(0.01)
+                with lock:
+                    active.remove(name)
+                    runs.append(name)
+                return (name,), Response(name.encode())
+            return run
+
+        async def scenario():
+            cache = PrecomputedCache()
+            jobs = [Job("menu", ("menu",), compute("menu")), Job("daily", ("orders",), compute("daily"))]
+            scheduler = Scheduler(
+                sessionmaker(bind=db_session.get_bind()), jobs=jobs, cache=cache,
+                interval=3600, debounce=0
+            )
+            scheduler.start()
+            try:
+                while len(runs) < 2:
+                    await asyncio.sleep(0.01)
+                # Инвалидация из другого потока (как after_commit в пуле)
+                await asyncio.to_thread(cache.invalidate, frozenset({"orders"}))
+                while len(runs) < 3:
+                    await asyncio.sleep(0.01)
+                return scheduler.status(), len(cache)
+            finally:
+                await scheduler.stop()
+
+        # Act
+        status, cached = asyncio.run(asyncio.wait_for(scenario(), 5))
+
+        # Assert
+        assert runs == ["menu", "daily", "daily"]
+        assert not any(overlaps)
+        assert cached == 2
+        assert [job["pending"] for job in status["jobs"]] == [False, False]
+        assert all(job["last_duration_ms"] > 0 for job in status["jobs"])
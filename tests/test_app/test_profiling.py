@@ -0,0 +1,102 @@
+import pytest
+from backend.src import profiling
+
+@pytest.fixture
+def admin_token(monkeypatch, tmp_path):
+    """Токен администратора и временная директория профилей"""
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "PROFILES_DIR", str(tmp_path))
+    return "secret"
+
+@pytest.fixture(params=["pyinstrument", "cprofile"])
+def profiler_backend(request, monkeypatch):
+    """Оба профайлера: pyinstrument (если установлен) и запасной cProfile"""
+    if request.param == "pyinstrument":
+        pytest.importorskip("pyinstrument")
+    else:
+        monkeypatch.setattr(profiling, "pyinstrument", None)
+    return request.param
+
+class TestRequestProfiling:
+    """Тесты профилирования запросов по требованию"""
+
+    def test_profile_saved_for_admin(self, client, admin_token, profiler_backend, tmp_path):
+        """Тест: запрос с флагом и токеном сохраняет профиль обработчика"""
+        # Act
+        response = client.get(
+            "/api/cashier/menu",
+            headers={"X-Profile": "1", "X-Admin-Token": admin_token}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        profile_id = response.headers["X-Profile-Id"]
+        assert "get_menu" in (tmp_path / profile_id).read_text(encoding="utf-8")
+        if profiler_backend == "cprofile":
+            assert (tmp_path / profile_id.replace(".html", ".prof")).exists()
+
+    def test_profile_ignored_without_token(self, client, admin_token, tmp_path):
+        """Тест: без токена запрос не профилируется"""
+        # Act
+        response = client.get("/api/cashier/menu?profile=1")
+
+        # Assert
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.parametrize("query", ["noprofile=1", "xprofile=10", "profile=10", "profile=0"])
+    def test_similar_query_params_ignored(self, client, admin_token, tmp_path, query):
+        """Тест: профилируется только точный параметр profile=1"""
+        # Act
+        response = client.get(f"/api/cashier/menu?{query}", headers={"X-Admin-Token": admin_token})
+
+        # Assert
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+
+    def test_profile_param_among_others(self, client, admin_token, tmp_path):
+        """Тест: profile=1 среди других параметров"""
+        # Act
+        response = client.get("/api/cashier/menu?since=0&profile=1", headers={"X-Admin-Token": admin_token})
+
+        # Assert
+        assert (tmp_path / response.headers["X-Profile-Id"]).exists()
+
+    def test_profiles_listing_requires_admin(self, client, admin_token):
+        """Тест доступа к списку профилей"""
+        # Arrange
+        client.get("/api/reports/daily", headers={"X-Profile": "1", "X-Admin-Token": admin_token})
+
+        # Act
+        forbidden = client.get("/api/admin/diagnostics/profiles")
+        allowed = client.get("/api/admin/diagnostics/profiles", headers={"X-Admin-Token": admin_token})
+
+        # Assert
+        assert forbidden.status_code == 403
+        assert allowed.status_code == 200
+        assert any(p["name"].endswith(".html") for p in allowed.json())
+
+    def test_profile_download_rejects_path_traversal(self, client, admin_token):
+        """Тест: имя профиля не может выходить за пределы директории"""
+        # Act
+        response = client.get(
+            "/api/admin/diagnostics/profiles/..%2F..%2Fcanteen.db",
+            headers={"X-Admin-Token": admin_token}
+        )
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_thread_pool_handler_profiled(self, client, admin_token, profiler_backend, tmp_path):
+        """Тест: обработчик def из пула потоков попадает в профиль"""
+        # Act
+        response = client.get(
+            "/api/reports/by-category?profile=1", headers={"X-Admin-Token": admin_token}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        content = (tmp_path / response.headers["X-Profile-Id"]).read_text(encoding="utf-8")
+        assert "get_category_report" in content
+        assert "category_report" in content
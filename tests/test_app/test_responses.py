@@ -0,0 +1,58 @@
+import json
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+import uuid
+
+from backend.src.responses import FastJSONResponse
+
+class TestFastJSONResponse:
+    """Тесты сериализации ответов"""
+
+    def test_native_types(self):
+        """Тест Decimal, datetime, date и UUID без ручного преобразования"""
+        # Arrange
+        order_id = uuid.uuid4()
+        content = {
+            "order_id": order_id,
+            "order_date": datetime(2024, 1, 15, 12, 30, 5),
+            "date": date(2024, 1, 15),
+            "total_amount": Decimal("250.50"),
+            "name": "Борщ"
+        }
+
+        # Act
+        data = json.loads(FastJSONResponse(content).body)
+
+        # Assert
+        assert data == {
+            "order_id": str(order_id),
+            "order_date": "2024-01-15T12:30:05",
+            "date": "2024-01-15",
+            "total_amount": 250.5,
+            "name": "Борщ"
+        }
+
+    def test_unsupported_type(self):
+        """Тест ошибки для несериализуемого объекта"""
+        # Act & Assert
+        with pytest.raises(TypeError):
+            FastJSONResponse({"value": object()})
+
+    def test_listing_matches_legacy_format(self, client, db_session):
+        """Тест формата списка заказов: числа и ISO даты, как раньше"""
+        # Arrange
+        from backend.src.models import Order, local_order_time
+        order_date = local_order_time().replace(microsecond=0)
+        db_session.add(Order(order_id=str(uuid.uuid4()), order_date=order_date, total_amount=Decimal("99.90")))
+        db_session.commit()
+
+        # Act
+        response = client.get("/api/cashier/orders/today")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        order = response.json()[0]
+        assert order["total_amount"] == 99.9
+        assert order["order_date"] == order_date.isoformat()
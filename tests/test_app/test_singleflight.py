@@ -0,0 +1,199 @@
+import asyncio
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from backend.src.middleware import CoalescingMiddleware
+from backend.src.singleflight import HTTP_COALESCED, SingleFlight, request_key
+
+def _scope(path, query=b"", method="GET", headers=()):
+    return {
+        "type": "http", "method": method, "path": path, "query_string": query,
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+    }
+
+class TestRequestKey:
+    """Тесты ключа объединения запросов"""
+
+    def test_params_order_ignored(self):
+        """Тест: порядок параметров не влияет на ключ"""
+        # Act
+        first = request_key(_scope("/api/reports/by-category", b"start_date=2024-01-01&end_date=2024-01-31"))
+        second = request_key(_scope("/api/reports/by-category", b"end_date=2024-01-31&start_date=2024-01-01"))
+
+        # Assert
+        assert first is not None
+        assert first == second
+
+    def test_encoding_in_key(self):
+        """Тест: клиенты с разным сжатием не получают чужой ответ"""
+        # Act
+        gzip = request_key(_scope("/api/cashier/menu", headers=[("accept-encoding", "gzip")]))
+        plain = request_key(_scope("/api/cashier/menu"))
+
+        # Assert
+        assert gzip != plain
+
+    @pytest.mark.parametrize("scope", [
+        _scope("/api/cashier/order", method="POST"),
+        _scope("/api/cashier/orders/details", b"ids=1"),
+        _scope("/api/cashier/menu", b"profile=1"),
+        _scope("/api/cashier/menu", headers=[("x-profile", "1")]),
+    ])
+    def test_not_coalesced(self, scope):
+        """Тест: записи, прочие маршруты и профилирование не объединяются"""
+        assert request_key(scope) is None
+
+class TestSingleFlight:
+    """Тесты группы single-flight"""
+
+    def test_concurrent_calls_share_result(self):
+        """Тест: параллельные вызовы с одним ключом выполняют fn один раз"""
+        calls = []
+
+        async def scenario():
+            group = SingleFlight()
+            release = asyncio.Event()
+
+            async def fn():
+                calls.append(1)
+                await release.wait()
+                return "menu"
+
+            tasks = [asyncio.ensure_future(group.do("menu", fn)) for _ in range(5)]
+            await asyncio.sleep(0)
+            release.set()
+            return await asyncio.gather(*tasks), len(group)
+
+        # Act
+        results, pending = asyncio.run(scenario())
+
+        # Assert
+        assert len(calls) == 1
+        assert [shared for _, shared in results].count(True) == 4
+        assert {result for result, _ in results} == {"menu"}
+        assert pending == 0
+
+    def test_leader_failure(self):
+        """Тест: при ошибке лидера ожидающие получают None"""
+        async def scenario():
+            group = SingleFlight()
+            release = asyncio.Event()
+
+            async def fail():
+                await release.wait()
+                raise RuntimeError("db")
+
+            leader = asyncio.ensure_future(group.do("menu", fail))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(group.do("menu", fail))
+            await asyncio.sleep(0)
+            release.set()
+
+            with pytest.raises(RuntimeError):
+                await leader
+            return await follower
+
+        # Act & Assert
+        assert asyncio.run(scenario()) == (None, True)
+
+class TestCoalescingMiddleware:
+    """Тесты объединения HTTP запросов"""
+
+    def test_identical_requests_coalesced(self):
+        """Тест: одинаковые запросы получают один ответ, разные - свои"""
+        calls = []
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def menu(request):
+                calls.append(request.url.query)
+                await release.wait()
+                return JSONResponse({"since": request.query_params.get("since")})
+
+            app = Starlette(routes=[Route("/api/cashier/menu", menu)])
+            app.add_middleware(CoalescingMiddleware)
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                requests = [client.get("/api/cashier/menu") for _ in range(5)]
+                requests.append(client.get("/api/cashier/menu", params={"since": 3}))
+                tasks = [asyncio.ensure_future(request) for request in requests]
+                await asyncio.sleep(0.05)
+                release.set()
+                return await asyncio.gather(*tasks)
+
+        before = HTTP_COALESCED.value("/api/cashier/menu")
+
+        # Act
+        responses = asyncio.run(scenario())
+
+        # Assert
+        assert len(calls) == 2
+        assert [r.json() for r in responses] == [{"since": None}] * 5 + [{"since": "3"}]
+        assert [r.headers.get("x-coalesced") for r in responses].count("1") == 4
+        assert HTTP_COALESCED.value("/api/cashier/menu") - before == 4
+
+    def test_large_response_not_shared(self):
+        """Тест: ответ больше max_body ожидающие получают, выполнившись сами"""
+        calls = []
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def menu(request):
+                calls.append(1)
+                await release.wait()
+                return JSONResponse({"dishes": ["Борщ"] * 100})
+
+            app = Starlette(routes=[Route("/api/cashier/menu", menu)])
+            app.add_middleware(CoalescingMiddleware, max_body=100)
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                tasks = [asyncio.ensure_future(client.get("/api/cashier/menu")) for _ in range(3)]
+                await asyncio.sleep(0.05)
+                release.set()
+                return await asyncio.gather(*tasks)
+
+        # Act
+        responses = asyncio.run(scenario())
+
+        # Assert
+        assert len(calls) == 3
+        assert all(r.status_code == 200 and "x-coalesced" not in r.headers for r in responses)
+
+    def test_error_response_not_shared(self):
+        """Тест: ошибку лидера ожидающие не получают, а выполняются сами"""
+        calls = []
+
+        async def scenario():
+            release = asyncio.Event()
+
+            async def menu(request):
+                calls.append(1)
+                await release.wait()
+                if len(calls) == 1:
+                    return JSONResponse({"detail": "Сервер перегружен"}, status_code=503)
+                return JSONResponse({"dishes": ["Борщ"]})
+
+            app = Starlette(routes=[Route("/api/cashier/menu", menu)])
+            app.add_middleware(CoalescingMiddleware)
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                tasks = [asyncio.ensure_future(client.get("/api/cashier/menu")) for _ in range(3)]
+                await asyncio.sleep(0.05)
+                release.set()
+                return await asyncio.gather(*tasks)
+
+        # Act
+        responses = asyncio.run(scenario())
+
+        # Assert
+        assert len(calls) == 3
+        assert [r.status_code for r in responses] == [503, 200, 200]
+        assert all("x-coalesced" not in r.headers for r in responses)
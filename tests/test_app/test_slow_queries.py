@@ -0,0 +1,46 @@
+import pytest
+from backend.src import profiling, slow_queries
+from backend.src.slow_queries import install_slow_query_log
+
+@pytest.fixture
+def slow_log(monkeypatch, tmp_path, db_session):
+    """Журнал медленных запросов с порогом 0 мс на тестовом движке"""
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_MS", 0.0)
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_LOG", str(tmp_path / "slow.log"))
+    monkeypatch.setattr(slow_queries, "_logger", None)
+    monkeypatch.setattr(slow_queries, "_recent", slow_queries.deque(maxlen=10))
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    install_slow_query_log(db_session.bind)
+    yield tmp_path / "slow.log"
+    # Логгер пишет в tmp_path - закрываем обработчики
+    for handler in list(slow_queries._get_logger().handlers):
+        handler.close()
+        slow_queries._get_logger().removeHandler(handler)
+
+class TestSlowQueryLog:
+    """Тесты журнала медленных запросов"""
+
+    def test_slow_query_logged_with_plan_and_route(self, client, slow_log):
+        """Тест: запрос выше порога попадает в журнал с планом и маршрутом"""
+        # Act
+        client.get("/api/cashier/orders/today")
+        response = client.get(
+            "/api/admin/diagnostics/slow-queries", headers={"X-Admin-Token": "secret"}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        entries = response.json()["queries"]
+        orders_query = next(e for e in entries if "FROM orders" in e["statement"])
+        assert orders_query["route"] == "GET /api/cashier/orders/today"
+        assert orders_query["plan"]
+        assert any("orders" in step for step in orders_query["plan"])
+        assert slow_log.exists()
+
+    def test_slow_queries_endpoint_requires_admin(self, client, slow_log):
+        """Тест доступа к журналу медленных запросов"""
+        # Act
+        response = client.get("/api/admin/diagnostics/slow-queries")
+
+        # Assert
+        assert response.status_code == 403
@@ -0,0 +1,152 @@
+import gzip
+import os
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from backend.src.static_assets import (
+    IMMUTABLE_CACHE, REVALIDATE_CACHE, FrontendFiles, build_assets, is_fingerprinted, is_stale
+)
+
+CSS = 'body { color: red; }\n@font-face { src: url("./fonts/icons.woff2?v=1") format("woff2"); }\n' * 20
+HTML = '<link href="/static/app.css" rel="stylesheet"><script src="/static/js/app.js"></script>'
+
+@pytest.fixture
+def frontend(tmp_path):
+    """Мини-фронтенд: страница, стили со шрифтом, скрипт и service worker"""
+    source = tmp_path / "frontend"
+    (source / "fonts").mkdir(parents=True)
+    (source / "js").mkdir()
+    (source / "fonts" / "icons.woff2").write_bytes(b"wOF2" * 50)
+    (source / "app.css").write_text(CSS)
+    (source / "js" / "app.js").write_text("console.log('касса');\n" * 100)
+    (source / "index.html").write_text(HTML * 10)
+    (source / "sw.js").write_text("self.addEventListener('fetch', () => {});\n")
+    output = source / "dist"
+    manifest = build_assets(str(source), str(output))
+    return output, manifest
+
+@pytest.fixture
+def static_client(frontend):
+    output, manifest = frontend
+    app = Starlette(routes=[Mount("/static", FrontendFiles(directory=str(output)))])
+    return TestClient(app), manifest
+
+class TestBuildAssets:
+    """Тесты сборки статики"""
+
+    def test_fingerprinted_names(self, frontend):
+        """Тест имен с хешем содержимого"""
+        # Arrange
+        output, manifest = frontend
+
+        # Assert
+        assert set(manifest["assets"]) == {"app.css", "js/app.js", "fonts/icons.woff2"}
+        for hashed in manifest["assets"].values():
+            assert is_fingerprinted(hashed)
+            assert (output / hashed).exists()
+        assert not is_fingerprinted("index.html")
+        # URL service worker'а должен оставаться прежним
+        assert (output / "sw.js").exists()
+
+    def test_references_rewritten(self, frontend):
+        """Тест переписывания ссылок в HTML и CSS"""
+        # Arrange
+        output, manifest = frontend
+        assets = manifest["assets"]
+
+        # Act
+        html = (output / "index.html").read_text()
+        css = (output / assets["app.css"]).read_text()
+
+        # Assert
+        assert f'href="/static/{assets["app.css"]}"' in html
+        assert f'src="/static/{assets["js/app.js"]}"' in html
+        assert f'url("{assets["fonts/icons.woff2"]}")' in css
+        assert "?v=1" not in css
+
+    def test_precompressed(self, frontend):
+        """Тест заранее сжатых файлов (шрифты не сжимаются)"""
+        # Arrange
+        output, manifest = frontend
+        css_name = manifest["assets"]["app.css"]
+
+        # Assert
+        assert "gzip" in manifest["precompressed"][css_name]
+        assert gzip.decompress((output / (css_name + ".gz")).read_bytes()) == (output / css_name).read_bytes()
+        assert manifest["assets"]["fonts/icons.woff2"] not in manifest["precompressed"]
+
+    def test_build_is_reproducible(self, frontend, tmp_path):
+        """Тест повторной сборки: те же хеши"""
+        # Arrange
+        output, manifest = frontend
+
+        # Act
+        rebuilt = build_assets(str(output.parent), str(tmp_path / "dist2"))
+
+        # Assert
+        assert rebuilt == manifest
+
+    def test_stale_build(self, frontend, tmp_path):
+        """Тест: сборка старше измененных исходников"""
+        # Arrange
+        output, manifest = frontend
+        built = os.path.getmtime(output / "manifest.json")
+        source = output.parent
+
+        # Act
+        fresh = is_stale(str(source), str(output))
+        os.utime(source / "js" / "app.js", (built + 10, built + 10))
+
+        # Assert
+        assert not fresh
+        assert is_stale(str(source), str(output))
+        assert is_stale(str(source), str(tmp_path / "missing"))
+
+class TestFrontendFiles:
+    """Тесты раздачи собранной статики"""
+
+    def test_immutable_asset_precompressed(self, static_client):
+        """Тест файла с хешем: кэш на год и готовый .gz"""
+        # Arrange
+        client, manifest = static_client
+        css_name = manifest["assets"]["app.css"]
+
+        # Act
+        response = client.get(f"/static/{css_name}", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/css")
+        assert response.text == CSS.replace(
+            'url("./fonts/icons.woff2?v=1")', f'url("{manifest["assets"]["fonts/icons.woff2"]}")'
+        )
+
+    def test_identity_when_not_accepted(self, static_client):
+        """Тест клиента без поддержки сжатия"""
+        # Arrange
+        client, manifest = static_client
+
+        # Act
+        response = client.get(f"/static/{manifest['assets']['js/app.js']}", headers={"Accept-Encoding": "identity"})
+
+        # Assert
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+
+    def test_html_revalidates(self, static_client):
+        """Тест HTML: no-cache и 304 по ETag"""
+        # Arrange
+        client, _ = static_client
+        first = client.get("/static/index.html")
+
+        # Act
+        second = client.get("/static/index.html", headers={"If-None-Match": first.headers["etag"]})
+
+        # Assert
+        assert first.headers["cache-control"] == REVALIDATE_CACHE
+        assert second.status_code == 304
+        assert second.headers["cache-control"] == REVALIDATE_CACHE
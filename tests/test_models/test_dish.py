@@ -1,6 +1,7 @@
 import pytest
 from decimal import Decimal
-from backend.src.models import Dish, Category
+from backend.src.models import Dish, DishPrice, Category, price_at
+from backend.src.models.menu_sync import backfill_dish_prices
 import uuid
 
 class TestDishModel:
@@ -99,3 +100,45 @@ class TestDishModel:
             assert dish.price == expected_decimal
             # Проверяем, что сохранилось 2 знака после запятой
             assert str(dish.price) == price_str
+
+    def test_price_history(self, db_session, create_test_category):
+        """Тест: история цен пишется при создании и смене цены, но не при переименовании"""
+        # Arrange
+        category = create_test_category()
+        dish = Dish(name="Плов", price=Decimal("12.50"), category_id=category.category_id)
+        db_session.add(dish)
+        db_session.commit()
+        created = dish.version
+
+        # Act
+        dish.name = "Плов с бараниной"
+        db_session.commit()
+        renamed = dish.version
+        dish.price = Decimal("15.00")
+        db_session.commit()
+
+        # Assert
+        history = [
+            (row.version, row.price)
+            for row in db_session.query(DishPrice).filter_by(dish_id=dish.dish_id).order_by(DishPrice.version)
+        ]
+        assert history == [(created, Decimal("12.50")), (dish.version, Decimal("15.00"))]
+        assert price_at(history, renamed) == Decimal("12.50")
+        assert price_at(history, dish.version) == Decimal("15.00")
+        assert price_at(history, created - 1) is None
+
+    def test_backfill_dish_prices(self, db_session, create_test_dish):
+        """Тест: блюда без истории (созданные до нее) получают текущую цену"""
+        # Arrange
+        dish = create_test_dish(price=Decimal("40.00"))
+        db_session.query(DishPrice).delete()
+        db_session.commit()
+
+        # Act
+        filled = backfill_dish_prices(db_session.connection())
+        again = backfill_dish_prices(db_session.connection())
+
+        # Assert
+        assert (filled, again) == (1, 0)
+        row = db_session.query(DishPrice).filter_by(dish_id=dish.dish_id).one()
+        assert (row.version, row.price) == (dish.version, Decimal("40.00"))
@@ -1,7 +1,9 @@
 import pytest
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from backend.src.models import Order, OrderItem
+from backend.src.models import order as order_module
+from backend.src.models.order import backfill_order_days
 import uuid
 
 class TestOrderModel:
@@ -124,3 +126,87 @@ class TestOrderModel:
         assert timedelta(hours=2.9) < time_diff < timedelta(hours=3.1)
     
 
+
+class TestBusinessDay:
+    """Тесты рабочего дня и времени заказа в UTC"""
+
+    @pytest.mark.parametrize("cutover,order_time,expected_day", [
+        (0, datetime(2024, 3, 15, 0, 30), 20240315),
+        (4, datetime(2024, 3, 15, 3, 59), 20240314),
+        (4, datetime(2024, 3, 15, 4, 0), 20240315),
+    ])
+    def test_business_day_on_insert(self, db_session, monkeypatch, cutover, order_time, expected_day):
+        """Тест: business_day учитывает час смены рабочего дня"""
+        # Arrange
+        monkeypatch.setattr(order_module, "BUSINESS_DAY_CUTOVER_HOUR", cutover)
+        order = Order(order_date=order_time)
+
+        # Act
+        db_session.add(order)
+        db_session.commit()
+
+        # Assert
+        assert order.business_day == expected_day
+
+    def test_epoch_in_utc(self, db_session):
+        """Тест: order_epoch_ms - момент заказа в UTC (хранится время столовой)"""
+        # Arrange
+        order = Order(order_date=datetime(2024, 3, 15, 12, 0))
+
+        # Act
+        db_session.add(order)
+        db_session.commit()
+
+        # Assert
+        expected = datetime(2024, 3, 15, 9, 0, tzinfo=timezone.utc).timestamp() * 1000
+        assert order.order_epoch_ms == expected
+
+    def test_changed_date_restamped(self, db_session):
+        """Тест: при изменении order_date производные колонки пересчитываются"""
+        # Arrange
+        order = Order(order_date=datetime(2024, 3, 15, 12, 0))
+        db_session.add(order)
+        db_session.commit()
+
+        # Act
+        order.order_date = datetime(2024, 3, 16, 12, 0)
+        db_session.commit()
+
+        # Assert
+        assert order.business_day == 20240316
+
+    def test_backfill_order_days(self, db_session):
+        """Тест: заказам без business_day колонки заполняются"""
+        # Arrange
+        order = Order(order_date=datetime(2024, 3, 15, 12, 0))
+        db_session.add(order)
+        db_session.commit()
+        db_session.query(Order).update({"business_day": None, "order_epoch_ms": None})
+        db_session.commit()
+
+        # Act
+        filled = backfill_order_days(db_session.connection())
+        db_session.expire_all()
+
+        # Assert
+        assert filled == 1
+        assert (order.business_day, order.order_epoch_ms) == (20240315, 1710493200000)
+
+    def test_daily_report_uses_business_day(self, client, db_session, monkeypatch):
+        """Тест: ночной заказ до смены дня попадает в отчет предыдущего дня"""
+        # Arrange
+        monkeypatch.setattr(order_module, "BUSINESS_DAY_CUTOVER_HOUR", 4)
+        db_session.add_all([
+            Order(order_date=datetime(2024, 3, 15, 23, 30), total_amount=Decimal("100.00")),
+            Order(order_date=datetime(2024, 3, 16, 1, 30), total_amount=Decimal("50.00")),
+            Order(order_date=datetime(2024, 3, 16, 9, 0), total_amount=Decimal("10.00")),
+        ])
+        db_session.commit()
+
+        # Act
+        report = client.get("/api/reports/daily", params={"report_date": "2024-03-15"}).json()
+
+        # Assert
+        assert report["orders_count"] == 2
+        assert report["daily_total"] == 150.0
+        assert [order["time"] for order in report["orders"]] == ["23:30", "01:30"]
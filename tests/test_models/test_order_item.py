@@ -1,6 +1,7 @@
 import pytest
 from decimal import Decimal
 from backend.src.models import OrderItem, Order, Dish
+from backend.src.models.order_item import backfill_item_snapshots
 import uuid
 
 class TestOrderItemModel:
@@ -143,3 +144,27 @@ class TestOrderItemModel:
         assert order_item.item_total == expected_total
         assert order_item.item_total == Decimal("361.50")  # 120.50 * 3
 
+    def test_backfill_item_snapshots(self, db_session, create_test_dish):
+        """Тест: позиции без снимка получают цену продажи и название блюда"""
+        # Arrange
+        dish = create_test_dish(name="Плов", price=Decimal("12.50"))
+        order = Order(order_id=str(uuid.uuid4()), total_amount=Decimal("25.00"))
+        db_session.add(order)
+        db_session.flush()
+        legacy = OrderItem(order_id=order.order_id, dish_id=dish.dish_id, quantity=2, item_total=Decimal("25.00"))
+        orphan = OrderItem(order_id=order.order_id, dish_id=str(uuid.uuid4()), quantity=3, item_total=Decimal("100.00"))
+        db_session.add_all([legacy, orphan])
+        db_session.commit()
+        # Цена в меню изменилась после продажи
+        dish.price = Decimal("99.00")
+        db_session.commit()
+
+        # Act
+        filled = backfill_item_snapshots(db_session.connection())
+        again = backfill_item_snapshots(db_session.connection())
+        db_session.expire_all()
+
+        # Assert
+        assert (filled, again) == (2, 0)
+        assert (legacy.dish_name, legacy.price_per_item) == ("Плов", Decimal("12.50"))
+        assert (orphan.dish_name, orphan.price_per_item) == ("Неизвестное блюдо", Decimal("33.33"))